@@ -17,11 +17,10 @@ import threading
 import time
 import os
 import subprocess
-from screeninfo import get_monitors
 import logging
 from datetime import datetime, timezone, timedelta
 import re
-import pyautogui
+import math
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
@@ -29,10 +28,126 @@ from email.header import Header
 import socket
 import sys
 import websocket
+import importlib
+import xpath_config
 from xpath_config import XPathConfig
 import random
-
-
+import heapq
+import bisect
+from array import array
+from types import SimpleNamespace
+from typing import Union
+import signal
+import base64
+from collections import deque
+import asyncio
+try:
+    import websockets  # 可选: CDP直连热路径,未安装时退回Selenium
+except ImportError:
+    websockets = None
+try:
+    import numpy as np  # 可选: 领先滞后分析,未安装时不做估计
+except ImportError:
+    np = None
+try:
+    import orjson  # 可选: 币安行情快速解码
+except ImportError:
+    orjson = None
+try:
+    import msgspec  # 可选: 币安行情按结构体解码,优先于 orjson
+except ImportError:
+    msgspec = None
+
+
+
+
+# 交易标签页屏蔽的请求: 图片、字体、媒体、统计分析和价格走势图数据
+# 盘口、下单和持仓只依赖页面脚本和接口数据,不依赖这些资源
+BLOCKED_URL_PATTERNS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.avif', '*.ico',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.mp4', '*.webm',
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+    '*segment.io*', '*segment.com*', '*mixpanel.com*', '*amplitude.com*',
+    '*hotjar.com*', '*sentry.io*', '*intercom.io*', '*datadoghq.com*',
+    '*prices-history*'
+]
+
+# 每日 Up or Down 市场的标题前缀,完整标题为 "<前缀> June 10?"
+COIN_SEARCH_TEXT = {
+    'BTC': 'Bitcoin Up or Down on',
+    'ETH': 'Ethereum Up or Down on',
+    'SOL': 'Solana Up or Down on',
+    'XRP': 'XRP Up or Down on'
+}
+
+# CDP直连热路径使用的页面脚本,第一个参数均为XPath列表(依次尝试)
+CDP_JS_FIND = '''
+    function findByXpaths(xpaths) {
+        for (const xpath of xpaths) {
+            const node = document.evaluate(xpath, document, null,
+                XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+            if (node) { return node; }
+        }
+        return null;
+    }
+'''
+
+# 读盘口: 与 get_nearby_cents 相同,取 Spread 所在容器上下兄弟节点的文本
+# 在盘口容器的父节点上挂 MutationObserver,记录最近一次DOM变化的时间(epoch毫秒),
+# 读价脚本一并返回 mutated_at,用于测量"页面变化 -> Python读到"的延迟
+JS_WATCH_MUTATIONS = '''
+    const watched = container.parentElement || container;
+    if (window.__pmWatched !== watched) {
+        if (window.__pmObserver) { window.__pmObserver.disconnect(); }
+        window.__pmObserver = new MutationObserver(() => {
+            window.__pmMutatedAt = performance.timeOrigin + performance.now();
+        });
+        window.__pmObserver.observe(watched, { subtree: true, childList: true, characterData: true });
+        window.__pmWatched = watched;
+    }
+    result.mutated_at = window.__pmMutatedAt || null;
+'''
+
+CDP_JS_SIBLING_TEXTS = '''function(xpaths) {''' + CDP_JS_FIND + '''
+    const spread = findByXpaths(xpaths);
+    if (!spread) { return false; }
+    let container = spread;
+    for (let i = 0; i < 3 && container.parentElement; i++) { container = container.parentElement; }
+    const result = { above_texts: [], below_texts: [] };
+    let above_e = container;
+    while (above_e = above_e.previousElementSibling) {
+        result.above_texts.push((above_e.innerText || above_e.textContent || "").trim());
+    }
+    let below_e = container;
+    while (below_e = below_e.nextElementSibling) {
+        result.below_texts.push((below_e.innerText || below_e.textContent || "").trim());
+    }''' + JS_WATCH_MUTATIONS + '''
+    return result;
+}'''
+
+# 填金额: React 受控输入框需要用原生setter赋值并派发input事件
+CDP_JS_SET_INPUT = '''function(xpaths, value) {''' + CDP_JS_FIND + '''
+    const input = findByXpaths(xpaths);
+    if (!input) { return false; }
+    const setter = Object.getOwnPropertyDescriptor(HTMLInputElement.prototype, 'value').set;
+    input.focus();
+    setter.call(input, value);
+    input.dispatchEvent(new Event('input', { bubbles: true }));
+    input.dispatchEvent(new Event('change', { bubbles: true }));
+    return true;
+}'''
+
+CDP_JS_CLICK = '''function(xpaths) {''' + CDP_JS_FIND + '''
+    const node = findByXpaths(xpaths);
+    if (!node) { return false; }
+    node.click();
+    return true;
+}'''
+
+CDP_JS_TEXT = '''function(xpaths) {''' + CDP_JS_FIND + '''
+    const node = findByXpaths(xpaths);
+    return node ? (node.innerText || node.textContent || "") : null;
+}'''
 
 
 class Logger:
@@ -82,6 +197,1579 @@ class Logger:
     def critical(self, message):
         self.logger.critical(message)
 
+class Metrics:
+    """运行指标统计,提供计数器、当前值和耗时分布"""
+    def __init__(self, max_samples=1000):
+        self.lock = threading.Lock()
+        self.max_samples = max_samples
+        self.counters = {}
+        self.gauges = {}
+        self.samples = {}
+
+    def incr(self, name, value=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def set_gauge(self, name, value):
+        with self.lock:
+            self.gauges[name] = value
+
+    def observe(self, name, value):
+        with self.lock:
+            if name not in self.samples:
+                self.samples[name] = deque(maxlen=self.max_samples)
+            self.samples[name].append(value)
+
+    def summary(self, name):
+        """返回某个分布的统计: count/mean/p50/p95/p99/max"""
+        with self.lock:
+            values = sorted(self.samples.get(name, ()))
+        if not values:
+            return None
+        return {
+            'count': len(values),
+            'mean': sum(values) / len(values),
+            'p50': values[int((len(values) - 1) * 0.5)],
+            'p95': values[int((len(values) - 1) * 0.95)],
+            'p99': values[int((len(values) - 1) * 0.99)],
+            'max': values[-1]
+        }
+
+    def snapshot(self):
+        """返回所有指标的快照"""
+        with self.lock:
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+            names = list(self.samples)
+        return {
+            'counters': counters,
+            'gauges': gauges,
+            'distributions': {name: self.summary(name) for name in names}
+        }
+
+class BrowserCommandQueue:
+    """串行执行下单会话(self.driver)上所有WebDriver命令的优先级队列
+    
+    Selenium会话不是线程安全的,监控线程、Tk定时器、threading.Timer和自动找币
+    都通过这里把命令交给同一个浏览器线程执行。优先级: 交易 > 读价 > URL检查/刷新 > 健康检查。
+    交易命令入队时置位抢占标志,正在执行的低优先级命令在检查点调用 should_yield() 主动让出。
+    """
+    TRADE = 0
+    PRICE = 1
+    NAVIGATION = 2
+    HEALTH = 3
+    PRIORITY_NAMES = {0: 'trade', 1: 'price', 2: 'navigation', 3: 'health'}
+
+    def __init__(self, logger, metrics, default_timeout=120):
+        self.logger = logger
+        self.metrics = metrics
+        self.default_timeout = default_timeout
+        self.condition = threading.Condition()
+        self.commands = []
+        self.counter = 0
+        self.pending = {}              # 命令名 -> 最近一个尚未完成的同名命令
+        self.pending_trades = 0
+        self.preempt_event = threading.Event()
+        self.worker = None
+        self.stopped = False
+
+    def start(self):
+        with self.condition:
+            if self.worker and self.worker.is_alive():
+                return
+            self.stopped = False
+            self.worker = threading.Thread(target=self._worker_loop, name='browser-worker', daemon=True)
+            self.worker.start()
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+
+    def on_worker_thread(self):
+        return threading.current_thread() is self.worker
+
+    def should_yield(self, name=''):
+        """低优先级命令的检查点: 有交易等待执行时返回True"""
+        if self.preempt_event.is_set():
+            self.metrics.incr('browser_queue.preempted')
+            self.logger.info(f"⏸️ {name} 让出浏览器给交易命令")
+            return True
+        return False
+
+    def submit(self, priority, name, func, dedupe=False):
+        """异步提交命令,返回命令对象;dedupe=True时同名命令已在队列中则跳过"""
+        with self.condition:
+            if dedupe and name in self.pending:
+                self.metrics.incr('browser_queue.deduped')
+                return None
+            self.counter += 1
+            command = SimpleNamespace(priority=priority, name=name, func=func,
+                                      enqueued=time.time(), done=threading.Event(),
+                                      result=None, error=None)
+            heapq.heappush(self.commands, (priority, self.counter, command))
+            self.pending[name] = command
+            if priority == self.TRADE:
+                self.pending_trades += 1
+                self.preempt_event.set()
+            self.metrics.set_gauge('browser_queue.depth', len(self.commands))
+            self.condition.notify()
+        self.start()
+        return command
+
+    def run(self, priority, name, func, timeout=None):
+        """提交命令并等待结果
+        
+        已在浏览器线程中时直接执行;Tk主线程不能等待(浏览器线程中的命令可能需要访问Tk控件,
+        主线程阻塞会死锁),在主线程调用时抛出 RuntimeError,主线程应显式使用 submit。
+        交易命令不设超时,一直等到执行完毕: 超时返回后命令仍会继续执行,调用方若据此重置交易状态
+        会再次下单;同名交易命令尚未完成时不重复入队,直接等待已有命令的结果
+        """
+        if self.on_worker_thread():
+            return func()
+        if threading.current_thread() is threading.main_thread():
+            raise RuntimeError(f"不能在Tk主线程中等待浏览器命令 {name},请使用 submit")
+        if priority == self.TRADE:
+            with self.condition:
+                command = self.pending.get(name)
+                if command is None:
+                    command = self.submit(priority, name, func)
+                else:
+                    self.metrics.incr('browser_queue.deduped')
+                    self.logger.warning(f"⚠️ 交易命令 {name} 仍在执行,等待其结果而不重复下单")
+            command.done.wait()
+        else:
+            command = self.submit(priority, name, func)
+            if not command.done.wait(timeout or self.default_timeout):
+                raise TimeoutError(f"浏览器命令 {name} 等待超时")
+        if command.error:
+            raise command.error
+        return command.result
+
+    def _worker_loop(self):
+        while True:
+            with self.condition:
+                while not self.stopped and not self.commands:
+                    self.condition.wait()
+                if self.stopped:
+                    return
+                _, _, command = heapq.heappop(self.commands)
+                self.metrics.set_gauge('browser_queue.depth', len(self.commands))
+            
+            priority_name = self.PRIORITY_NAMES.get(command.priority, str(command.priority))
+            start_time = time.time()
+            self.metrics.observe(f'browser_cmd.{command.name}.wait_seconds', start_time - command.enqueued)
+            self.metrics.observe(f'browser_queue.{priority_name}.wait_seconds', start_time - command.enqueued)
+            try:
+                command.result = command.func()
+            except Exception as e:
+                command.error = e
+                self.logger.error(f"浏览器命令 {command.name} 执行失败: {str(e)}")
+            finally:
+                elapsed = time.time() - start_time
+                self.metrics.observe(f'browser_cmd.{command.name}.exec_seconds', elapsed)
+                self.metrics.observe(f'browser_queue.{priority_name}.exec_seconds', elapsed)
+                with self.condition:
+                    if self.pending.get(command.name) is command:
+                        del self.pending[command.name]
+                    if command.priority == self.TRADE:
+                        self.pending_trades -= 1
+                        if self.pending_trades <= 0:
+                            self.pending_trades = 0
+                            self.preempt_event.clear()
+                command.done.set()
+
+class CDPClient:
+    """直接连接Chrome调试端口websocket的轻量CDP客户端(asyncio)
+    
+    只用于读盘口、填金额、点确认、读交易记录这几个热路径操作,
+    省掉 Python -> chromedriver HTTP -> DevTools 的中间一跳;复杂流程仍使用Selenium。
+    所有客户端共用一个后台事件循环线程,call() 供普通线程同步调用。
+    """
+    _loop = None
+    _loop_lock = threading.Lock()
+
+    def __init__(self, logger, port=9222):
+        self.logger = logger
+        self.port = port
+        self.target_id = None
+        self.ws = None
+        self.message_id = 0
+        self.pending = {}
+        self.connected = False
+
+    @classmethod
+    def _event_loop(cls):
+        with cls._loop_lock:
+            if cls._loop is None:
+                cls._loop = asyncio.new_event_loop()
+                threading.Thread(target=cls._loop.run_forever, name='cdp-loop', daemon=True).start()
+            return cls._loop
+
+    def _run(self, coro, timeout):
+        future = asyncio.run_coroutine_threadsafe(coro, self._event_loop())
+        try:
+            return future.result(timeout)
+        except Exception:
+            future.cancel()
+            raise
+
+    def connect(self, target_id, timeout=5):
+        """连接到指定标签页,target_id 即 Selenium 的 window handle"""
+        if websockets is None:
+            return False
+        self.target_id = target_id
+        try:
+            self._run(self._connect(), timeout)
+            self.connected = True
+            return True
+        except Exception as e:
+            self.logger.warning(f"❌ CDP直连标签页失败({target_id}): {str(e)}")
+            return False
+
+    async def _connect(self):
+        url = f"ws://127.0.0.1:{self.port}/devtools/page/{self.target_id}"
+        self.ws = await websockets.connect(url, max_size=None, ping_interval=None)
+        asyncio.ensure_future(self._reader())
+
+    async def _reader(self):
+        try:
+            async for message in self.ws:
+                data = json.loads(message)
+                future = self.pending.pop(data.get('id'), None)
+                if future is None or future.done():
+                    continue
+                if 'error' in data:
+                    future.set_exception(RuntimeError(data['error'].get('message', 'CDP错误')))
+                else:
+                    future.set_result(data.get('result', {}))
+        except Exception:
+            pass
+        finally:
+            self.connected = False
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("CDP连接已断开"))
+            self.pending.clear()
+
+    async def _send(self, method, params):
+        self.message_id += 1
+        message_id = self.message_id
+        future = asyncio.get_running_loop().create_future()
+        self.pending[message_id] = future
+        try:
+            await self.ws.send(json.dumps({'id': message_id, 'method': method, 'params': params or {}}))
+            return await future
+        finally:
+            self.pending.pop(message_id, None)
+
+    def call(self, method, params=None, timeout=5):
+        if not self.connected:
+            raise ConnectionError("CDP未连接")
+        return self._run(self._send(method, params), timeout)
+
+    def evaluate(self, expression, timeout=5):
+        """执行表达式并按值返回结果"""
+        result = self.call('Runtime.evaluate', {'expression': expression, 'returnByValue': True}, timeout)
+        if 'exceptionDetails' in result:
+            raise RuntimeError(result['exceptionDetails'].get('text', '页面脚本异常'))
+        return result.get('result', {}).get('value')
+
+    def call_function(self, function_source, *args, timeout=5):
+        """以JSON参数调用页面脚本函数"""
+        arguments = ', '.join(json.dumps(arg, ensure_ascii=False) for arg in args)
+        return self.evaluate(f"({function_source})({arguments})", timeout)
+
+    def close(self):
+        self.connected = False
+        if self.ws:
+            try:
+                self._run(self.ws.close(), 2)
+            except Exception:
+                pass
+            self.ws = None
+
+class TabManager:
+    """统一管理Chrome标签页
+    
+    每个标签页登记一个角色(trade/price/next/discovery),同角色的标签页优先复用;
+    标签页总数超过上限时先回收孤儿标签页和 discovery 标签页;
+    未登记的孤儿标签页超过宽限时间后通过 Target.closeTarget 关闭(不切换当前标签页)。
+    """
+    ROLES = ('trade', 'price', 'next', 'discovery')
+
+    def __init__(self, logger, metrics, max_tabs=4, orphan_grace_seconds=300):
+        self.logger = logger
+        self.metrics = metrics
+        self.max_tabs = max_tabs
+        self.orphan_grace_seconds = orphan_grace_seconds
+        self.lock = threading.Lock()
+        self.tabs = {}                 # handle -> role
+        self.orphan_first_seen = {}    # handle -> 首次发现为孤儿的时间
+
+    def register(self, handle, role):
+        with self.lock:
+            # 每个角色(discovery除外)只保留一个标签页
+            if role != 'discovery':
+                for other_handle, other_role in list(self.tabs.items()):
+                    if other_role == role and other_handle != handle:
+                        del self.tabs[other_handle]
+            self.tabs[handle] = role
+            self.orphan_first_seen.pop(handle, None)
+
+    def release(self, handle):
+        with self.lock:
+            self.tabs.pop(handle, None)
+
+    def reset(self):
+        """切换到另一个Chrome进程后清空所有登记"""
+        with self.lock:
+            self.tabs = {}
+            self.orphan_first_seen = {}
+
+    def release_role(self, role):
+        with self.lock:
+            for handle, tab_role in list(self.tabs.items()):
+                if tab_role == role:
+                    del self.tabs[handle]
+
+    def handle_for(self, role):
+        with self.lock:
+            for handle, tab_role in self.tabs.items():
+                if tab_role == role:
+                    return handle
+        return None
+
+    def tabs_snapshot(self):
+        with self.lock:
+            return dict(self.tabs)
+
+    def acquire(self, driver, role, url=None):
+        """切换到角色对应的标签页,不存在时新开一个;url不同则导航过去
+        
+        Returns:
+            str: 标签页handle
+        """
+        live_handles = driver.window_handles
+        self.prune(live_handles)
+        handle = self.handle_for(role) if role != 'discovery' else None
+        if handle in live_handles:
+            driver.switch_to.window(handle)
+            self.metrics.incr(f'tabs.{role}.reused')
+        else:
+            if len(live_handles) >= self.max_tabs:
+                self.reap_orphans(driver, force=True)
+                self.close_role(driver, 'discovery')
+                if len(driver.window_handles) >= self.max_tabs:
+                    self.logger.warning(f"❌ 标签页数量已达上限({self.max_tabs}),仍为 {role} 新开标签页")
+            driver.switch_to.new_window('tab')
+            handle = driver.current_window_handle
+            self.register(handle, role)
+            self.metrics.incr(f'tabs.{role}.opened')
+        if url and driver.current_url.split('?', 1)[0].rstrip('/') != url.split('?', 1)[0].rstrip('/'):
+            driver.get(url)
+        return handle
+
+    def adopt(self, driver, role):
+        """会话重连后: 角色原有标签页还在就切换过去,否则把当前标签页登记为该角色"""
+        handle = self.handle_for(role)
+        if handle and handle in driver.window_handles:
+            driver.switch_to.window(handle)
+            return handle
+        handle = driver.current_window_handle
+        self.register(handle, role)
+        return handle
+
+    def prune(self, live_handles):
+        """去掉已经不存在的标签页登记"""
+        with self.lock:
+            for handle in list(self.tabs):
+                if handle not in live_handles:
+                    del self.tabs[handle]
+
+    def close_role(self, driver, role):
+        """关闭某个角色的所有标签页"""
+        with self.lock:
+            handles = [handle for handle, tab_role in self.tabs.items() if tab_role == role]
+        for handle in handles:
+            self._close_target(driver, handle)
+            self.release(handle)
+
+    def reap_orphans(self, driver, force=False):
+        """关闭未登记的孤儿标签页,force=True 时忽略宽限时间
+        
+        Returns:
+            int: 关闭的标签页数
+        """
+        targets = driver.execute_cdp_cmd('Target.getTargets', {}).get('targetInfos', [])
+        pages = [target['targetId'] for target in targets if target.get('type') == 'page']
+        owned = self.tabs_snapshot()
+        if not owned:
+            # 还没有登记任何标签页时不回收,避免启动阶段误关
+            return 0
+        now = time.time()
+        reaped = 0
+        for target_id in pages:
+            if target_id in owned:
+                continue
+            first_seen = self.orphan_first_seen.setdefault(target_id, now)
+            if force or now - first_seen >= self.orphan_grace_seconds:
+                if self._close_target(driver, target_id):
+                    reaped += 1
+                self.orphan_first_seen.pop(target_id, None)
+        for target_id in list(self.orphan_first_seen):
+            if target_id not in pages:
+                del self.orphan_first_seen[target_id]
+        if reaped:
+            self.metrics.incr('tabs.reaped', reaped)
+            self.logger.info(f"🧹 已关闭{reaped}个孤儿标签页")
+        return reaped
+
+    def _close_target(self, driver, target_id):
+        try:
+            driver.execute_cdp_cmd('Target.closeTarget', {'targetId': target_id})
+            return True
+        except Exception as e:
+            self.logger.debug(f"关闭标签页失败({target_id}): {str(e)}")
+            return False
+
+class MarketDiscovery:
+    """通过 Polymarket 市场JSON接口(Gamma API)解析每日 Up or Down 市场的URL
+    
+    不再打开搜索标签页: 先按币种和日期预测slug(如 solana-up-or-down-on-june-10)并向接口验证,
+    预测失败再按与 click_today_card 相同的标题在搜索结果中匹配。
+    解析结果按币种和日期缓存到磁盘,换日时只需查字典。api_base_url 可配置,便于对接本地桩服务测试。
+    """
+    def __init__(self, logger, api_base_url='https://gamma-api.polymarket.com',
+                 cache_file='market_cache.json', timeout=5):
+        self.logger = logger
+        self.api_base_url = api_base_url.rstrip('/')
+        self.cache_file = cache_file
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.cache = self._load_cache()
+
+    @staticmethod
+    def date_text(day):
+        """与 click_today_card 相同的日期文本,例如 "June 10"(无前导零)"""
+        return f"{day.strftime('%B')} {day.day}"
+
+    @classmethod
+    def expected_title(cls, coin, day):
+        return f"{COIN_SEARCH_TEXT[coin]} {cls.date_text(day)}?"
+
+    @classmethod
+    def predict_slug(cls, coin, day):
+        """由标题推出slug: "Solana Up or Down on June 10?" -> solana-up-or-down-on-june-10"""
+        return re.sub(r'[^a-z0-9]+', '-', cls.expected_title(coin, day).lower()).strip('-')
+
+    def _load_cache(self):
+        try:
+            if os.path.exists(self.cache_file):
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            self.logger.warning(f"❌ 读取市场缓存失败: {str(e)}")
+        return {}
+
+    def _save_cache(self):
+        try:
+            with open(self.cache_file, 'w', encoding='utf-8') as f:
+                json.dump(self.cache, f, indent=4, ensure_ascii=False)
+        except Exception as e:
+            self.logger.warning(f"❌ 保存市场缓存失败: {str(e)}")
+
+    def lookup(self, coin, day):
+        """从缓存中取某币种某天的市场URL"""
+        with self.lock:
+            return self.cache.get(coin, {}).get(day.strftime('%Y-%m-%d'))
+
+    def store(self, coin, day, url):
+        """写入缓存,同时清理昨天之前的记录"""
+        oldest = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+        with self.lock:
+            coin_cache = self.cache.setdefault(coin, {})
+            coin_cache[day.strftime('%Y-%m-%d')] = url
+            for key in [key for key in coin_cache if key < oldest]:
+                del coin_cache[key]
+            self._save_cache()
+
+    def search_events(self, query):
+        """调用站点搜索接口,返回事件列表"""
+        import requests
+        response = requests.get(f"{self.api_base_url}/public-search",
+                                params={'q': query, 'events_status': 'active', 'limit_per_type': 50},
+                                timeout=self.timeout)
+        response.raise_for_status()
+        data = response.json()
+        return data.get('events', []) if isinstance(data, dict) else data
+
+    def validate_slug(self, slug):
+        """向接口确认slug对应的市场存在且未结束"""
+        import requests
+        response = requests.get(f"{self.api_base_url}/events", params={'slug': slug}, timeout=self.timeout)
+        response.raise_for_status()
+        data = response.json()
+        events = data if isinstance(data, list) else [data]
+        return any(event.get('slug') == slug and not event.get('closed') for event in events)
+
+    def _resolve_predicted(self, coin, day):
+        """验证预测的slug,通过则写入缓存并返回URL"""
+        slug = self.predict_slug(coin, day)
+        try:
+            if self.validate_slug(slug):
+                url = f"https://polymarket.com/event/{slug}"
+                self.store(coin, day, url)
+                return url
+        except Exception as e:
+            self.logger.warning(f"❌ 验证预测市场 {slug} 失败: {str(e)}")
+        return None
+
+    def resolve(self, coin, day, use_cache=True):
+        """解析某币种某天的市场URL: 缓存 -> 预测slug -> 搜索接口,找不到时返回None"""
+        if use_cache:
+            cached_url = self.lookup(coin, day)
+            if cached_url:
+                return cached_url
+        url = self._resolve_predicted(coin, day)
+        if url:
+            return url
+        return self._match_event(self.search_events(COIN_SEARCH_TEXT[coin]), coin, day)
+
+    def _match_event(self, events, coin, day):
+        """在事件列表中找标题匹配的未结束市场,找到则写入缓存"""
+        expected = self.expected_title(coin, day).rstrip('?').lower()
+        for event in events:
+            title = (event.get('title') or '').strip().rstrip('?').lower()
+            if title == expected and event.get('slug') and not event.get('closed'):
+                url = f"https://polymarket.com/event/{event['slug']}"
+                self.store(coin, day, url)
+                return url
+        return None
+
+    def prefetch(self, coins, days_ahead=1):
+        """预先解析今天到 days_ahead 天后的市场,已缓存的跳过(后台验证线程调用)
+        
+        Returns:
+            int: 新解析到的市场数
+        """
+        resolved = 0
+        today = datetime.now()
+        days = [today + timedelta(days=offset) for offset in range(days_ahead + 1)]
+        for coin in coins:
+            missing_days = []
+            for day in days:
+                if self.lookup(coin, day):
+                    continue
+                url = self._resolve_predicted(coin, day)
+                if url:
+                    resolved += 1
+                    self.logger.info(f"✅ 预测的 {coin} {self.date_text(day)} 市场已验证: {url}")
+                else:
+                    missing_days.append(day)
+            if not missing_days:
+                continue
+            try:
+                # 每个币种只请求一次接口,匹配所有缺失的日期
+                events = self.search_events(COIN_SEARCH_TEXT[coin])
+                for day in missing_days:
+                    url = self._match_event(events, coin, day)
+                    if url:
+                        resolved += 1
+                        self.logger.info(f"✅ 已预解析 {coin} {self.date_text(day)} 市场: {url}")
+            except Exception as e:
+                self.logger.warning(f"❌ 预解析 {coin} 市场失败: {str(e)}")
+        return resolved
+
+# 币安行情消息解码: 优先 msgspec(按事件类型的结构体,只解析用到的字段),其次 orjson,最后标准库 json
+if msgspec is not None:
+    class _TickerEvent(msgspec.Struct, tag_field='e', tag='24hrTicker'):
+        E: int
+        s: str
+        c: str
+
+    class _AggTradeEvent(msgspec.Struct, tag_field='e', tag='aggTrade'):
+        E: int
+        s: str
+        a: int
+        p: str
+        T: int
+
+    class _DepthEvent(msgspec.Struct, tag_field='e', tag='depthUpdate'):
+        E: int
+        s: str
+        U: int
+        u: int
+        b: list
+        a: list
+
+    class _StreamEnvelope(msgspec.Struct):
+        data: Union[_TickerEvent, _AggTradeEvent, _DepthEvent]
+
+
+class BinanceDecoder:
+    """把 combined stream 原始消息解码成事件字典(即 data 部分)
+    
+    msgspec 后端只解析三种事件用到的字段,其余字段直接跳过;orjson 和 json 后端解析整条消息。
+    msgspec 遇到未定义的事件类型时退回标准库解析。
+    """
+    BACKENDS = ('msgspec', 'orjson', 'json')
+
+    def __init__(self, backend=None):
+        available = self.available_backends()
+        self.backend = backend if backend in available else available[0]
+        if self.backend == 'msgspec':
+            self._decoder = msgspec.json.Decoder(_StreamEnvelope)
+
+    @staticmethod
+    def available_backends():
+        return [backend for backend, module in (('msgspec', msgspec), ('orjson', orjson), ('json', json))
+                if module is not None]
+
+    def decode(self, raw):
+        if self.backend == 'msgspec':
+            try:
+                event = self._decoder.decode(raw).data
+            except msgspec.ValidationError:
+                return self._decode_json(raw)
+            data = msgspec.structs.asdict(event)
+            data['e'] = event.__struct_config__.tag
+            return data
+        if self.backend == 'orjson':
+            payload = orjson.loads(raw)
+            return payload.get('data', payload)
+        return self._decode_json(raw)
+
+    @staticmethod
+    def _decode_json(raw):
+        payload = json.loads(raw)
+        return payload.get('data', payload)
+
+
+def backoff_delay(attempt, base=1.0, cap=60.0):
+    """带抖动的指数退避: 第 attempt 次重试等待 [0.5, 1] × min(cap, base × 2^attempt) 秒"""
+    return min(cap, base * (2 ** attempt)) * random.uniform(0.5, 1.0)
+
+
+class ResilientWebSocket:
+    """带退避重连、心跳超时和断线统计的 websocket 客户端
+    
+    断线后按 backoff_delay 指数退避加抖动重连,连接稳定 stable_seconds 秒后退避次数清零。
+    run_forever 按 ping_interval 发 ping,ping_timeout 内收不到 pong 即断开;
+    超过 idle_timeout 秒没有任何消息也主动断开重连。重连成功时通过 on_reconnect(断开时间, 恢复时间)
+    通知调用方补数据,断线时长记入 ws.{name}.disconnected_seconds。
+    """
+    def __init__(self, logger, name, url, on_message, on_open=None, on_reconnect=None, metrics=None,
+                 base_delay=1.0, max_delay=60.0, ping_interval=20, ping_timeout=10, idle_timeout=30,
+                 stable_seconds=60):
+        self.logger = logger
+        self.name = name
+        self.url = url
+        self.on_message = on_message
+        self.on_open = on_open
+        self.on_reconnect = on_reconnect
+        self.metrics = metrics
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self.idle_timeout = idle_timeout
+        self.stable_seconds = stable_seconds
+        self.ws = None
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.connected_at = None
+        self.disconnected_at = None
+        self.last_message_at = None
+        self.gaps = deque(maxlen=100)   # 最近的断线记录 (断开时间, 恢复时间)
+
+    def start(self):
+        if self.thread and self.thread.is_alive():
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name=f'ws-{self.name}', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.ws:
+            try:
+                self.ws.close()
+            except Exception:
+                pass
+
+    @property
+    def connected(self):
+        return self.connected_at is not None
+
+    def _handle_open(self, ws):
+        now = time.time()
+        if self.disconnected_at:
+            gap_seconds = now - self.disconnected_at
+            self.gaps.append((self.disconnected_at, now))
+            self.logger.warning(f"⚠️ {self.name} 重连成功,断线 \033[31m{gap_seconds:.1f}\033[0m 秒")
+            if self.metrics:
+                self.metrics.observe(f'ws.{self.name}.disconnected_seconds', gap_seconds)
+                self.metrics.incr(f'ws.{self.name}.reconnects')
+            if self.on_reconnect:
+                try:
+                    self.on_reconnect(self.disconnected_at, now)
+                except Exception as e:
+                    self.logger.warning(f"{self.name} 重连回调异常: {str(e)}")
+        else:
+            self.logger.info(f"✅ {self.name} 已连接")
+        self.connected_at = now
+        self.last_message_at = now
+        self.disconnected_at = None
+        if self.on_open:
+            self.on_open()
+
+    def _handle_message(self, ws, message):
+        self.last_message_at = time.time()
+        self.on_message(ws, message)
+
+    def _handle_error(self, ws, error):
+        self.logger.warning(f"{self.name} 连接错误: {error}")
+
+    def _watchdog(self, ws):
+        """超过 idle_timeout 秒没有消息时断开,交给重连流程处理"""
+        while not self.stop_event.wait(5):
+            if self.ws is not ws:
+                return
+            if self.connected and self.last_message_at and time.time() - self.last_message_at > self.idle_timeout:
+                self.logger.warning(f"⚠️ {self.name} {self.idle_timeout}秒没有收到消息,断开重连")
+                try:
+                    ws.close()
+                except Exception:
+                    pass
+                return
+
+    def _run(self):
+        attempt = 0
+        while not self.stop_event.is_set():
+            try:
+                ws = websocket.WebSocketApp(self.url() if callable(self.url) else self.url,
+                                           on_open=self._handle_open, on_message=self._handle_message,
+                                           on_error=self._handle_error)
+                self.ws = ws
+                threading.Thread(target=self._watchdog, args=(ws,), daemon=True).start()
+                ws.run_forever(ping_interval=self.ping_interval, ping_timeout=self.ping_timeout)
+            except Exception as e:
+                self.logger.warning(f"{self.name} 主循环异常: {str(e)}")
+            finally:
+                self.ws = None
+            
+            now = time.time()
+            if self.connected_at:
+                # 连接稳定过一段时间才清零退避次数,避免连上就断时频繁重连
+                if now - self.connected_at >= self.stable_seconds:
+                    attempt = 0
+                self.connected_at = None
+                self.disconnected_at = now
+                self.logger.info(f"❌ {self.name} 连接已关闭")
+            if self.stop_event.is_set():
+                break
+            delay = backoff_delay(attempt, self.base_delay, self.max_delay)
+            attempt += 1
+            blind = f",已断线 {now - self.disconnected_at:.0f} 秒" if self.disconnected_at else ""
+            self.logger.info(f"{self.name} {delay:.1f} 秒后第 {attempt} 次重连{blind}")
+            self.stop_event.wait(delay)
+
+class DepthBook:
+    """数组存储的本地订单簿,按币安 snapshot + diff 规则同步
+    
+    买卖两侧各用两个 array('d') 保存价格和数量,价格升序排列、最优价在数组末尾(卖盘存负价格),
+    更新靠 bisect 定位,插入删除只移动最优价一侧的少量元素。超过 max_levels 时丢弃最远的档位。
+    同步规则: 未同步时缓存 diff;载入快照后丢弃 u <= lastUpdateId 的事件,之后每条事件须满足
+    U <= 上一次u+1 <= u,否则视为丢包需要重新取快照。
+    """
+    def __init__(self, max_levels=1000):
+        self.max_levels = max_levels
+        self.reset()
+
+    def reset(self):
+        self.bid_prices, self.bid_qtys = array('d'), array('d')
+        self.ask_prices, self.ask_qtys = array('d'), array('d')   # 卖盘价格取负,最优价同样在末尾
+        self.last_update_id = None
+        self.synced = False
+        self.pending = []
+
+    def _set_level(self, prices, qtys, key, qty):
+        index = bisect.bisect_left(prices, key)
+        if index < len(prices) and prices[index] == key:
+            if qty == 0:
+                del prices[index]
+                del qtys[index]
+            else:
+                qtys[index] = qty
+        elif qty != 0:
+            prices.insert(index, key)
+            qtys.insert(index, qty)
+            if len(prices) > self.max_levels:
+                del prices[0]
+                del qtys[0]
+
+    def _apply_levels(self, bids, asks):
+        for price, qty in bids:
+            self._set_level(self.bid_prices, self.bid_qtys, float(price), float(qty))
+        for price, qty in asks:
+            self._set_level(self.ask_prices, self.ask_qtys, -float(price), float(qty))
+
+    def load_snapshot(self, snapshot):
+        """载入 REST 快照并回放缓存的 diff,回放衔接不上时返回 False"""
+        pending = self.pending
+        self.reset()
+        bids = sorted((float(price), float(qty)) for price, qty in snapshot['bids'])[-self.max_levels:]
+        asks = sorted((-float(price), float(qty)) for price, qty in snapshot['asks'])[-self.max_levels:]
+        self.bid_prices.extend(price for price, _ in bids)
+        self.bid_qtys.extend(qty for _, qty in bids)
+        self.ask_prices.extend(price for price, _ in asks)
+        self.ask_qtys.extend(qty for _, qty in asks)
+        self.last_update_id = int(snapshot['lastUpdateId'])
+        self.synced = True
+        for event in pending:
+            if self.apply(event) == 'gap':
+                return False
+        return True
+
+    def apply(self, event):
+        """应用一条 depthUpdate,返回 'buffered' / 'stale' / 'applied' / 'gap'"""
+        if not self.synced:
+            self.pending.append(event)
+            if len(self.pending) > 1000:
+                self.pending.pop(0)
+            return 'buffered'
+        if event['u'] <= self.last_update_id:
+            return 'stale'
+        if not event['U'] <= self.last_update_id + 1 <= event['u']:
+            self.reset()
+            return 'gap'
+        self._apply_levels(event['b'], event['a'])
+        self.last_update_id = event['u']
+        return 'applied'
+
+    def top(self):
+        """返回 (买一价, 买一量, 卖一价, 卖一量),任一侧为空时返回 None"""
+        if not self.bid_prices or not self.ask_prices:
+            return None
+        return self.bid_prices[-1], self.bid_qtys[-1], -self.ask_prices[-1], self.ask_qtys[-1]
+
+    def microprice(self):
+        """按对侧挂单量加权的中间价: (买一价*卖一量 + 卖一价*买一量) / (买一量 + 卖一量)"""
+        top = self.top()
+        if not top:
+            return None
+        bid, bid_qty, ask, ask_qty = top
+        return (bid * ask_qty + ask * bid_qty) / (bid_qty + ask_qty)
+
+    def imbalance(self):
+        """买一卖一挂单量失衡度,范围 -1(卖压)到 1(买压)"""
+        top = self.top()
+        if not top:
+            return None
+        _, bid_qty, _, ask_qty = top
+        return (bid_qty - ask_qty) / (bid_qty + ask_qty)
+
+
+# 北京时间,币安零点价格以北京时间 00:00:00.000 为准
+CHINA_TZ = timezone(timedelta(hours=8))
+
+
+class BinanceFeed:
+    """币安行情共用连接: 一个 combined stream 同时订阅 BTC/ETH/SOL/XRP 的 @ticker、@aggTrade 和 @depth@100ms
+    
+    每个币种只在内存中保留最新价格,零点价格等快照直接从缓存读取,不再临时建连接。
+    aggTrade 按交易所成交时间保留最近 trade_window_seconds 秒,可事后精确取出任一时刻的价格。
+    depth 增量维护 DepthBook 本地订单簿,每条更新后计算 microprice 和买一卖一失衡度。
+    连接由 ResilientWebSocket 维护;aggTrade 按成交ID检查连续性,缺失的区间(包括断线期间)
+    通过 REST aggTrades 接口补回缓冲区,on_gap 回调通知调用方补其它数据。
+    base_url / rest_base_url 可配置,便于对接本地桩服务测试;record_path 非空时把原始 depth 消息
+    追加写入该文件,供 --bench-depth 回放。
+    """
+    MAX_BACKFILL_PAGES = 10
+
+    def __init__(self, logger, symbols=('BTCUSDT', 'ETHUSDT', 'SOLUSDT', 'XRPUSDT'),
+                 base_url='wss://stream.binance.com:9443', trade_window_seconds=300,
+                 depth=True, rest_base_url='https://api.binance.com', record_path=None, metrics=None,
+                 max_backoff_seconds=60, ping_interval=20, ping_timeout=10, idle_timeout=30, decoder=None):
+        self.logger = logger
+        self.metrics = metrics
+        self.decoder = BinanceDecoder(decoder)
+        self.clock_offset_ms = 0.0   # 交易所时间 - 本地时间,由 ClockSync 定期更新
+        self.symbols = [symbol.upper() for symbol in symbols]
+        self.base_url = base_url.rstrip('/')
+        self.rest_base_url = rest_base_url.rstrip('/')
+        self.connection = ResilientWebSocket(
+            logger, 'binance', self.stream_url, self._on_message, on_open=self._on_open,
+            on_reconnect=self._on_reconnect, metrics=metrics, max_delay=max_backoff_seconds,
+            ping_interval=ping_interval, ping_timeout=ping_timeout, idle_timeout=idle_timeout)
+        self.gap_listeners = []
+        self.last_trade_ids = {}   # symbol -> 最近一笔 aggTrade 的ID,用于发现缺失区间
+        self.sequence_gaps = deque(maxlen=100)   # (symbol, 缺失的首个ID, 末个ID)
+        self.depth = depth
+        self.books = {symbol: DepthBook() for symbol in self.symbols}
+        self.depth_stats = {}     # symbol -> {'microprice', 'imbalance', 'bid', 'ask', 'event_time'}
+        self.snapshot_pending = set()
+        self.record_file = open(record_path, 'a', encoding='utf-8') if record_path else None
+        self.trade_window_ms = int(trade_window_seconds * 1000)
+        self.lock = threading.Lock()
+        self.latest = {}          # symbol -> {'price': 最新价, 'event_time': 交易所时间(毫秒), 'received': 本地接收时间}
+        self.trades = {symbol: deque() for symbol in self.symbols}   # symbol -> deque[(成交时间T毫秒, 价格)]
+        self.listeners = []
+        self.updated = threading.Condition(self.lock)
+        self.message_count = 0
+
+    def stream_url(self):
+        stream_types = ('ticker', 'aggTrade', 'depth@100ms') if self.depth else ('ticker', 'aggTrade')
+        streams = '/'.join(f"{symbol.lower()}@{stream}" for symbol in self.symbols for stream in stream_types)
+        return f"{self.base_url}/stream?streams={streams}"
+
+    def add_listener(self, callback):
+        """注册行情回调 callback(symbol, price, data),在websocket线程中调用"""
+        self.listeners.append(callback)
+
+    def add_gap_listener(self, callback):
+        """注册断线回调 callback(断开时间, 恢复时间),在websocket线程中调用"""
+        self.gap_listeners.append(callback)
+
+    def start(self):
+        self.connection.start()
+
+    def stop(self):
+        self.connection.stop()
+        if self.record_file:
+            self.record_file.close()
+            self.record_file = None
+
+    def get_latest(self, symbol):
+        with self.lock:
+            return dict(self.latest[symbol.upper()]) if symbol.upper() in self.latest else None
+
+    def get_depth(self, symbol):
+        """返回最近一次订单簿更新后的 microprice / 失衡度,订单簿未同步时返回 None"""
+        with self.lock:
+            stats = self.depth_stats.get(symbol.upper())
+            return dict(stats) if stats else None
+
+    def _request_snapshot(self, symbol):
+        """后台取订单簿快照,同一币种同时只有一个请求,调用方持有锁"""
+        if symbol in self.snapshot_pending:
+            return
+        self.snapshot_pending.add(symbol)
+        threading.Thread(target=self._load_snapshot, args=(symbol,), daemon=True).start()
+
+    def _load_snapshot(self, symbol):
+        import requests
+        try:
+            for attempt in range(3):
+                response = requests.get(f"{self.rest_base_url}/api/v3/depth",
+                                        params={'symbol': symbol, 'limit': 1000}, timeout=5)
+                response.raise_for_status()
+                snapshot = response.json()
+                with self.lock:
+                    if self.books[symbol].load_snapshot(snapshot):
+                        self.logger.info(f"✅ {symbol} 订单簿已同步, lastUpdateId={snapshot['lastUpdateId']}")
+                        return
+                # 快照比缓存的增量还旧,稍后重取
+                time.sleep(1)
+            self.logger.warning(f"❌ {symbol} 订单簿同步失败,等待下一条增量重试")
+        except Exception as e:
+            self.logger.warning(f"❌ 获取 {symbol} 订单簿快照失败: {str(e)}")
+        finally:
+            with self.lock:
+                self.snapshot_pending.discard(symbol)
+
+    def _on_depth(self, symbol, data):
+        """应用一条 depthUpdate 并更新 microprice / 失衡度,调用方持有锁"""
+        book = self.books.get(symbol)
+        if book is None:
+            return
+        status = book.apply(data)
+        if status == 'applied':
+            top = book.top()
+            if top:
+                bid, bid_qty, ask, ask_qty = top
+                self.depth_stats[symbol] = {
+                    'microprice': (bid * ask_qty + ask * bid_qty) / (bid_qty + ask_qty),
+                    'imbalance': (bid_qty - ask_qty) / (bid_qty + ask_qty),
+                    'bid': bid, 'ask': ask, 'event_time': data.get('E')
+                }
+        elif status == 'gap':
+            self.logger.warning(f"{symbol} 订单簿增量不连续,重新同步")
+            self.depth_stats.pop(symbol, None)
+            book.apply(data)
+            self._request_snapshot(symbol)
+        elif status == 'buffered':
+            self._request_snapshot(symbol)
+
+    def realized_vol(self, symbol, sample_seconds=1.0, min_samples=60):
+        """用成交缓冲区按 sample_seconds 取样的对数收益率估计每√秒的已实现波动率,样本不足时返回 None"""
+        with self.lock:
+            trades = list(self.trades.get(symbol.upper(), ()))
+        if not trades:
+            return None
+        sample_ms = int(sample_seconds * 1000)
+        # 每个采样区间取最后一笔成交价
+        samples = {}
+        for trade_time, price in trades:
+            samples[trade_time // sample_ms] = price
+        buckets = sorted(samples)
+        returns = [math.log(samples[current] / samples[previous]) / math.sqrt(current - previous)
+                   for previous, current in zip(buckets, buckets[1:])]
+        if len(returns) < min_samples:
+            return None
+        return math.sqrt(sum(r * r for r in returns) / len(returns) / sample_seconds)
+
+    def wait_for_price(self, symbol, timeout=5, max_age=10):
+        """返回缓存中的最新价格;缓存为空或超过 max_age 秒时最多等待 timeout 秒"""
+        symbol = symbol.upper()
+        deadline = time.time() + timeout
+        with self.lock:
+            while True:
+                entry = self.latest.get(symbol)
+                if entry and time.time() - entry['received'] <= max_age:
+                    return entry['price']
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return None
+                self.updated.wait(remaining)
+
+    def price_at(self, symbol, timestamp_ms, timeout=0):
+        """按交易所成交时间回溯: 返回 timestamp_ms 时刻生效的成交价(最后一笔 T <= timestamp_ms 的成交)
+        
+        必须已经收到该时刻之后的成交才能确认,最多等待 timeout 秒;缓冲区没有覆盖该时刻时返回 None
+        """
+        symbol = symbol.upper()
+        deadline = time.time() + timeout
+        with self.lock:
+            while True:
+                trades = self.trades.get(symbol)
+                if trades and trades[-1][0] > timestamp_ms:
+                    if trades[0][0] > timestamp_ms:
+                        return None     # 该时刻已滑出缓冲区或连接当时未建立
+                    for trade_time, price in reversed(trades):
+                        if trade_time <= timestamp_ms:
+                            return price
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return None
+                self.updated.wait(remaining)
+
+    def _record_trade(self, symbol, data):
+        """记录一笔 aggTrade 并淘汰窗口外的成交,发现成交ID不连续时后台补齐,调用方持有锁"""
+        trades = self.trades.setdefault(symbol, deque())
+        trade_id = data.get('a')
+        last_id = self.last_trade_ids.get(symbol)
+        if trade_id is not None:
+            if last_id is not None and trade_id > last_id + 1:
+                self.sequence_gaps.append((symbol, last_id + 1, trade_id - 1))
+                self.logger.warning(f"⚠️ {symbol} aggTrade 缺失 {trade_id - last_id - 1} 笔 (ID {last_id + 1}-{trade_id - 1}),从REST补齐")
+                if self.metrics:
+                    self.metrics.incr('binance_feed.missed_trades', trade_id - last_id - 1)
+                threading.Thread(target=self._backfill_trades, args=(symbol, last_id + 1, trade_id - 1),
+                                 daemon=True).start()
+            if last_id is None or trade_id > last_id:
+                self.last_trade_ids[symbol] = trade_id
+        trade_time = int(data['T'])
+        trades.append((trade_time, float(data['p'])))
+        cutoff = trade_time - self.trade_window_ms
+        while trades and trades[0][0] < cutoff:
+            trades.popleft()
+        self.updated.notify_all()
+
+    def fetch_agg_trades(self, symbol, from_id, limit=1000):
+        """调用 REST aggTrades 接口,返回 [(成交ID, 成交时间, 价格), ...]"""
+        import requests
+        response = requests.get(f"{self.rest_base_url}/api/v3/aggTrades",
+                                params={'symbol': symbol, 'fromId': from_id, 'limit': limit}, timeout=5)
+        response.raise_for_status()
+        return [(int(row['a']), int(row['T']), float(row['p'])) for row in response.json()]
+
+    def _backfill_trades(self, symbol, first_id, last_id):
+        """补齐 first_id..last_id 的成交并按时间合并进缓冲区,只补仍在窗口内的部分"""
+        try:
+            # 缺口太大时只补最后 MAX_BACKFILL_PAGES 页,更早的成交反正会被窗口淘汰
+            from_id = max(first_id, last_id + 1 - self.MAX_BACKFILL_PAGES * 1000)
+            recovered = []
+            while from_id <= last_id:
+                page = [row for row in self.fetch_agg_trades(symbol, from_id) if row[0] <= last_id]
+                if not page:
+                    break
+                recovered.extend(page)
+                from_id = page[-1][0] + 1
+            if not recovered:
+                return
+            with self.lock:
+                trades = self.trades.setdefault(symbol, deque())
+                cutoff = (trades[-1][0] if trades else recovered[-1][1]) - self.trade_window_ms
+                merged = sorted(set(trades) | {(trade_time, price) for _, trade_time, price in recovered
+                                               if trade_time >= cutoff})
+                self.trades[symbol] = deque(merged)
+                self.updated.notify_all()
+            self.logger.info(f"✅ {symbol} 已从REST补齐 {len(recovered)} 笔成交")
+        except Exception as e:
+            self.logger.warning(f"❌ 补齐 {symbol} 成交失败: {str(e)}")
+
+    def _on_open(self):
+        """每次(重新)连接: 增量不再连续,订单簿全部重新同步"""
+        with self.lock:
+            for book in self.books.values():
+                book.reset()
+            self.depth_stats.clear()
+
+    def _on_reconnect(self, disconnected_at, reconnected_at):
+        for callback in self.gap_listeners:
+            try:
+                callback(disconnected_at, reconnected_at)
+            except Exception as e:
+                self.logger.debug(f"断线回调异常: {str(e)}")
+
+    def _on_message(self, ws, message):
+        try:
+            # combined stream 的消息格式: {"stream": "btcusdt@ticker", "data": {...}},解码后只保留 data
+            data = self.decoder.decode(message)
+            symbol = data.get('s')
+            event_type = data.get('e')
+            # 交易所事件时间 E 到本地收到的延迟(按时钟偏差校正)
+            if self.metrics and 'E' in data:
+                self.metrics.observe('latency.binance_event_ms', time.time() * 1000 + self.clock_offset_ms - data['E'])
+            if event_type == 'aggTrade':
+                with self.lock:
+                    self._record_trade(symbol, data)
+                return
+            if event_type == 'depthUpdate':
+                if self.record_file:
+                    self.record_file.write(message + '\n')
+                with self.lock:
+                    self._on_depth(symbol, data)
+                return
+            if not symbol or 'c' not in data:
+                return
+            price = float(data['c'])
+            with self.lock:
+                self.latest[symbol] = {'price': price, 'event_time': data.get('E'), 'received': time.time()}
+                self.message_count += 1
+                self.updated.notify_all()
+            for callback in self.listeners:
+                try:
+                    callback(symbol, price, data)
+                except Exception as e:
+                    self.logger.debug(f"行情回调异常: {str(e)}")
+        except Exception as e:
+            self.logger.warning(f"币安行情消息处理异常: {str(e)}")
+
+class ClockSync:
+    """NTP式本地时钟偏差估计: 向币安 /api/v3/time 发若干次请求,取往返最短的一次
+    
+    offset = 服务器时间 - (发送时间 + 接收时间) / 2,本地时间加上 offset 即为交易所时间。
+    """
+    def __init__(self, logger, rest_base_url='https://api.binance.com', samples=5, timeout=3):
+        self.logger = logger
+        self.rest_base_url = rest_base_url.rstrip('/')
+        self.samples = samples
+        self.timeout = timeout
+        self.offset_ms = 0.0
+        self.rtt_ms = None
+        self.measured_at = None
+
+    def measure(self):
+        """测量一次时钟偏差,返回 (offset_ms, rtt_ms),全部请求失败时返回 None"""
+        import requests
+        best = None
+        for _ in range(self.samples):
+            try:
+                sent = time.time()
+                response = requests.get(f"{self.rest_base_url}/api/v3/time", timeout=self.timeout)
+                received = time.time()
+                response.raise_for_status()
+                server_ms = response.json()['serverTime']
+            except Exception as e:
+                self.logger.debug(f"时钟同步请求失败: {str(e)}")
+                continue
+            rtt_ms = (received - sent) * 1000
+            if best is None or rtt_ms < best[1]:
+                best = (server_ms - (sent + received) * 500, rtt_ms)
+        if best:
+            self.offset_ms, self.rtt_ms = best
+            self.measured_at = time.time()
+        return best
+
+class KlineStore:
+    """币安1分钟K线本地存储: 每个币种一个CSV文件,启动时通过 REST klines 接口补齐缺失的分钟
+    
+    重启后可立即从零点那一分钟的开盘价恢复当日参考价和涨跌幅。rest_base_url 可配置,便于对接本地桩服务测试。
+    """
+    INTERVAL_MS = 60000
+    PAGE_LIMIT = 1000
+
+    def __init__(self, logger, rest_base_url='https://api.binance.com', directory='klines',
+                 retention_days=2, timeout=5):
+        self.logger = logger
+        self.rest_base_url = rest_base_url.rstrip('/')
+        self.directory = directory
+        self.retention_ms = int(retention_days * 86400000)
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.klines = {}     # symbol -> {开盘时间毫秒: (open, high, low, close)}
+
+    def _path(self, symbol):
+        return os.path.join(self.directory, f'{symbol.upper()}.csv')
+
+    def _load(self, symbol):
+        """读取磁盘上的K线,调用方持有锁"""
+        if symbol in self.klines:
+            return self.klines[symbol]
+        rows = {}
+        try:
+            if os.path.exists(self._path(symbol)):
+                with open(self._path(symbol), 'r', encoding='utf-8') as f:
+                    for line in f:
+                        fields = line.strip().split(',')
+                        if len(fields) == 5:
+                            rows[int(fields[0])] = tuple(float(value) for value in fields[1:])
+        except Exception as e:
+            self.logger.warning(f"❌ 读取 {symbol} K线缓存失败: {str(e)}")
+        self.klines[symbol] = rows
+        return rows
+
+    def _save(self, symbol):
+        """清理保留期之外的K线后整体写回磁盘,调用方持有锁"""
+        rows = self.klines.get(symbol, {})
+        if rows:
+            cutoff = max(rows) - self.retention_ms
+            for open_time in [open_time for open_time in rows if open_time < cutoff]:
+                del rows[open_time]
+        try:
+            if not os.path.exists(self.directory):
+                os.makedirs(self.directory)
+            with open(self._path(symbol), 'w', encoding='utf-8') as f:
+                for open_time in sorted(rows):
+                    f.write(f"{open_time},{','.join(str(value) for value in rows[open_time])}\n")
+        except Exception as e:
+            self.logger.warning(f"❌ 保存 {symbol} K线缓存失败: {str(e)}")
+
+    def fetch(self, symbol, start_ms, limit=PAGE_LIMIT):
+        """调用 REST klines 接口,返回 [(开盘时间, (open, high, low, close)), ...]"""
+        import requests
+        response = requests.get(f"{self.rest_base_url}/api/v3/klines",
+                                params={'symbol': symbol.upper(), 'interval': '1m',
+                                        'startTime': int(start_ms), 'limit': limit},
+                                timeout=self.timeout)
+        response.raise_for_status()
+        return [(int(row[0]), (float(row[1]), float(row[2]), float(row[3]), float(row[4])))
+                for row in response.json()]
+
+    def backfill(self, symbol, start_ms):
+        """补齐 start_ms 到当前的1分钟K线,只请求本地最后一根之后的部分
+        
+        Returns:
+            int: 新写入的K线数
+        """
+        symbol = symbol.upper()
+        with self.lock:
+            rows = self._load(symbol)
+            known = [open_time for open_time in rows if open_time >= start_ms]
+            cursor = max(known) + self.INTERVAL_MS if known else start_ms
+        added = 0
+        now_ms = int(time.time() * 1000)
+        while cursor < now_ms:
+            page = self.fetch(symbol, cursor)
+            if not page:
+                break
+            with self.lock:
+                for open_time, values in page:
+                    rows[open_time] = values
+            added += len(page)
+            cursor = page[-1][0] + self.INTERVAL_MS
+            if len(page) < self.PAGE_LIMIT:
+                break
+        if added:
+            with self.lock:
+                self._save(symbol)
+        return added
+
+    def open_at(self, symbol, timestamp_ms, fetch_missing=True):
+        """返回从 timestamp_ms 所在分钟开始的K线开盘价,本地没有时按需只请求这一根"""
+        symbol = symbol.upper()
+        open_time = int(timestamp_ms) - int(timestamp_ms) % self.INTERVAL_MS
+        with self.lock:
+            values = self._load(symbol).get(open_time)
+        if values is None and fetch_missing and open_time + self.INTERVAL_MS <= time.time() * 1000:
+            page = self.fetch(symbol, open_time, limit=1)
+            if page and page[0][0] == open_time:
+                values = page[0][1]
+                with self.lock:
+                    self._load(symbol)[open_time] = values
+                    self._save(symbol)
+        return values[0] if values else None
+
+class LeadLagEstimator:
+    """币安涨跌幅与 Polymarket Up 价格的滚动领先/滞后估计(NumPy向量化)
+    
+    两路数据按本地接收时间重采样到 sample_interval 秒的网格上,对差分序列计算 -max_lag..+max_lag 的互相关,
+    取相关性最高的滞后;再用滞后后的币安涨跌幅对 Up 价格做线性回归,
+    用当前币安涨跌幅预测 lag 秒后 Up 价格应到的位置。滞后为正表示币安领先。未安装 NumPy 时不做估计。
+    """
+    def __init__(self, logger, window_seconds=600, sample_interval=1.0, max_lag_seconds=30, min_samples=120):
+        self.logger = logger
+        self.window_seconds = window_seconds
+        self.sample_interval = sample_interval
+        self.max_lag = int(max_lag_seconds / sample_interval)
+        self.min_samples = min_samples
+        self.lock = threading.Lock()
+        max_points = int(window_seconds * 20)
+        self.binance_points = deque(maxlen=max_points)   # (接收时间, 相对零点涨跌幅%)
+        self.poly_points = deque(maxlen=max_points)      # (接收时间, Up价格¢)
+        self.model = None
+        self.numpy_warned = False
+
+    def add_binance(self, timestamp, rate):
+        with self.lock:
+            self.binance_points.append((timestamp, rate))
+
+    def add_poly(self, timestamp, up_price):
+        with self.lock:
+            self.poly_points.append((timestamp, up_price))
+
+    def clear(self):
+        """换市场或零点价格变化后旧数据不再可比,清空重新积累"""
+        with self.lock:
+            self.binance_points.clear()
+            self.poly_points.clear()
+            self.model = None
+
+    @staticmethod
+    def _resample(points, grid):
+        """把 (时间, 值) 序列按前值填充到网格上,网格点之前没有数据的位置为 NaN"""
+        times = np.fromiter((point[0] for point in points), dtype=float, count=len(points))
+        values = np.fromiter((point[1] for point in points), dtype=float, count=len(points))
+        index = np.searchsorted(times, grid, side='right') - 1
+        resampled = values[np.clip(index, 0, None)]
+        resampled[index < 0] = np.nan
+        return resampled
+
+    @staticmethod
+    def _row_corr(a, b):
+        """逐行皮尔逊相关系数,a 和 b 形状相同"""
+        a = a - a.mean(axis=1, keepdims=True)
+        b = b - b.mean(axis=1, keepdims=True)
+        denominator = np.sqrt((a * a).sum(axis=1) * (b * b).sum(axis=1))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(denominator > 0, (a * b).sum(axis=1) / denominator, 0.0)
+
+    def estimate(self, now=None):
+        """重新拟合模型,返回 SimpleNamespace(lag_seconds, correlation, beta, intercept, samples),数据不足时返回 None"""
+        if np is None:
+            if not self.numpy_warned:
+                self.logger.warning("未安装 numpy,领先滞后分析不可用")
+                self.numpy_warned = True
+            return None
+        now = now or time.time()
+        with self.lock:
+            binance_points = list(self.binance_points)
+            poly_points = list(self.poly_points)
+        if len(binance_points) < 2 or len(poly_points) < 2:
+            return None
+        
+        start = max(now - self.window_seconds, binance_points[0][0], poly_points[0][0])
+        grid = np.arange(start, now, self.sample_interval)
+        if len(grid) < max(self.min_samples, 2 * self.max_lag + 2):
+            return None
+        binance = self._resample(binance_points, grid)
+        poly = self._resample(poly_points, grid)
+        
+        # 互相关在差分序列上计算,避免两条趋势线的伪相关
+        binance_diff = np.diff(binance)
+        poly_diff = np.diff(poly)
+        window = len(binance_diff) - self.max_lag
+        binance_windows = np.lib.stride_tricks.sliding_window_view(binance_diff, window)
+        poly_windows = np.lib.stride_tricks.sliding_window_view(poly_diff, window)
+        # lead[k]: 币安领先k个采样点; lag[k]: Polymarket 领先k个采样点
+        lead = self._row_corr(np.broadcast_to(binance_windows[0], poly_windows.shape), poly_windows)
+        lag = self._row_corr(binance_windows, np.broadcast_to(poly_windows[0], binance_windows.shape))
+        correlations = np.concatenate([lag[:0:-1], lead])
+        best = int(np.argmax(correlations))
+        shift = best - self.max_lag
+        
+        # Up价格对 shift 个采样点前的币安涨跌幅做线性回归
+        if shift >= 0:
+            x, y = binance[:len(binance) - shift], poly[shift:]
+        else:
+            x, y = binance[-shift:], poly[:len(poly) + shift]
+        if np.ptp(x) == 0:
+            return None
+        beta, intercept = np.polyfit(x, y, 1)
+        model = SimpleNamespace(lag_seconds=shift * self.sample_interval, correlation=float(correlations[best]),
+                                beta=float(beta), intercept=float(intercept), samples=len(grid), fitted_at=now)
+        with self.lock:
+            self.model = model
+        return model
+
+    def predict_up(self):
+        """用最近一次拟合的模型和最新币安涨跌幅预测 Up 价格,模型或数据缺失时返回 None"""
+        with self.lock:
+            model = self.model
+            latest = self.binance_points[-1][1] if self.binance_points else None
+        if model is None or latest is None:
+            return None
+        return model.intercept + model.beta * latest
+
+class FairValueEngine:
+    """Up/Down 日内市场的公允价值: 把市场看作以零点价格为行权价、北京时间次日零点到期的数字期权
+    
+    无漂移对数正态下 P(到期价格 > 零点价格) = N(d2), d2 = ln(S/K)/(σ√τ) - σ√τ/2。
+    标准正态分布函数预先算成等距表,每个tick只做一次线性插值,开销在微秒级。σ 为每√秒的已实现波动率。
+    """
+    def __init__(self, z_limit=8.0, step=0.001):
+        self.z_limit = z_limit
+        self.step = step
+        count = int(round(2 * z_limit / step)) + 1
+        self.cdf_table = [0.5 * (1.0 + math.erf((i * step - z_limit) / math.sqrt(2.0))) for i in range(count)]
+
+    def cdf(self, x):
+        """查表插值计算标准正态分布函数"""
+        if x <= -self.z_limit:
+            return 0.0
+        if x >= self.z_limit:
+            return 1.0
+        position = (x + self.z_limit) / self.step
+        index = int(position)
+        fraction = position - index
+        return self.cdf_table[index] + (self.cdf_table[index + 1] - self.cdf_table[index]) * fraction
+
+    def up_probability(self, spot, strike, vol, seconds_left):
+        """到期时价格高于零点价格的概率"""
+        if seconds_left <= 0 or not vol or vol <= 0:
+            if spot == strike:
+                return 0.5
+            return 1.0 if spot > strike else 0.0
+        spread = vol * math.sqrt(seconds_left)
+        return self.cdf(math.log(spot / strike) / spread - spread / 2)
+
+class HeadlessRoot:
+    """无界面(守护进程)模式下替代 tk.Tk 的调度器,提供 after/after_cancel/mainloop"""
+    def __init__(self, logger):
+        self.logger = logger
+        self.condition = threading.Condition()
+        self.tasks = []
+        self.cancelled = set()
+        self.counter = 0
+        self.destroyed = False
+
+    def after(self, ms, func=None, *args):
+        with self.condition:
+            self.counter += 1
+            after_id = f"after#{self.counter}"
+            if func is not None:
+                heapq.heappush(self.tasks, (time.monotonic() + ms / 1000, self.counter, after_id, func, args))
+                self.condition.notify()
+            return after_id
+
+    def after_cancel(self, after_id):
+        if isinstance(after_id, str):
+            with self.condition:
+                self.cancelled.add(after_id)
+
+    def mainloop(self):
+        while True:
+            with self.condition:
+                while not self.destroyed and (not self.tasks or self.tasks[0][0] > time.monotonic()):
+                    timeout = self.tasks[0][0] - time.monotonic() if self.tasks else None
+                    self.condition.wait(timeout)
+                if self.destroyed:
+                    return
+                _, _, after_id, func, args = heapq.heappop(self.tasks)
+                if after_id in self.cancelled:
+                    self.cancelled.discard(after_id)
+                    continue
+            try:
+                func(*args)
+            except Exception as e:
+                self.logger.error(f"定时任务执行失败: {str(e)}")
+
+    def destroy(self):
+        with self.condition:
+            self.destroyed = True
+            self.condition.notify_all()
+
+    def winfo_exists(self):
+        return not self.destroyed
+
+    def protocol(self, name, func=None):
+        pass
+
+class HeadlessWidget:
+    """无界面模式下替代 ttk 控件,只在内存中保存文本和状态"""
+    def __init__(self, text='', value='', command=None, name='!widget'):
+        self.options = {'text': text, 'state': 'normal', 'values': []}
+        self.value = str(value)
+        self.command = command
+        self.bindings = {}
+        self.name = name
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = str(value)
+
+    def insert(self, index, text):
+        if index in (tk.END, 'end'):
+            self.value += str(text)
+        else:
+            self.value = self.value[:int(index)] + str(text) + self.value[int(index):]
+
+    def delete(self, first, last=None):
+        self.value = ''
+
+    def configure(self, **kwargs):
+        if 'command' in kwargs:
+            self.command = kwargs.pop('command')
+        self.options.update(kwargs)
+
+    config = configure
+
+    def cget(self, key):
+        return self.options.get(key, '')
+
+    def __getitem__(self, key):
+        return self.options.get(key, '')
+
+    def __setitem__(self, key, value):
+        self.options[key] = value
+
+    def invoke(self):
+        if self.command:
+            return self.command()
+
+    def bind(self, sequence, func):
+        self.bindings[sequence] = func
+
+    def event_generate(self, sequence):
+        func = self.bindings.get(sequence)
+        if func:
+            func(SimpleNamespace(widget=self))
+
+    def __str__(self):
+        return self.name
+
+class HeadlessFrame(HeadlessWidget):
+    """无界面模式下替代 Yes/No 配置区域,按 grid 的行列保存输入框"""
+    def __init__(self, name='!labelframe'):
+        super().__init__(name=name)
+        self.cells = {}
+
+    def add(self, row, column, widget):
+        self.cells[(row, column)] = widget
+        return widget
+
+    def grid_slaves(self, row=None, column=None):
+        return [widget for (cell_row, cell_column), widget in self.cells.items()
+                if (row is None or cell_row == row) and (column is None or cell_column == column)]
+
+    def winfo_children(self):
+        return list(self.cells.values())
+
 class CryptoTrader:
     """
     加密货币自动交易系统，用于 Polymarket 平台的自动化交易
@@ -93,11 +1781,14 @@ class CryptoTrader:
     - 账户余额监控
     - 自动寻找新的交易机会
     """
-    def __init__(self):
+    def __init__(self, daemon=False):
         super().__init__()
         # 日志初始化
         self.logger = Logger('poly')
         
+        # 守护进程模式: 不创建Tk窗口,引擎直接运行
+        self.daemon = daemon
+        
         # 浏览器和状态控制
         self.driver = None
         self.running = False
@@ -110,6 +1801,14 @@ class CryptoTrader:
         self.refresh_page_disabled = False  # 是否禁用页面刷新的标志
         self.is_restarting = False  # 重启状态标志
         
+        # Chrome调试端口和热备Chrome
+        self.debug_port = 9222
+        self.standby_enabled = False
+        self.standby_port = 9223
+        self.standby_driver = None
+        self.standby_preparing = False
+        self.standby_sync_timer = None
+        
         # 重试策略配置
         self.retry_count = 3
         self.retry_interval = 5
@@ -125,18 +1824,22 @@ class CryptoTrader:
         self.login_check_timer = None
         self.monitor_xpath_timer = None
         self.get_zero_time_cash_timer = None
-        self.get_binance_zero_time_price_timer = None
+        self.binance_zero_price_timer = None       # 零点价格的唯一定时器(threading.Timer,不占用Tk主线程)
+        self.binance_zero_price_timer_lock = threading.Lock()
         self.get_binance_price_websocket_timer = None
         self.comparison_binance_price_timer = None
         self.schedule_auto_find_coin_timer = None
         self.refresh_timer = None  # 添加refresh_timer变量
         self.monitor_prices_timer = None  # 添加monitor_prices_timer变量
+        self.config_watch_timer = None  # 配置文件热加载定时器
         
         # 线程同步锁
         self.url_monitoring_lock = threading.Lock()
         self.refresh_page_lock = threading.Lock()
         self.login_attempt_lock = threading.Lock()
         self.restart_lock = threading.Lock()
+        self.hot_reload_lock = threading.Lock()
+        self.standby_lock = threading.Lock()
         
         # 交易参数配置
         self.initial_amount = 2.5              # 初始资金比例 (%)
@@ -162,9 +1865,120 @@ class CryptoTrader:
         # 停止事件
         self.stop_event = threading.Event()
         
+        # 运行指标和浏览器恢复状态
+        self.metrics = Metrics()
+        self.metrics_report_timer = None
+        self.browser_queue = BrowserCommandQueue(self.logger, self.metrics)  # 下单会话的串行命令队列
+        self.tab_manager = TabManager(self.logger, self.metrics)             # 标签页角色、复用和回收
+        self.tab_manage_timer = None
+        self.recovery_lock = threading.Lock()
+        self.recovering = False
+        self.recovery_cancel = threading.Event()   # 阶段超时后通知阶段线程尽快退出
+        self.recovery_stage_thread = None          # 当前(或超时未退出的)恢复阶段线程
+        self.recovery_owner = None                 # 正在执行恢复阶梯的线程
+        self.recovery_stage_grace = 30             # 阶段超时后等待其退出的宽限秒数
+        self.last_price_time = time.time()
+        self.price_stale_seconds = 60  # 价格超过此秒数未更新则启动恢复
+        
+        # 按需刷新页面: 内存阈值和价格新鲜度(下单和读价标签页分别采集基线)
+        self.tab_memory_baselines = {}
+        self.price_recycle_due = False         # 读价标签页的检查由读价线程执行
+        self.refresh_avoided_count = 0
+        self.recycle_heap_growth_mb = 150      # JS堆相对基线增长超过此值则刷新
+        self.recycle_heap_max_mb = 600         # JS堆绝对上限
+        self.recycle_nodes_factor = 3          # DOM节点数超过基线的倍数则刷新
+        self.recycle_stale_seconds = 30        # 价格超过此秒数未更新则刷新
+        
+        # 请求屏蔽和首个价格耗时统计
+        self.block_requests = True
+        self.page_load_started = None
+        
+        # 无头模式和登录cookie
+        self.headless = False
+        self.login_cookies_file = 'login_cookies.json'
+        self.last_cookie_export_time = 0
+        
+        # 读价和下单分离: 读价使用独立的WebDriver会话和标签页,下单期间价格照常读取
+        self.dedicated_price_tab = True
+        self.price_driver = None
+        self.price_tab_handle = None
+        self.price_session_lock = threading.RLock()   # 读价会话的切换(新建/跟随跳转/换日提升)互斥
+        self.retired_price_sessions = []              # 换日提升后待读价线程关闭的旧会话 (driver, handle)
+        self.trade_worker = None
+        self.trade_tick = None                 # 监控线程投递给交易线程的最新价格
+        self.trade_tick_event = threading.Event()
+        
+        # 价格记录: 内存中保留最近一小时,并按天写入 ticks/ 目录
+        self.price_ticks = deque(maxlen=3600)
+        self.tick_journal_dir = 'ticks'
+        self.tick_journal_file = None
+        self.tick_journal_date = None
+        self.tick_journal_pending = 0
+        
+        # CDP直连热路径: 按标签页(window handle)缓存连接
+        self.cdp_fast_path = True
+        self.cdp_clients = {}
+        self.cdp_retry_after = {}
+        self.trade_tab_handle = None           # 下单标签页的handle,切换标签页后置None重新获取
+        
+        # 预热的下一个市场: 换日前在后台标签页打开并读价,换日时直接提升为读价标签页
+        self.next_driver = None
+        self.next_tab_handle = None
+        self.next_market_url = None
+        self.next_market_prices = None         # (时间, up, down, asks, bids)
+        
+        # 币安行情共用连接
+        self.binance_feed = None
+        self.binance_symbol = 'BTCUSDT'
+        self.kline_store = None
+        
+        # 币安-Polymarket 领先滞后分析
+        self.lead_lag = None
+        self.lead_lag_signal = None          # 最近一次拟合结果,交易阶梯读取
+        self.lead_lag_timer = None
+        self.lead_lag_interval = 5000
+        self.lead_lag_drive_ladder = False
+        self.lead_lag_min_correlation = 0.3
+        
+        # 数字期权公允价值
+        self.fair_value_engine = FairValueEngine()
+        self.fair_value_vol = None
+        self.fair_value_vol_time = 0
+        self.fair_value_vol_refresh = 10
+        
+        # 时钟偏差和行情延迟统计
+        self.clock_sync = None
+        self.dom_mutation_seen = {}        # id(driver) -> 最近一次统计过的DOM变化时间
+        self.latency_report_timer = None
+        
+        # 币安价格显示合并刷新: websocket线程只写最新值,GUI按固定帧率刷新
+        self.binance_display_lock = threading.Lock()
+        self.binance_display_slot = None
+        self.binance_display_dropped = 0
+        self.binance_display_fps = 10
+        self.binance_display_timer = None
+        self.binance_rate_color = None
+        
+        # HTTP市场发现和次日市场预解析
+        self.market_discovery = None
+        self.market_prefetch_timer = None
+        self.market_validate_timer = None
+        self.market_prefetch_interval = 3600000   # 每小时预解析一次(毫秒)
+        
         # 元素缓存
         self.element_cache = {}
         
+        # iframe 映射缓存(按文档代次失效)
+        self.frame_cache = {}
+        
+        # 热加载: 可在config.json的params段中修改的交易参数,以及被监控文件的修改时间
+        self.hot_reload_params = [
+            'price_premium', 'asks_shares', 'bids_shares',
+            'default_target_price', 'default_sell_price_backwater',
+            'default_sell_price', 'default_normal_sell_price'
+        ]
+        self.watched_files_mtime = {}
+        
         # 初始化金额为 0
         for i in range(1, 4):  # 1到4
             setattr(self, f'yes{i}_amount', 0)
@@ -173,12 +1987,75 @@ class CryptoTrader:
         # 初始化 UI 界面
         try:
             self.config = self.load_config()
-            self.setup_gui()
+            self._apply_hot_reload_params(self.config.get('params', {}))
+            browser_config = self.config.get('browser', {})
+            self.standby_enabled = bool(browser_config.get('standby_enabled', False))
+            self.standby_port = int(browser_config.get('standby_port', 9223))
+            self.recycle_heap_growth_mb = browser_config.get('recycle_heap_growth_mb', self.recycle_heap_growth_mb)
+            self.recycle_heap_max_mb = browser_config.get('recycle_heap_max_mb', self.recycle_heap_max_mb)
+            self.recycle_stale_seconds = browser_config.get('recycle_stale_seconds', self.recycle_stale_seconds)
+            self.block_requests = bool(browser_config.get('block_requests', True))
+            self.headless = bool(browser_config.get('headless', False))
+            self.dedicated_price_tab = bool(browser_config.get('dedicated_price_tab', True))
+            self.cdp_fast_path = bool(browser_config.get('cdp_fast_path', True))
+            self.tab_manager.max_tabs = int(browser_config.get('max_tabs', 4))
+            self.tab_manager.orphan_grace_seconds = browser_config.get('orphan_tab_grace_seconds', 300)
+            discovery_config = self.config.get('discovery', {})
+            self.market_discovery = MarketDiscovery(
+                self.logger,
+                api_base_url=discovery_config.get('api_base_url', 'https://gamma-api.polymarket.com'),
+                cache_file=discovery_config.get('cache_file', 'market_cache.json'))
+            self.market_prefetch_interval = int(discovery_config.get('prefetch_interval_minutes', 60)) * 60000
+            binance_config = self.config.get('binance', {})
+            self.binance_feed = BinanceFeed(
+                self.logger,
+                symbols=binance_config.get('symbols', ['BTCUSDT', 'ETHUSDT', 'SOLUSDT', 'XRPUSDT']),
+                base_url=binance_config.get('stream_base_url', 'wss://stream.binance.com:9443'),
+                trade_window_seconds=binance_config.get('trade_window_seconds', 300),
+                depth=bool(binance_config.get('depth', True)),
+                rest_base_url=binance_config.get('rest_base_url', 'https://api.binance.com'),
+                record_path=binance_config.get('depth_record_file') or None,
+                metrics=self.metrics,
+                max_backoff_seconds=binance_config.get('max_backoff_seconds', 60),
+                ping_interval=binance_config.get('ping_interval', 20),
+                ping_timeout=binance_config.get('ping_timeout', 10),
+                idle_timeout=binance_config.get('idle_timeout', 30),
+                decoder=binance_config.get('decoder') or None)
+            self.logger.info(f"币安行情解码后端: {self.binance_feed.decoder.backend}")
+            self.binance_feed.add_gap_listener(self._on_binance_gap)
+            self.clock_sync = ClockSync(self.logger, rest_base_url=binance_config.get('rest_base_url', 'https://api.binance.com'))
+            self.kline_store = KlineStore(
+                self.logger,
+                rest_base_url=binance_config.get('rest_base_url', 'https://api.binance.com'),
+                directory=binance_config.get('kline_dir', 'klines'))
+            lead_lag_config = self.config.get('lead_lag', {})
+            self.lead_lag = LeadLagEstimator(
+                self.logger,
+                window_seconds=lead_lag_config.get('window_seconds', 600),
+                max_lag_seconds=lead_lag_config.get('max_lag_seconds', 30))
+            self.lead_lag_interval = int(lead_lag_config.get('update_interval_seconds', 5) * 1000)
+            self.lead_lag_drive_ladder = bool(lead_lag_config.get('drive_ladder', False))
+            self.lead_lag_min_correlation = lead_lag_config.get('min_correlation', 0.3)
+            self.fair_value_vol_refresh = self.config.get('fair_value', {}).get('vol_refresh_seconds', 10)
+            self.binance_display_fps = max(1, int(binance_config.get('display_fps', 10)))
+            if self.daemon:
+                self.setup_headless_state()
+            else:
+                self.setup_gui()
         except Exception as e:
             self.logger.error(f"初始化失败: {str(e)}")
-            messagebox.showerror("错误", "程序初始化失败，请检查日志文件")
+            if not self.daemon:
+                messagebox.showerror("错误", "程序初始化失败，请检查日志文件")
             sys.exit(1)
 
+        # 启动 xpath_config.py / config.json 热加载监控
+        self.config_watch_timer = self.root.after(3000, self.watch_config_files)
+        
+        # kill -USR1 <pid> 触发页面截图(无头模式下查看页面)
+        if hasattr(signal, 'SIGUSR1'):
+            signal.signal(signal.SIGUSR1, lambda signum, frame: threading.Thread(
+                target=self.capture_screenshot, daemon=True).start())
+
         # 打印启动参数
         self.logger.info(f"✅ 初始化成功: {sys.argv}")
       
@@ -201,6 +2078,51 @@ class CryptoTrader:
                     'Down4': {'target_price': 0, 'amount': 0},
                     'Down5': {'target_price': 0, 'amount': None}  # 移除amount属性
                 },
+                'params': {name: getattr(self, name) for name in self.hot_reload_params},
+                'browser': {
+                    'standby_enabled': False,
+                    'standby_port': 9223,
+                    'recycle_heap_growth_mb': 150,
+                    'recycle_heap_max_mb': 600,
+                    'recycle_stale_seconds': 30,
+                    'block_requests': True,
+                    'headless': False,
+                    'dedicated_price_tab': True,
+                    'cdp_fast_path': True,
+                    'max_tabs': 4,
+                    'orphan_tab_grace_seconds': 300
+                },
+                'daemon': {'coin': 'BTC'},
+                'binance': {
+                    'stream_base_url': 'wss://stream.binance.com:9443',
+                    'symbols': ['BTCUSDT', 'ETHUSDT', 'SOLUSDT', 'XRPUSDT'],
+                    'display_fps': 10,
+                    'trade_window_seconds': 300,
+                    'rest_base_url': 'https://api.binance.com',
+                    'kline_dir': 'klines',
+                    'depth': True,
+                    'depth_record_file': '',
+                    'max_backoff_seconds': 60,
+                    'ping_interval': 20,
+                    'ping_timeout': 10,
+                    'idle_timeout': 30,
+                    'decoder': ''
+                },
+                'lead_lag': {
+                    'window_seconds': 600,
+                    'max_lag_seconds': 30,
+                    'update_interval_seconds': 5,
+                    'min_correlation': 0.3,
+                    'drive_ladder': False
+                },
+                'fair_value': {
+                    'vol_refresh_seconds': 10
+                },
+                'discovery': {
+                    'api_base_url': 'https://gamma-api.polymarket.com',
+                    'cache_file': 'market_cache.json',
+                    'prefetch_interval_minutes': 60
+                },
                 'url_history': []
             }
             
@@ -275,23 +2197,124 @@ class CryptoTrader:
             # 保存配置到文件
             with open('config.json', 'w', encoding='utf-8') as f:
                 json.dump(self.config, f, indent=4, ensure_ascii=False)
+            
+            # 记录自身写入后的修改时间,避免热加载把自己的保存当成外部修改
+            self.watched_files_mtime['config.json'] = os.path.getmtime('config.json')
                 
         except Exception as e:
             self.logger.error(f"保存配置失败: {str(e)}")
             raise
 
-    """从这里开始设置 GUI 直到 771 行"""
-    def setup_gui(self):
-        """优化后的GUI界面设置"""
-        self.root = tk.Tk()
-        # 修改标题和标签，在Linux环境下使用更简单的表示
-        if platform.system() != 'Darwin':
-            self.root.title("Polymarket Trading System")
-        else:
-            self.root.title("Polymarket Automatic Trading System Power by @wuxiancai")
-        
-        # 创建主滚动框架
-        main_canvas = tk.Canvas(self.root, bg='#f8f9fa', highlightthickness=0)
+    def watch_config_files(self):
+        """轮询 xpath_config.py 和 config.json 的修改时间,有变化时热加载"""
+        try:
+            watchers = [
+                ('xpath_config.py', self.reload_xpath_config),
+                ('config.json', self.reload_trading_params)
+            ]
+            for file_name, reload_func in watchers:
+                file_path = os.path.abspath(file_name)
+                if not os.path.exists(file_path):
+                    continue
+                mtime = os.path.getmtime(file_path)
+                last_mtime = self.watched_files_mtime.get(file_name)
+                self.watched_files_mtime[file_name] = mtime
+                
+                # 第一次只记录修改时间
+                if last_mtime is None or mtime == last_mtime:
+                    continue
+                self.logger.info(f"🔄 检测到 {file_name} 已修改,开始热加载")
+                reload_func()
+        except Exception as e:
+            self.logger.error(f"配置文件热加载检查失败: {str(e)}")
+        finally:
+            # 每3秒检查一次
+            self.config_watch_timer = self.root.after(3000, self.watch_config_files)
+
+    def reload_xpath_config(self):
+        """重新加载 xpath_config.py,校验通过后整体替换 XPathConfig 并清空元素缓存"""
+        global XPathConfig
+        try:
+            old_config = XPathConfig
+            new_config = importlib.reload(xpath_config).XPathConfig
+            
+            # 校验: 原有的XPATH键必须都存在,且每个值都是非空的字符串列表
+            required_attrs = [attr for attr in dir(old_config)
+                              if attr.isupper() and isinstance(getattr(old_config, attr), list)]
+            for attr in required_attrs:
+                xpath_list = getattr(new_config, attr, None)
+                if not isinstance(xpath_list, list) or not xpath_list:
+                    raise ValueError(f"{attr} 缺失或为空")
+                if not all(isinstance(xpath, str) and xpath.strip() for xpath in xpath_list):
+                    raise ValueError(f"{attr} 中存在无效的XPATH")
+            
+            # 整体替换,正在使用旧类的调用不受影响
+            with self.hot_reload_lock:
+                XPathConfig = new_config
+                self.element_cache.clear()
+            self.logger.info("✅ \033[34mxpath_config.py 热加载成功,已清空元素缓存\033[0m")
+            return True
+        except Exception as e:
+            self.logger.error(f"❌ xpath_config.py 热加载失败,继续使用旧配置: {str(e)}")
+            return False
+
+    def reload_trading_params(self):
+        """重新加载 config.json 中的 params 段(交易参数)"""
+        try:
+            with open('config.json', 'r', encoding='utf-8') as f:
+                new_config = json.load(f)
+            params = new_config.get('params', {})
+            if not isinstance(params, dict):
+                raise ValueError("params 必须是字典")
+            if self._apply_hot_reload_params(params):
+                self.config['params'] = {name: getattr(self, name) for name in self.hot_reload_params}
+            return True
+        except Exception as e:
+            self.logger.error(f"❌ config.json 热加载失败,继续使用旧参数: {str(e)}")
+            return False
+
+    def _apply_hot_reload_params(self, params):
+        """校验并一次性应用交易参数
+        
+        Args:
+            params: {参数名: 值} 的字典,只处理 self.hot_reload_params 中的参数
+            
+        Returns:
+            bool: 是否有参数发生变化
+        """
+        new_values = {}
+        for name, value in params.items():
+            if name not in self.hot_reload_params:
+                self.logger.warning(f"忽略未知参数: {name}")
+                continue
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+                raise ValueError(f"参数 {name} 的值无效: {value}")
+            if name != 'asks_shares' and name != 'bids_shares' and value > 100:
+                raise ValueError(f"价格参数 {name} 超出范围: {value}")
+            if getattr(self, name) != value:
+                new_values[name] = value
+        
+        # 全部校验通过后再统一替换
+        with self.hot_reload_lock:
+            for name, value in new_values.items():
+                setattr(self, name, value)
+        
+        for name, value in new_values.items():
+            self.logger.info(f"✅ 参数 {name} 已更新为: \033[32m{value}\033[0m")
+        return bool(new_values)
+
+    """从这里开始设置 GUI 直到 771 行"""
+    def setup_gui(self):
+        """优化后的GUI界面设置"""
+        self.root = tk.Tk()
+        # 修改标题和标签，在Linux环境下使用更简单的表示
+        if platform.system() != 'Darwin':
+            self.root.title("Polymarket Trading System")
+        else:
+            self.root.title("Polymarket Automatic Trading System Power by @wuxiancai")
+        
+        # 创建主滚动框架
+        main_canvas = tk.Canvas(self.root, bg='#f8f9fa', highlightthickness=0)
         scrollbar = ttk.Scrollbar(self.root, orient="vertical", command=main_canvas.yview)
         
         # 创建内容Frame，放在Canvas里
@@ -537,6 +2560,12 @@ class CryptoTrader:
         self.reset_count_label = ttk.Label(main_controls, text="0", style='Red.TLabel')
         self.reset_count_label.pack(side=tk.LEFT, padx=(0, 2))
 
+        # 页面截图按钮
+        self.screenshot_button = ttk.Button(main_controls, text="Shot", width=4,
+                                           command=lambda: threading.Thread(
+                                               target=self.capture_screenshot, daemon=True).start())
+        self.screenshot_button.pack(side=tk.LEFT, padx=3)
+
         # 交易信息显示区域
         trading_info_frame = ttk.LabelFrame(
             scrollable_frame, 
@@ -575,7 +2604,8 @@ class CryptoTrader:
                 rate_frame = ttk.Frame(item_frame)
                 rate_frame.pack(side=tk.LEFT, padx=(2, 0))
                 
-                self.binance_rate_label = ttk.Label(rate_frame, text="0", style='Black.TLabel')
+                # 字体只在创建时设置一次,刷新时只改文字和颜色
+                self.binance_rate_label = ttk.Label(rate_frame, text="0", style='Black.TLabel', font=("Arial", 18, "bold"))
                 self.binance_rate_label.pack(side=tk.LEFT)
                 
                 self.binance_rate_symbol_label = ttk.Label(rate_frame, text="%", style='Black.TLabel')
@@ -585,6 +2615,10 @@ class CryptoTrader:
                 label.pack(side=tk.LEFT, padx=(2, 0))
                 setattr(self, attr_name, label)
         
+        # 行情延迟和时钟偏差
+        self.latency_label = ttk.Label(trading_info_frame, text="Latency: --", font=small_font, foreground='gray')
+        self.latency_label.pack(fill="x", pady=(0, 2))
+        
         # 实时价格显示区域
         price_frame = ttk.LabelFrame(
             scrollable_frame, 
@@ -621,6 +2655,12 @@ class CryptoTrader:
             price_label.pack()
             setattr(self, attr_name, price_label)
             
+            # 公允价值优势显示(公允价值 - 实时价格)
+            edge_attr = "yes_edge_label" if "yes_price_label" == attr_name else "no_edge_label"
+            edge_label = ttk.Label(price_frame_item, text="Edge: --", font=(base_font[0], 11, 'normal'), foreground='gray')
+            edge_label.pack()
+            setattr(self, edge_attr, edge_label)
+            
             # 份额显示
             shares_frame_item = ttk.Frame(item_container)
             shares_frame_item.pack(fill="x", pady=1)
@@ -798,10 +2838,10 @@ class CryptoTrader:
                     button = ttk.Button(trade_frame, text=text, style='Black.TButton')
                     
                     if command:
-                        button.configure(command=command)
+                        button.configure(command=self._queued_click(attr_name, command))
                     else:
                         # 金额按钮使用特殊绑定
-                        button.bind('<Button-1>', self.click_amount)
+                        button.bind('<Button-1>', self._queued_click(attr_name, self.click_amount))
                     
                     button.grid(row=row, column=col, padx=2, pady=2, sticky="ew")
                     setattr(self, attr_name, button)
@@ -886,6 +2926,87 @@ class CryptoTrader:
         
         # 最后一次更新确保布局正确
         self.root.update_idletasks()
+
+    def setup_headless_state(self):
+        """守护进程模式: 用内存控件代替GUI,控件名称和 setup_gui 保持一致,交易逻辑无需改动"""
+        self.root = HeadlessRoot(self.logger)
+        daemon_config = self.config.get('daemon', {})
+        
+        # 金额设置
+        settings_items = [
+            ("initial_amount_entry", self.initial_amount),
+            ("first_rebound_entry", self.first_rebound),
+            ("n_rebound_entry", self.n_rebound),
+            ("profit_rate_entry", f"{self.profit_rate}%"),
+            ("doubling_entry", self.doubling)
+        ]
+        for entry_attr, default_value in settings_items:
+            setattr(self, entry_attr, HeadlessWidget(value=default_value, name='!entry'))
+        
+        # 网址和币种
+        self.url_entry = HeadlessWidget(value=self.config.get('website', {}).get('url', ''), name='!combobox')
+        self.url_entry['values'] = self.config.get('url_history', [])
+        self.coin_combobox = HeadlessWidget(value=daemon_config.get('coin', 'BTC'), name='!combobox')
+        
+        # 控制按钮
+        self.start_button = HeadlessWidget(text="Start", command=self.start_monitoring)
+        self.set_amount_button = HeadlessWidget(text="Amount", command=self.set_yes_no_cash)
+        self.set_amount_button['state'] = 'disabled'
+        self.screenshot_button = HeadlessWidget(text="Shot", command=self.capture_screenshot)
+        
+        # 显示标签
+        label_items = [
+            ("zero_time_cash_label", "0"), ("reset_count_label", "0"),
+            ("trading_pair_label", "Trader-type"), ("binance_zero_price_label", "0"),
+            ("binance_now_price_label", "0"), ("binance_rate_label", "0"),
+            ("binance_rate_symbol_label", "%"), ("yes_price_label", "Up: waiting..."),
+            ("no_price_label", "Down: waiting..."), ("yes_edge_label", "Edge: --"),
+            ("no_edge_label", "Edge: --"), ("latency_label", "Latency: --"),
+            ("up_shares_label", "Shares: waiting..."),
+            ("down_shares_label", "Shares: waiting..."), ("portfolio_label", "Portfolio: waiting..."),
+            ("cash_label", "Cash: waiting...")
+        ]
+        for attr_name, default_text in label_items:
+            setattr(self, attr_name, HeadlessWidget(text=default_text, name='!label'))
+        
+        # Yes/No 价格和金额输入框,行号与 setup_gui 的 grid 布局一致
+        self.yes_frame = HeadlessFrame()
+        self.no_frame = HeadlessFrame()
+        for frame, prefix, config_prefix in [(self.yes_frame, 'yes', 'Yes'), (self.no_frame, 'no', 'No')]:
+            for i in range(1, 6):
+                price_value, amount_value = "0", "0"
+                if i == 1:
+                    price_value = str(self.config['trading'][f'{config_prefix}1']['target_price'])
+                    amount_value = str(self.config['trading'][f'{config_prefix}1']['amount'])
+                row_base = (i - 1) * 2
+                setattr(self, f'{prefix}{i}_price_entry',
+                        frame.add(row_base, 1, HeadlessWidget(value=price_value, name='!entry')))
+                if i < 5:
+                    setattr(self, f'{prefix}{i}_amount_entry',
+                            frame.add(row_base + 1, 1, HeadlessWidget(value=amount_value, name='!entry')))
+        
+        # 交易按钮
+        button_configs = [
+            ("buy_button", "Buy", self.click_buy),
+            ("buy_yes_button", "Buy-Yes", self.click_buy_yes),
+            ("buy_no_button", "Buy-No", self.click_buy_no),
+            ("buy_confirm_button", "Buy-confirm", self.click_buy_confirm_button),
+            ("position_sell_yes_button", "P-Sell-Yes", self.click_position_sell_yes),
+            ("position_sell_no_button", "P-Sell-No", self.click_position_sell_no),
+            ("sell_confirm_button", "Sell-conf", self.click_sell_confirm_button)
+        ]
+        for attr_name, text, command in button_configs:
+            setattr(self, attr_name, HeadlessWidget(text=text, command=self._queued_click(attr_name, command),
+                                                    name='!button'))
+        
+        # 金额按钮使用特殊绑定
+        for i in range(1, 5):
+            for attr_prefix, text_prefix in [('amount_yes', 'Amount-Y'), ('amount_no', 'Amount-N')]:
+                button = HeadlessWidget(text=f"{text_prefix}{i}", name='!button')
+                button.bind('<Button-1>', self._queued_click(f'{attr_prefix}{i}_button', self.click_amount))
+                setattr(self, f'{attr_prefix}{i}_button', button)
+        
+        self.logger.info("✅ 守护进程模式初始化完成(无GUI)")
     """以上代码从240行到 742 行是设置 GUI 界面的"""
 
     """以下代码从 745 行到行是程序交易逻辑"""
@@ -904,8 +3025,9 @@ class CryptoTrader:
         # 重置交易次数计数器
         self.trade_count = 0
             
-        # 启动浏览器作线程
-        threading.Thread(target=self._start_browser_monitoring, args=(target_url,), daemon=True).start()
+        # 连接浏览器并打开市场,在浏览器线程中执行
+        self.browser_queue.submit(BrowserCommandQueue.NAVIGATION, 'start_browser',
+                                  lambda: self._start_browser_monitoring(target_url))
         """到这里代码执行到了 995 行"""
 
         self.running = True
@@ -922,8 +3044,8 @@ class CryptoTrader:
         # 启动零点 CASH 监控
         self.get_zero_time_cash_timer = self.root.after(12000, self.get_zero_time_cash)
 
-        # 启动币安零点时价格监控
-        self.get_binance_zero_time_price_timer = self.root.after(14000, self.get_binance_zero_time_price)
+        # 启动币安零点时价格监控(后台线程获取,之后每天北京时间零点后自动重排)
+        self.schedule_binance_zero_time_price(14)
         
         # 启动币安实时价格监控
         self.get_binance_price_websocket_timer = self.root.after(16000, self.get_binance_price_websocket)
@@ -938,40 +3060,44 @@ class CryptoTrader:
         self.refresh_page_timer = self.root.after(40000, self.enable_refresh_page)
         self.logger.info("\033[34m✅ 启动页面刷新成功!\033[0m")
         
+        # 启动运行指标定时报告
+        self.metrics_report_timer = self.root.after(600000, self.report_metrics)
+        
+        # 启动标签页管理
+        self.tab_manage_timer = self.root.after(60000, self.manage_tabs)
+        
+        # 提前连接币安行情,零点价格和实时价格都从共用连接读取
+        self.binance_feed.start()
+        self.binance_display_timer = self.root.after(1000, self.refresh_binance_display)
+        
+        # 领先滞后分析
+        self.lead_lag_timer = self.root.after(60000, self.update_lead_lag)
+        
+        # 时钟偏差和延迟统计
+        self.latency_report_timer = self.root.after(5000, self.report_latency)
+        
+        # 后台补齐K线,并在零点价格定时任务之前先用零点K线恢复当日参考价
+        threading.Thread(target=self.backfill_klines, daemon=True).start()
+        
+        # 启动市场预解析
+        self.market_prefetch_timer = self.root.after(30000, self.schedule_market_prefetch)
+        
         # 启动 XPath 监控
         self.monitor_xpath_timer = self.monitor_xpath_timer = self.root.after(600000, self.monitor_xpath_elements)
 
     def _start_browser_monitoring(self, new_url):
-        """在新线程中执行浏览器操作"""
+        """在浏览器线程中连接浏览器并打开市场"""
         try:
             if not self.driver and not self.is_restarting:
-                chrome_options = Options()
-                chrome_options.debugger_address = "127.0.0.1:9222"
-                chrome_options.add_argument('--disable-dev-shm-usage')
-                
-                # 根据操作系统添加特定配置
-                system = platform.system()
-                if system == 'Linux':
-                    # 添加Linux系统下的优化参数
-                    chrome_options.add_argument('--no-sandbox')
-                    chrome_options.add_argument('--disable-gpu')
-                    chrome_options.add_argument('--disable-software-rasterizer')
-                    chrome_options.add_argument('--disable-background-networking')
-                    chrome_options.add_argument('--disable-default-apps')
-                    chrome_options.add_argument('--disable-extensions')
-                    chrome_options.add_argument('--disable-sync')
-                    chrome_options.add_argument('--metrics-recording-only')
-                    chrome_options.add_argument('--no-first-run')
-                    chrome_options.add_argument('--disable-translate')
-                    chrome_options.add_argument('--disable-background-timer-throttling')
-                    chrome_options.add_argument('--disable-backgrounding-occluded-windows')
-                    chrome_options.add_argument('--disable-renderer-backgrounding')
-                    chrome_options.add_argument('--disable-features=TranslateUI,BlinkGenPropertyTrees,SitePerProcess,IsolateOrigins')
-                    chrome_options.add_argument('--noerrdialogs')
-
+                chrome_options = self._build_chrome_options(self.debug_port)
                 self.driver = webdriver.Chrome(options=chrome_options)
+            self._on_driver_attached(self.driver)
+            
+            # 当前标签页登记为下单标签页,monitor_prices 打开下单标签页时直接复用,不再新开和重复加载
+            self.trade_tab_handle = self.tab_manager.adopt(self.driver, 'trade')
             
             # 在当前标签页打开URL
+            self.page_load_started = time.time()
             self.driver.get(new_url)
             
             # 等待页面加载
@@ -1003,6 +3129,11 @@ class CryptoTrader:
             self.monitoring_thread = threading.Thread(target=self.monitor_prices, daemon=True)
             self.monitoring_thread.start()
             self.logger.info("\033[34m✅ 启动实时监控价格和资金线程\033[0m")
+            
+            # 预启动热备Chrome
+            if self.standby_enabled:
+                threading.Thread(target=self.prepare_standby_browser, daemon=True).start()
+                self.standby_sync_timer = self.root.after(60000, self.sync_standby_browser)
                 
         except Exception as e:
             error_msg = f"浏览器启动或页面加载失败: {str(e)}"
@@ -1013,7 +3144,10 @@ class CryptoTrader:
         """显示错误并重置按钮状态"""
         # 用after方法确保在线程中执行GUI操作
         # 在尝试显示消息框之前，检查Tkinter主窗口是否仍然存在
-        if self.root and self.root.winfo_exists():
+        if self.daemon:
+            self.logger.error(error_msg)
+            self.start_button.config(state='normal')
+        elif self.root and self.root.winfo_exists():
             self.root.after(0, lambda: messagebox.showerror("错误", error_msg))
             self.root.after(0, lambda: self.start_button.config(state='normal'))
         else:
@@ -1026,38 +3160,53 @@ class CryptoTrader:
         try:
             # 确保浏览器连接
             if not self.driver and not self.is_restarting:
-                self.restart_browser(force_restart=True)
+                self.recover_browser("浏览器未连接")
                 
             target_url = self.url_entry.get().strip()
             
-            # 使用JavaScript创建并点击链接来打开新标签页
-            js_script = """
-                const a = document.createElement('a');
-                a.href = arguments[0];
-                a.target = '_blank';
-                a.rel = 'noopener noreferrer';
-                document.body.appendChild(a);
-                a.click();
-                document.body.removeChild(a);
-            """
-            self.driver.execute_script(js_script, target_url)
-            
-            # 等待新标签页打开
-            time.sleep(1)
-            
-            # 切换到新打开的标签页
-            self.driver.switch_to.window(self.driver.window_handles[-1])
-            
-            # 等待页面加载完成
-            WebDriverWait(self.driver, 10).until(
-                lambda driver: driver.execute_script('return document.readyState') == 'complete'
-            )
+            # 由标签页管理器打开(或复用)下单标签页
+            self.browser_queue.run(BrowserCommandQueue.NAVIGATION, 'open_trade_tab',
+                                   lambda: self._open_trade_tab(target_url))
            
+            # 读价使用独立会话和标签页,交易由交易线程执行,下单期间价格照常读取
+            if self.dedicated_price_tab:
+                self._open_price_tab(target_url)
+            self._start_trade_worker()
+            
             # 开始监控价格
+            self.last_price_time = time.time()
+            last_url_sync = time.time()
             while not self.stop_event.is_set():  # 改用事件判断
                 try:
-                    self.check_balance()
-                    self.check_prices()
+                    # 换日提升后旧读价会话由读价线程在两轮读价之间关闭,此时不会有读取还在使用它
+                    if self.retired_price_sessions:
+                        self._close_retired_price_sessions()
+                    
+                    if self.dedicated_price_tab and not self.price_driver and self.driver:
+                        self._open_price_tab(self.url_entry.get().strip())
+                    
+                    # 读价标签页跟随交易标签页切换市场
+                    if self.price_driver and time.time() - last_url_sync > 5:
+                        last_url_sync = time.time()
+                        self._sync_price_tab_url()
+                    
+                    # 读价标签页的内存和新鲜度检查(refresh_page 定时置位)
+                    if self.price_driver and self.price_recycle_due and not self.trading:
+                        self.price_recycle_due = False
+                        self._recycle_price_tab_once()
+                    
+                    if self.price_driver:
+                        self.check_balance()
+                        self.check_prices()
+                    else:
+                        # 没有独立读价会话时,读价也要经过下单会话的命令队列
+                        self.browser_queue.run(BrowserCommandQueue.PRICE, 'read_prices',
+                                               lambda: (self.check_balance(), self.check_prices()))
+                    
+                    # 价格长时间未更新,按恢复阶梯逐级恢复
+                    stale_seconds = time.time() - self.last_price_time
+                    if stale_seconds > self.price_stale_seconds and not self.trading and not self.is_restarting:
+                        self.recover_browser(f"价格已{int(stale_seconds)}秒未更新")
                     time.sleep(1)
                 except Exception as e:
                     if not self.stop_event.is_set():  # 仅在未停止时记录错误
@@ -1067,8 +3216,430 @@ class CryptoTrader:
             if not self.stop_event.is_set():
                 self.logger.error(f"加载页面失败: {str(e)}")
     
-    def get_nearby_cents(self):
-        """获取spread附近的价格数字"""
+    def _open_trade_tab(self, target_url):
+        """打开或复用下单标签页,并等待页面加载完成"""
+        self.trade_tab_handle = self.tab_manager.acquire(self.driver, 'trade', target_url)
+        self._apply_request_blocking(self.driver)
+        
+        # 等待页面加载完成
+        WebDriverWait(self.driver, 10).until(
+            lambda driver: driver.execute_script('return document.readyState') == 'complete'
+        )
+        return self.trade_tab_handle
+
+    def _open_price_tab(self, target_url):
+        """创建独立的读价WebDriver会话,在新标签页中打开目标URL
+        
+        读价会话和下单会话(self.driver)连接同一个Chrome,但各自占用一个标签页,
+        下单时的点击和等待不会阻塞读价
+        """
+        with self.price_session_lock:
+            self._close_price_session()
+            try:
+                price_driver = webdriver.Chrome(options=self._build_chrome_options(self.debug_port))
+                price_driver.set_page_load_timeout(20)
+                # 会话重建时复用原来的读价标签页
+                price_tab_handle = self.tab_manager.acquire(price_driver, 'price')
+                self._apply_request_blocking(price_driver)
+                price_driver.get(target_url)
+                WebDriverWait(price_driver, 10).until(
+                    lambda driver: driver.execute_script('return document.readyState') == 'complete'
+                )
+                self.price_tab_handle = price_tab_handle
+                self.price_driver = price_driver
+                self.tab_memory_baselines.pop('price', None)
+                self.logger.info("✅ \033[34m已打开独立读价标签页\033[0m")
+                return True
+            except Exception as e:
+                self.logger.error(f"❌ 打开独立读价标签页失败,暂用下单标签页读价: {str(e)}")
+                self.price_driver = None
+                self.price_tab_handle = None
+                return False
+
+    def _close_price_session(self, close_tab=False):
+        """断开读价会话(不关闭Chrome)
+        
+        Args:
+            close_tab: 是否同时关闭读价标签页;默认保留,供重建的会话复用
+        """
+        price_driver = self.price_driver
+        self.price_driver = None
+        if not price_driver:
+            return
+        cdp_client = self.cdp_clients.pop(self.price_tab_handle, None)
+        if cdp_client:
+            cdp_client.close()
+        if close_tab:
+            self.tab_manager.close_role(price_driver, 'price')
+        try:
+            # 连接已有Chrome时 quit 只结束chromedriver会话
+            price_driver.quit()
+        except Exception:
+            pass
+        self.price_tab_handle = None
+
+    def _sync_price_tab_url(self):
+        """读价标签页的市场与URL输入框不一致时(如每日切换市场后)跟随跳转
+        
+        持有 price_session_lock: 换日提升和URL输入框更新在同一把锁内完成,不会把新标签页跳回旧市场
+        """
+        with self.price_session_lock:
+            try:
+                if not self.price_driver:
+                    return
+                target_url = self.url_entry.get().strip()
+                if not target_url:
+                    return
+                current_url = self.price_driver.current_url.split('?', 1)[0].split('#', 1)[0]
+                if current_url.rstrip('/') != target_url.split('?', 1)[0].rstrip('/'):
+                    self.logger.info(f"🔄 读价标签页跟随切换到: {target_url}")
+                    self.page_load_started = time.time()
+                    self.price_driver.get(target_url)
+            except Exception as e:
+                self.logger.warning(f"❌ 读价标签页同步URL失败,重建读价会话: {str(e)}")
+                self._close_price_session()
+
+    def prewarm_next_market(self, url):
+        """换日前在后台标签页打开下一个市场并开始读价"""
+        if not self.dedicated_price_tab or not self.driver:
+            return False
+        if self.next_driver and self.next_market_url == url:
+            return True
+        self._discard_next_market()
+        next_driver = None
+        try:
+            next_driver = webdriver.Chrome(options=self._build_chrome_options(self.debug_port))
+            next_driver.set_page_load_timeout(20)
+            next_tab_handle = self.tab_manager.acquire(next_driver, 'next')
+            self._apply_request_blocking(next_driver)
+            next_driver.get(url)
+            WebDriverWait(next_driver, 15).until(
+                lambda driver: driver.execute_script('return document.readyState') == 'complete'
+            )
+            self.next_driver = next_driver
+            self.next_tab_handle = next_tab_handle
+            self.next_market_url = url
+            self.next_market_prices = None
+            threading.Thread(target=self._next_market_feed_loop, args=(next_driver,), daemon=True).start()
+            self.logger.info(f"✅ \033[34m已预热下一个市场: {url}\033[0m")
+            return True
+        except Exception as e:
+            self.logger.error(f"❌ 预热下一个市场失败: {str(e)}")
+            if next_driver:
+                try:
+                    self.tab_manager.close_role(next_driver, 'next')
+                    next_driver.quit()
+                except Exception:
+                    pass
+            return False
+
+    def _next_market_feed_loop(self, next_driver):
+        """预热标签页的读价循环,被提升或丢弃后退出"""
+        while not self.stop_event.is_set() and self.next_driver is next_driver:
+            try:
+                up_price, down_price, asks_shares, bids_shares = self.get_nearby_cents(driver=next_driver)
+                if up_price is not None and down_price is not None:
+                    self.next_market_prices = (time.time(), up_price, down_price, asks_shares, bids_shares)
+            except Exception:
+                pass
+            time.sleep(1)
+
+    def _promote_next_market(self, new_url):
+        """换日时把预热标签页提升为读价标签页,旧的读价标签页交给读价线程关闭
+        
+        在 price_session_lock 内切换会话;读价线程可能还在用旧会话读价,
+        所以这里不 quit 旧会话,而是放入 retired_price_sessions,由读价线程在下一轮开始前关闭。
+        调用方应在同一把锁内、提升之后再更新URL输入框。
+        
+        Returns:
+            bool: 是否提升成功;未预热或URL不一致时返回False,由读价线程跟随跳转
+        """
+        next_driver = self.next_driver
+        if not next_driver or self.next_market_url != new_url:
+            self._discard_next_market()
+            return False
+        # 预热标签页10秒内读到过价格才提升
+        if not self.next_market_prices or time.time() - self.next_market_prices[0] > 10:
+            self.logger.warning("❌ 预热标签页没有最新价格,不提升")
+            self._discard_next_market()
+            return False
+        
+        # 先切换读价会话再退役旧的,避免读价线程看到空会话而新开标签页
+        with self.price_session_lock:
+            old_price_driver, old_price_tab_handle = self.price_driver, self.price_tab_handle
+            self.next_driver = None
+            self.tab_manager.register(self.next_tab_handle, 'price')
+            self.price_tab_handle = self.next_tab_handle
+            self.price_driver = next_driver
+            if old_price_driver:
+                self.retired_price_sessions.append((old_price_driver, old_price_tab_handle))
+            self.next_tab_handle = None
+            self.next_market_url = None
+            self.last_price_time = time.time()
+        self.metrics.incr('rollover.promoted')
+        self.logger.info(f"✅ \033[34m已将预热标签页提升为读价标签页: {new_url}\033[0m")
+        return True
+
+    def _close_retired_price_sessions(self):
+        """关闭换日提升后退役的读价会话和标签页(在读价线程中调用)"""
+        with self.price_session_lock:
+            retired, self.retired_price_sessions = self.retired_price_sessions, []
+        for old_price_driver, old_price_tab_handle in retired:
+            cdp_client = self.cdp_clients.pop(old_price_tab_handle, None)
+            if cdp_client:
+                cdp_client.close()
+            try:
+                old_price_driver.execute_cdp_cmd('Target.closeTarget', {'targetId': old_price_tab_handle})
+                old_price_driver.quit()
+            except Exception:
+                pass
+
+    def _discard_next_market(self):
+        """关闭预热标签页和对应的WebDriver会话"""
+        next_driver = self.next_driver
+        self.next_driver = None
+        self.next_tab_handle = None
+        self.next_market_url = None
+        self.next_market_prices = None
+        if not next_driver:
+            return
+        try:
+            self.tab_manager.close_role(next_driver, 'next')
+        except Exception:
+            pass
+        try:
+            next_driver.quit()
+        except Exception:
+            pass
+
+    def _read_driver(self):
+        """读价和读余额使用的WebDriver: 优先独立读价会话"""
+        return self.price_driver or self.driver
+
+    def _get_cdp_client(self, target_id):
+        """获取指定标签页的CDP直连客户端,不可用时返回None(调用方退回Selenium)"""
+        if not self.cdp_fast_path or websockets is None or not target_id:
+            return None
+        client = self.cdp_clients.get(target_id)
+        if client and client.connected:
+            return client
+        # 连接失败后30秒内不再重试,避免每次读价都等待连接超时
+        if time.time() < self.cdp_retry_after.get(target_id, 0):
+            return None
+        client = CDPClient(self.logger, self.debug_port)
+        if not client.connect(target_id):
+            self.cdp_retry_after[target_id] = time.time() + 30
+            return None
+        self.cdp_clients[target_id] = client
+        self.logger.info(f"✅ 已建立CDP直连: {target_id}")
+        return client
+
+    def _cdp_trade_client(self):
+        """下单标签页的CDP直连客户端"""
+        if not self.cdp_fast_path or websockets is None or not self.driver:
+            return None
+        if not self.trade_tab_handle:
+            self.trade_tab_handle = self.driver.current_window_handle
+        return self._get_cdp_client(self.trade_tab_handle)
+
+    def _close_cdp_clients(self):
+        """关闭所有CDP直连(标签页关闭或浏览器重连后调用)"""
+        for client in list(self.cdp_clients.values()):
+            client.close()
+        self.cdp_clients = {}
+        self.trade_tab_handle = None
+
+    def _cdp_read_sibling_texts(self, driver):
+        """通过CDP直连读盘口文本
+        
+        Returns:
+            tuple/False/None: 文本元组; 页面上没有Spread时返回False; CDP不可用时返回None
+        """
+        if driver is self.price_driver:
+            client = self._get_cdp_client(self.price_tab_handle)
+        elif driver is self.driver:
+            client = self._cdp_trade_client()
+        else:
+            client = None
+        if not client:
+            return None
+        try:
+            result = client.call_function(CDP_JS_SIBLING_TEXTS, XPathConfig.SPREAD, timeout=3)
+            if not result:
+                return False
+            self._record_dom_latency(driver, result.get('mutated_at'))
+            return result.get('above_texts', []), result.get('below_texts', [])
+        except Exception as e:
+            self.logger.debug(f"CDP读盘口失败,退回Selenium: {str(e)}")
+            return None
+
+    def _cdp_set_input(self, xpaths, value):
+        """通过CDP直连给下单标签页的输入框赋值,成功返回True"""
+        try:
+            client = self._cdp_trade_client()
+            return bool(client and client.call_function(CDP_JS_SET_INPUT, xpaths, str(value)))
+        except Exception as e:
+            self.logger.debug(f"CDP输入失败,退回Selenium: {str(e)}")
+            return False
+
+    def _cdp_click(self, xpaths):
+        """通过CDP直连点击下单标签页的元素,成功返回True"""
+        try:
+            client = self._cdp_trade_client()
+            return bool(client and client.call_function(CDP_JS_CLICK, xpaths))
+        except Exception as e:
+            self.logger.debug(f"CDP点击失败,退回Selenium: {str(e)}")
+            return False
+
+    def _cdp_read_text(self, xpaths):
+        """通过CDP直连读取下单标签页元素的文本,不可用或未找到时返回None"""
+        try:
+            client = self._cdp_trade_client()
+            return client.call_function(CDP_JS_TEXT, xpaths) if client else None
+        except Exception as e:
+            self.logger.debug(f"CDP读取文本失败,退回Selenium: {str(e)}")
+            return None
+
+    def _start_trade_worker(self):
+        """启动交易线程,由它执行交易阶梯,监控线程只负责读价"""
+        if self.trade_worker and self.trade_worker.is_alive():
+            return
+        self.trade_worker = threading.Thread(target=self._trade_worker_loop, daemon=True)
+        self.trade_worker.start()
+
+    def _trade_worker_loop(self):
+        """交易线程: 每次取最新价格执行一遍交易阶梯
+        
+        交易进行中到达的价格只保留最新一次,交易结束后按最新价格继续判断
+        """
+        while not self.stop_event.is_set():
+            if not self.trade_tick_event.wait(timeout=1):
+                continue
+            self.trade_tick_event.clear()
+            tick = self.trade_tick
+            if tick is None or not self.running or self.trading:
+                continue
+            up_price, down_price, asks_shares, bids_shares = self._apply_lead_lag(*tick)
+            try:
+                # 第一次交易
+                self.First_trade(up_price, down_price, asks_shares, bids_shares)
+                
+                # 第二次交易
+                self.Second_trade(up_price, down_price, asks_shares, bids_shares)
+                
+                # 第三次交易
+                self.Third_trade(up_price, down_price, asks_shares, bids_shares)
+                
+                # 第四次交易
+                self.Forth_trade(up_price, down_price, asks_shares, bids_shares)
+                
+                # 卖出YES
+                self.Sell_yes(up_price, down_price, asks_shares, bids_shares)
+                
+                # 卖出NO
+                self.Sell_no(up_price, down_price, asks_shares, bids_shares)
+            except Exception as e:
+                self.logger.error(f"交易线程执行失败: {str(e)}")
+
+    def _update_fair_value(self, up_price, down_price):
+        """按币安最新价、零点价格、已实现波动率和剩余时间计算 Up/Down 公允价值,在价格标签旁显示优势"""
+        try:
+            strike = getattr(self, 'zero_time_price', None)
+            latest = self.binance_feed.get_latest(self.binance_symbol)
+            now = time.time()
+            # 波动率计算较慢,定期刷新
+            if now - self.fair_value_vol_time >= self.fair_value_vol_refresh:
+                self.fair_value_vol = self.binance_feed.realized_vol(self.binance_symbol)
+                self.fair_value_vol_time = now
+            if not strike or not latest or not self.fair_value_vol:
+                self.yes_edge_label.config(text="Edge: --", foreground='gray')
+                self.no_edge_label.config(text="Edge: --", foreground='gray')
+                return
+            
+            # 市场在北京时间次日零点(美东中午)结算
+            next_midnight = datetime.now(CHINA_TZ).replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+            seconds_left = next_midnight.timestamp() - now
+            # 订单簿已同步时用 microprice 作为现价,比最新成交价更能反映当下的买卖压力
+            depth = self.binance_feed.get_depth(self.binance_symbol)
+            spot = depth['microprice'] if depth else latest['price']
+            fair_up = 100.0 * self.fair_value_engine.up_probability(spot, strike, self.fair_value_vol, seconds_left)
+            up_edge = fair_up - up_price
+            down_edge = (100.0 - fair_up) - (100.0 - down_price)
+            
+            self.yes_edge_label.config(text=f"Edge: {up_edge:+.2f}¢", foreground='#1AAD19' if up_edge >= 0 else 'red')
+            self.no_edge_label.config(text=f"Edge: {down_edge:+.2f}¢", foreground='#1AAD19' if down_edge >= 0 else 'red')
+            self.metrics.set_gauge('fair_value.up', fair_up)
+            self.metrics.set_gauge('fair_value.vol', self.fair_value_vol)
+            self.metrics.set_gauge('fair_value.up_edge', up_edge)
+            self.metrics.set_gauge('fair_value.down_edge', down_edge)
+        except Exception as e:
+            self.logger.debug(f"计算公允价值失败: {str(e)}")
+
+    def _apply_lead_lag(self, up_price, down_price, asks_shares, bids_shares):
+        """开启 drive_ladder 且币安领先、相关性足够时,按预测的 Up 价格平移买卖价,让交易阶梯提前触发"""
+        signal = self.lead_lag_signal
+        if not self.lead_lag_drive_ladder or not signal or up_price is None or down_price is None:
+            return up_price, down_price, asks_shares, bids_shares
+        if signal.lag_seconds <= 0 or signal.correlation < self.lead_lag_min_correlation:
+            return up_price, down_price, asks_shares, bids_shares
+        predicted_up = self.lead_lag.predict_up()
+        if predicted_up is None:
+            return up_price, down_price, asks_shares, bids_shares
+        shift = round(predicted_up - up_price, 2)
+        return up_price + shift, down_price + shift, asks_shares, bids_shares
+
+    def update_lead_lag(self):
+        """定时重新拟合领先滞后模型,结果写入 lead_lag_signal 和指标"""
+        def fit():
+            try:
+                signal = self.lead_lag.estimate()
+                self.lead_lag_signal = signal
+                if signal is None:
+                    return
+                self.metrics.set_gauge('lead_lag.lag_seconds', signal.lag_seconds)
+                self.metrics.set_gauge('lead_lag.correlation', signal.correlation)
+                predicted_up = self.lead_lag.predict_up()
+                if predicted_up is not None:
+                    self.metrics.set_gauge('lead_lag.predicted_up', predicted_up)
+                self.logger.debug(f"领先滞后: lag={signal.lag_seconds:.1f}s corr={signal.correlation:.2f} "
+                                  f"预测Up={predicted_up if predicted_up is None else round(predicted_up, 2)}")
+            except Exception as e:
+                self.logger.warning(f"领先滞后分析失败: {str(e)}")
+        
+        # 拟合放到后台线程,不阻塞Tk线程
+        threading.Thread(target=fit, daemon=True).start()
+        if self.running:
+            self.lead_lag_timer = self.root.after(self.lead_lag_interval, self.update_lead_lag)
+
+    def _record_tick(self, tick_time, up_price, down_price, asks_shares, bids_shares):
+        """记录每一次读到的价格: 内存环形缓冲 + 按天的CSV文件"""
+        self.price_ticks.append((tick_time, up_price, down_price, asks_shares, bids_shares))
+        try:
+            today = datetime.fromtimestamp(tick_time).strftime('%Y%m%d')
+            if today != self.tick_journal_date:
+                if self.tick_journal_file:
+                    self.tick_journal_file.close()
+                if not os.path.exists(self.tick_journal_dir):
+                    os.makedirs(self.tick_journal_dir)
+                self.tick_journal_file = open(os.path.join(self.tick_journal_dir, f'{today}.csv'), 'a', encoding='utf-8')
+                self.tick_journal_date = today
+            self.tick_journal_file.write(f"{tick_time:.3f},{up_price},{down_price},"
+                                         f"{asks_shares or 0},{bids_shares or 0},{int(self.trading)}\n")
+            # 每10条落盘一次,减少IO
+            self.tick_journal_pending += 1
+            if self.tick_journal_pending >= 10:
+                self.tick_journal_file.flush()
+                self.tick_journal_pending = 0
+        except Exception as e:
+            self.logger.debug(f"写入价格记录失败: {str(e)}")
+
+    def get_nearby_cents(self, driver=None):
+        """获取spread附近的价格数字
+        
+        Args:
+            driver: 读价使用的WebDriver,默认使用独立读价会话
+        """
+        driver = driver or self._read_driver()
         # 根据规律直接获取对应位置的值
         up_price_val = None
         asks_shares_val = None
@@ -1080,54 +3651,13 @@ class CryptoTrader:
         bids_shares_str = None
 
         try:
-            # 定位 Spread 元素
-            keyword_element = None
-            try:
-                keyword_element = self.driver.find_element(By.XPATH, XPathConfig.SPREAD[0])
-            except NoSuchElementException:
-                return None, None, None, None   
-                
-            # 获取container
-            container = None
-            try:
-                container = keyword_element.find_element(By.XPATH, './ancestor::div[3]')
-            except NoSuchElementException:
-                return None, None, None, None
-            
-            if not container:
-                return None, None, None, None         
-                
-            # 使用JavaScript获取相邻元素文本内容
-            js_combined = '''
-                const container = arguments[0];
-                const result = { above_texts: [], below_texts: [] };
-
-                let above_e = container;
-                while (above_e = above_e.previousElementSibling) {
-                    let txt = "";
-                    try { txt = above_e.innerText || above_e.textContent || ""; } catch (err) {}
-                    result.above_texts.push(txt.trim());
-                }
-
-                let below_e = container;
-                while (below_e = below_e.nextElementSibling) {
-                    let txt = "";
-                    try { txt = below_e.innerText || below_e.textContent || ""; } catch (err) {}
-                    result.below_texts.push(txt.trim());
-                }
-                return result;
-            '''
-            
-            try:
-                # 执行JavaScript获取结果
-                sibling_texts_result = self.driver.execute_script(js_combined, container)
-                above_element_texts = sibling_texts_result.get('above_texts', [])
-                below_element_texts = sibling_texts_result.get('below_texts', [])
-            except StaleElementReferenceException:
-                return None, None, None, None
-            except Exception as e:
-                #self.logger.error(f"执行JavaScript获取兄弟节点文本失败: {str(e)}") # 不能试用error,因为是正常情况,否则会导致大量日志
+            # 优先通过CDP直连读盘口,失败时退回Selenium
+            sibling_texts = self._cdp_read_sibling_texts(driver)
+            if sibling_texts is None:
+                sibling_texts = self._read_sibling_texts(driver)
+            if not sibling_texts:
                 return None, None, None, None
+            above_element_texts, below_element_texts = sibling_texts
             
             # 解析上方元素文本(asks/up)
             if len(above_element_texts) >= 3: # Need at least 3 elements for a block
@@ -1163,45 +3693,121 @@ class CryptoTrader:
                                 bids_shares_str = potential_shares_cleaned
                                 break
             
-            # 转换为数值类型
+            # 转换为数值类型
+            try:
+                if up_price_str is not None: # Check for None before float conversion
+                    up_price_val = round(float(up_price_str), 2)
+                if asks_shares_str is not None:
+                    asks_shares_val = float(asks_shares_str.replace(',', ''))
+                
+                if down_price_str is not None:
+                    down_price_val = round(float(down_price_str), 2)
+                if bids_shares_str is not None:
+                    bids_shares_val = float(bids_shares_str.replace(',', ''))
+                    
+                return up_price_val, down_price_val, asks_shares_val, bids_shares_val 
+                
+            except ValueError as e:
+                #self.logger.error(f"数值转换错误: {e}") # 不能试用error,因为是正常情况,否则会导致大量日志
+                return None, None, None, None
+                
+        except Exception as e:
+            #self.logger.error(f"解析价格和股数时发生未知错误: {str(e)}") # 不能试用error,因为是正常情况,否则会导致大量日志
+            return None, None, None, None
+        
+    def _record_dom_latency(self, driver, mutated_at):
+        """记录页面盘口变化到Python读到的延迟,只统计上次读取之后的新变化
+        
+        两次读取之间有多次变化时只能看到最后一次,统计值是实际延迟的下界
+        """
+        if not mutated_at:
+            return
+        key = id(driver)
+        if self.dom_mutation_seen.get(key) == mutated_at:
+            return
+        self.dom_mutation_seen[key] = mutated_at
+        self.metrics.observe('latency.polymarket_dom_ms', time.time() * 1000 - mutated_at)
+
+    def _read_sibling_texts(self, driver):
+        """通过Selenium读取Spread所在容器上下兄弟节点的文本
+        
+        Returns:
+            tuple: (above_texts, below_texts),未找到元素时返回None
+        """
+        try:
+            # 定位 Spread 元素
+            keyword_element = None
+            try:
+                keyword_element = driver.find_element(By.XPATH, XPathConfig.SPREAD[0])
+            except NoSuchElementException:
+                return None   
+                
+            # 获取container
+            container = None
+            try:
+                container = keyword_element.find_element(By.XPATH, './ancestor::div[3]')
+            except NoSuchElementException:
+                return None
+            
+            if not container:
+                return None         
+                
+            # 使用JavaScript获取相邻元素文本内容
+            js_combined = '''
+                const container = arguments[0];
+                const result = { above_texts: [], below_texts: [] };
+
+                let above_e = container;
+                while (above_e = above_e.previousElementSibling) {
+                    let txt = "";
+                    try { txt = above_e.innerText || above_e.textContent || ""; } catch (err) {}
+                    result.above_texts.push(txt.trim());
+                }
+
+                let below_e = container;
+                while (below_e = below_e.nextElementSibling) {
+                    let txt = "";
+                    try { txt = below_e.innerText || below_e.textContent || ""; } catch (err) {}
+                    result.below_texts.push(txt.trim());
+                }
+            ''' + JS_WATCH_MUTATIONS + '''
+                return result;
+            '''
+            
             try:
-                if up_price_str is not None: # Check for None before float conversion
-                    up_price_val = round(float(up_price_str), 2)
-                if asks_shares_str is not None:
-                    asks_shares_val = float(asks_shares_str.replace(',', ''))
-                
-                if down_price_str is not None:
-                    down_price_val = round(float(down_price_str), 2)
-                if bids_shares_str is not None:
-                    bids_shares_val = float(bids_shares_str.replace(',', ''))
-                    
-                return up_price_val, down_price_val, asks_shares_val, bids_shares_val 
-                
-            except ValueError as e:
-                #self.logger.error(f"数值转换错误: {e}") # 不能试用error,因为是正常情况,否则会导致大量日志
-                return None, None, None, None
-                
-        except Exception as e:
-            #self.logger.error(f"解析价格和股数时发生未知错误: {str(e)}") # 不能试用error,因为是正常情况,否则会导致大量日志
-            return None, None, None, None
-        
+                # 执行JavaScript获取结果
+                sibling_texts_result = driver.execute_script(js_combined, container)
+                self._record_dom_latency(driver, sibling_texts_result.get('mutated_at'))
+                above_element_texts = sibling_texts_result.get('above_texts', [])
+                below_element_texts = sibling_texts_result.get('below_texts', [])
+            except StaleElementReferenceException:
+                return None
+            except Exception as e:
+                #self.logger.error(f"执行JavaScript获取兄弟节点文本失败: {str(e)}") # 不能试用error,因为是正常情况,否则会导致大量日志
+                return None
+        except Exception:
+            return None
+        return above_element_texts, below_element_texts
+
     def check_balance(self):
         """检查账户余额"""
         try:
+            driver = self._read_driver()
             # 获取Portfolio值
             try:
-                portfolio_element = self.driver.find_element(By.XPATH, XPathConfig.PORTFOLIO_VALUE[0])
+                portfolio_element = driver.find_element(By.XPATH, XPathConfig.PORTFOLIO_VALUE[0])
                 portfolio_text = portfolio_element.text
             except NoSuchElementException:
-                portfolio_element = self._find_element_with_retry(XPathConfig.PORTFOLIO_VALUE, timeout=3, silent=True)
+                portfolio_element = self._find_element_with_retry(XPathConfig.PORTFOLIO_VALUE, timeout=3, silent=True,
+                                                                   driver=driver)
                 portfolio_text = portfolio_element.text if portfolio_element else "Portfolio: $0.00"
             
             # 获取Cash值
             try:
-                cash_element = self.driver.find_element(By.XPATH, XPathConfig.CASH_VALUE[0])
+                cash_element = driver.find_element(By.XPATH, XPathConfig.CASH_VALUE[0])
                 cash_text = cash_element.text
             except NoSuchElementException:
-                cash_element = self._find_element_with_retry(XPathConfig.CASH_VALUE, timeout=3, silent=True)
+                cash_element = self._find_element_with_retry(XPathConfig.CASH_VALUE, timeout=3, silent=True, driver=driver)
                 cash_text = cash_element.text if cash_element else "Cash: $0.00"
             
             # 更新GUI
@@ -1228,6 +3834,15 @@ class CryptoTrader:
             
             if up_price is None or down_price is None:
                 return
+            self.last_price_time = time.time()
+            
+            # 记录页面加载到读到第一个价格的耗时
+            if self.page_load_started:
+                time_to_first_price = self.last_price_time - self.page_load_started
+                self.page_load_started = None
+                blocking_state = 'blocked' if self.block_requests else 'unblocked'
+                self.metrics.observe(f'page.time_to_first_price.{blocking_state}', time_to_first_price)
+                self.logger.info(f"✅ 页面加载到首个价格耗时: {time_to_first_price:.2f}秒 (请求屏蔽: {blocking_state})")
                 
             # 更新价格显示
             self.yes_price_label.config(text=f"Up: {up_price:.2f}¢")
@@ -1242,29 +3857,297 @@ class CryptoTrader:
             self.buy_down_price = down_price
             self.sell_up_price = up_price
             self.sell_down_price = 100.0 - down_price
+            self._record_tick(self.last_price_time, up_price, down_price, asks_shares, bids_shares)
+            self.lead_lag.add_poly(self.last_price_time, up_price)
+            self._update_fair_value(up_price, down_price)
             
-            # 检查是否需要交易
+            # 检查是否需要交易: 投递给交易线程,不在读价线程里下单
             if self.running and not self.trading:
-                # 第一次交易
-                self.First_trade(up_price, down_price, asks_shares, bids_shares)
+                self.trade_tick = (up_price, down_price, asks_shares, bids_shares)
+                self.trade_tick_event.set()
                 
-                # 第二次交易
-                self.Second_trade(up_price, down_price, asks_shares, bids_shares)
-                
-                # 第三次交易
-                self.Third_trade(up_price, down_price, asks_shares, bids_shares)
-                
-                # 第四次交易
-                self.Forth_trade(up_price, down_price, asks_shares, bids_shares)
+        except Exception as e:
+            pass
+
+    def recover_browser(self, reason=""):
+        """按恢复阶梯逐级恢复浏览器,只有前面的阶段都失败才重启Chrome进程
+        
+        阶梯: 重新查找元素 -> CDP软刷新 -> 关闭并重开标签页 -> 重连WebDriver会话 -> 重启Chrome进程
+        每个阶段有独立超时,并按阶段记录恢复耗时(MTTR)
+        
+        阶梯串行执行: 同一时间只有一个阶段线程在操作 self.driver / price_driver,
+        阶段超时后先通知取消并等待其退出,宽限期内仍未退出则放弃后续阶段。
+        恢复进行中时其它线程等待其结束并按结果返回,Tk主线程不等待直接返回False。
+        
+        Args:
+            reason: 触发恢复的原因,用于日志
+        Returns:
+            bool: 是否恢复成功
+        """
+        with self.recovery_lock:
+            stage_thread = self.recovery_stage_thread
+            busy = self.recovering or self.is_restarting or bool(stage_thread and stage_thread.is_alive())
+            if not busy:
+                self.recovering = True
+                self.recovery_owner = threading.get_ident()
+                self.recovery_cancel.clear()
+        if busy:
+            return self._wait_for_recovery()
+        
+        # 停机时间从最后一次读到价格开始计算
+        downtime_start = min(self.last_price_time, time.time())
+        recovery_start = time.time()
+        stages = [
+            ('refind_elements', self._recover_refind_elements, 5),
+            ('soft_reload', self._recover_soft_reload, 20),
+            ('reopen_tab', self._recover_reopen_tab, 30),
+            ('reconnect_session', self._recover_reconnect_session, 45),
+            ('restart_process', lambda: self.restart_browser(force_restart=True), 120)
+        ]
+        try:
+            self.logger.warning(f"🔄 开始恢复浏览器: {reason}")
+            for stage_name, stage_func, stage_timeout in stages:
+                # 没有WebDriver会话时,前三个阶段无法执行
+                if not self.driver and stage_name in ('refind_elements', 'soft_reload', 'reopen_tab'):
+                    continue
                 
-                # 卖出YES
-                self.Sell_yes(up_price, down_price, asks_shares, bids_shares)
+                stage_start = time.time()
+                self.metrics.incr(f'recovery.{stage_name}.attempts')
+                success = self._run_with_timeout(stage_func, stage_timeout)
+                if success is None:
+                    # 阶段线程仍在操作浏览器,继续升级会和它同时重建会话
+                    self.metrics.incr('recovery.aborted')
+                    self.logger.error(f"❌ 恢复阶段 {stage_name} 超时且未能取消,停止恢复阶梯")
+                    return False
+                if success and stage_name != 'restart_process':
+                    success = self._check_page_health(timeout=max(1, stage_timeout - (time.time() - stage_start)))
+                stage_elapsed = time.time() - stage_start
+                self.metrics.observe(f'recovery.{stage_name}.stage_seconds', stage_elapsed)
                 
-                # 卖出NO
-                self.Sell_no(up_price, down_price, asks_shares, bids_shares)
+                if success:
+                    mttr = time.time() - downtime_start
+                    self.metrics.incr(f'recovery.{stage_name}.success')
+                    self.metrics.observe(f'recovery.{stage_name}.mttr_seconds', mttr)
+                    self.last_price_time = time.time()
+                    stats = self.metrics.summary(f'recovery.{stage_name}.mttr_seconds')
+                    self.logger.info(f"✅ \033[34m浏览器恢复成功: 阶段 {stage_name}, 本阶段耗时 {stage_elapsed:.1f}秒, "
+                                     f"总停机 {mttr:.1f}秒, 该阶段平均MTTR {stats['mean']:.1f}秒({stats['count']}次)\033[0m")
+                    return True
+                self.logger.warning(f"❌ 恢复阶段 {stage_name} 失败,耗时 {stage_elapsed:.1f}秒,升级到下一阶段")
+            
+            self.metrics.incr('recovery.failed')
+            self.logger.error(f"❌ 浏览器恢复全部失败,总耗时 {time.time() - recovery_start:.1f}秒")
+            return False
+        finally:
+            with self.recovery_lock:
+                self.recovering = False
+                self.recovery_owner = None
+
+    def _wait_for_recovery(self, timeout=300):
+        """等待正在进行的恢复结束,返回浏览器是否可用
+        
+        Tk主线程、浏览器线程(恢复阶段要在它上面执行)和恢复线程自身(阶段内部的调用)不等待,直接返回False
+        """
+        stage_thread = self.recovery_stage_thread
+        current = threading.current_thread()
+        if (current is threading.main_thread() or self.browser_queue.on_worker_thread()
+                or threading.get_ident() == self.recovery_owner or current is stage_thread):
+            self.logger.info("浏览器正在恢复中,本次不等待")
+            return False
+        self.logger.info("浏览器正在恢复中,等待恢复完成")
+        end_time = time.time() + timeout
+        while time.time() < end_time:
+            stage_thread = self.recovery_stage_thread
+            if not (self.recovering or self.is_restarting or (stage_thread and stage_thread.is_alive())):
+                break
+            time.sleep(0.5)
+        else:
+            return False
+        return self.driver is not None
+
+    def _check_recovery_cancelled(self):
+        """恢复阶段的检查点: 阶段已超时则抛出异常,不再继续修改浏览器会话"""
+        if self.recovery_cancel.is_set():
+            raise Exception("恢复阶段已超时取消")
+
+    def _run_with_timeout(self, func, timeout):
+        """在独立线程中执行恢复动作,超时视为失败
+        
+        阶段动作以交易优先级交给浏览器线程执行(抢占正在执行的低优先级命令,等当前交易完成),
+        不会和交易命令同时操作 self.driver;恢复本身由浏览器线程触发时该线程正在等待,直接在阶段线程中执行
+        
+        Returns:
+            bool/None: 是否成功;超时后宽限期内阶段线程仍未退出时返回None
+        """
+        result = {'value': False}
+        worker_waiting = self.browser_queue.on_worker_thread()
+        
+        def guarded():
+            # 排队期间阶段已超时则不再执行
+            self._check_recovery_cancelled()
+            return func()
+        
+        def target():
+            try:
+                if worker_waiting:
+                    value = guarded()
+                else:
+                    value = self.browser_queue.run(BrowserCommandQueue.TRADE, 'recover_browser', guarded)
+                result['value'] = value is not False
+            except Exception as e:
+                self.logger.debug(f"恢复动作异常: {str(e)}")
+                result['value'] = False
+        
+        worker = threading.Thread(target=target, daemon=True)
+        self.recovery_stage_thread = worker
+        worker.start()
+        worker.join(timeout=timeout)
+        if worker.is_alive():
+            self.logger.warning(f"❌ 恢复动作超时({timeout}秒),等待其退出")
+            self.recovery_cancel.set()
+            worker.join(timeout=self.recovery_stage_grace)
+            if worker.is_alive():
+                return None
+            self.recovery_cancel.clear()
+            return False
+        return result['value']
+
+    def _check_page_health(self, timeout=5):
+        """检查页面是否恢复: 能读到 Up/Down 价格即视为正常"""
+        end_time = time.time() + timeout
+        while time.time() < end_time:
+            try:
+                up_price, down_price, _, _ = self.get_nearby_cents()
+                if up_price is not None and down_price is not None:
+                    return True
+            except Exception:
+                pass
+            time.sleep(0.5)
+        return False
+
+    def _recover_refind_elements(self):
+        """恢复阶段1: 清空元素缓存并重新查找元素"""
+        self.element_cache.clear()
+        self.frame_cache = {}
+        self.driver.switch_to.default_content()
+        if self.price_driver:
+            self.price_driver.switch_to.default_content()
+        return True
+
+    def _recover_soft_reload(self):
+        """恢复阶段2: 通过CDP Page.reload 软刷新读价和下单标签页"""
+        self.element_cache.clear()
+        self.page_load_started = time.time()
+        for driver in (self.price_driver, self.driver):
+            if not driver:
+                continue
+            driver.execute_cdp_cmd('Page.reload', {'ignoreCache': False})
+            WebDriverWait(driver, 15).until(
+                lambda d: d.execute_script('return document.readyState') == 'complete'
+            )
+        return True
+
+    def _recover_reopen_tab(self):
+        """恢复阶段3: 关闭当前标签页并重新打开目标URL"""
+        self._check_recovery_cancelled()
+        self.element_cache.clear()
+        target_url = self.url_entry.get().strip()
+        old_handle = self.driver.current_window_handle
+        self.tab_manager.release(old_handle)
+        self.driver.switch_to.new_window('tab')
+        new_handle = self.driver.current_window_handle
+        self.tab_manager.register(new_handle, 'trade')
+        self._apply_request_blocking(self.driver)
+        self.page_load_started = time.time()
+        self.driver.get(target_url)
+        WebDriverWait(self.driver, 20).until(
+            lambda driver: driver.execute_script('return document.readyState') == 'complete'
+        )
+        try:
+            self.driver.switch_to.window(old_handle)
+            self.driver.close()
+        except Exception:
+            pass
+        self.driver.switch_to.window(new_handle)
+        self.trade_tab_handle = new_handle
+        self._check_recovery_cancelled()
+        if self.dedicated_price_tab:
+            self._close_price_session(close_tab=True)
+            self._open_price_tab(target_url)
+        return True
+
+    def _recover_reconnect_session(self):
+        """恢复阶段4: 不重启Chrome,只重建WebDriver会话(下单和读价)"""
+        self._check_recovery_cancelled()
+        self.element_cache.clear()
+        self._close_cdp_clients()
+        self._close_price_session()
+        if self.driver:
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+            self.driver = None
+        self._check_recovery_cancelled()
+        if not self._reconnect_browser(max_retries=2):
+            return False
+        self._check_recovery_cancelled()
+        if self.dedicated_price_tab:
+            self._open_price_tab(self.url_entry.get().strip())
+        return True
+
+    def report_latency(self):
+        """每分钟测一次时钟偏差,并把币安事件延迟、页面变化延迟的滚动分位数写入界面和日志"""
+        def sync_and_report():
+            try:
+                measured = self.clock_sync.measure()
+                if measured:
+                    offset_ms, rtt_ms = measured
+                    self.binance_feed.clock_offset_ms = offset_ms
+                    self.metrics.set_gauge('clock.offset_ms', offset_ms)
+                    self.metrics.observe('clock.rtt_ms', rtt_ms)
+                    if abs(offset_ms) > 1000:
+                        self.logger.warning(f"⚠️ 本地时钟与币安相差 \033[31m{offset_ms:.0f}ms\033[0m,请检查NTP同步")
                 
+                parts = []
+                log_parts = []
+                for name, title in (('latency.binance_event_ms', 'BN'), ('latency.polymarket_dom_ms', 'PM')):
+                    stats = self.metrics.summary(name)
+                    if stats:
+                        parts.append(f"{title} {stats['p50']:.0f}/{stats['p99']:.0f}ms")
+                        log_parts.append(f"{title} p50={stats['p50']:.1f} p95={stats['p95']:.1f} p99={stats['p99']:.1f}ms")
+                parts.append(f"Offset {self.clock_sync.offset_ms:+.0f}ms")
+                text = "Latency: " + " | ".join(parts)
+                if log_parts:
+                    self.logger.info(f"⏱️ 行情延迟: {', '.join(log_parts)}, 时钟偏差 {self.clock_sync.offset_ms:+.1f}ms "
+                                     f"(RTT {self.clock_sync.rtt_ms if self.clock_sync.rtt_ms is None else round(self.clock_sync.rtt_ms, 1)}ms)")
+                self.root.after(0, lambda: self.latency_label.config(text=text))
+            except Exception as e:
+                self.logger.warning(f"统计行情延迟失败: {str(e)}")
+        
+        # 网络请求放到后台线程,不阻塞Tk线程
+        threading.Thread(target=sync_and_report, daemon=True).start()
+        if self.running:
+            self.latency_report_timer = self.root.after(60000, self.report_latency)
+
+    def report_metrics(self):
+        """定时把运行指标写入日志"""
+        try:
+            snapshot = self.metrics.snapshot()
+            for name, value in sorted(snapshot['counters'].items()):
+                self.logger.info(f"📊 {name}: {value}")
+            for name, value in sorted(snapshot['gauges'].items()):
+                self.logger.info(f"📊 {name}: {value}")
+            for name, stats in sorted(snapshot['distributions'].items()):
+                if stats:
+                    self.logger.info(f"📊 {name}: count={stats['count']} mean={stats['mean']:.3f} "
+                                     f"p50={stats['p50']:.3f} p95={stats['p95']:.3f} p99={stats['p99']:.3f} "
+                                     f"max={stats['max']:.3f}")
         except Exception as e:
-            pass
+            self.logger.error(f"报告运行指标失败: {str(e)}")
+        finally:
+            # 每10分钟报告一次
+            self.metrics_report_timer = self.root.after(600000, self.report_metrics)
 
     def restart_browser(self, force_restart=True):
         """统一的浏览器重启/重连函数
@@ -1292,22 +4175,16 @@ class CryptoTrader:
                     pass
                 self.driver = None
             
-            # 2. 如果需要强制重启，启动新的Chrome进程
+            # 2. 有热备Chrome时直接切换,不再等待新进程启动
+            if force_restart and self._failover_to_standby_browser():
+                self._restore_monitoring_state()
+                return True
+            
+            # 3. 如果需要强制重启，启动新的Chrome进程
             if force_restart:
                 try:
-                    # 根据操作系统选择启动脚本
-                    script_path = ('start_chrome_macos.sh' if platform.system() == 'Darwin' 
-                                else 'start_chrome_aliyun.sh')
-                    script_path = os.path.abspath(script_path)
-                    
-                    # 检查脚本是否存在
-                    if not os.path.exists(script_path):
-                        raise FileNotFoundError(f"启动脚本不存在: {script_path}")
-                    
                     # 启动Chrome进程（异步）
-                    process = subprocess.Popen(['bash', script_path], 
-                                             stdout=subprocess.PIPE, 
-                                             stderr=subprocess.PIPE)
+                    self._launch_chrome_process(self.debug_port)
                     
                     # 等待Chrome调试端口可用
                     self._wait_for_chrome_port(max_wait_time=30, wait_interval=1)
@@ -1316,7 +4193,7 @@ class CryptoTrader:
                     self.logger.error(f"启动Chrome失败: {e}")
                     return False
             
-            # 3. 重新连接浏览器（带重试机制）
+            # 4. 重新连接浏览器（带重试机制）
             success = self._reconnect_browser(max_retries=3)
             if success:
                 # 连接成功后，重置监控线程
@@ -1332,56 +4209,344 @@ class CryptoTrader:
             with self.restart_lock:
                 self.is_restarting = False
     
-    def _wait_for_chrome_port(self, max_wait_time=30, wait_interval=1):
+    def _launch_chrome_process(self, port):
+        """通过启动脚本在指定调试端口启动Chrome进程(异步)"""
+        # 根据操作系统选择启动脚本
+        if platform.system() == 'Darwin':
+            script_path = 'start_chrome_macos.sh'
+        elif self.headless:
+            script_path = 'start_chrome_headless.sh'
+        else:
+            script_path = 'start_chrome_aliyun.sh'
+        script_path = os.path.abspath(script_path)
+        
+        # 检查脚本是否存在
+        if not os.path.exists(script_path):
+            raise FileNotFoundError(f"启动脚本不存在: {script_path}")
+        
+        # Chrome的输出写入日志文件: 管道没人读,长时间运行后缓冲区写满会阻塞Chrome
+        if not os.path.exists('logs'):
+            os.makedirs('logs')
+        with open(f'logs/chrome_{port}.log', 'ab') as chrome_log:
+            return subprocess.Popen(['bash', script_path, str(port), self._chrome_profile_dir(port)],
+                                    stdout=chrome_log,
+                                    stderr=subprocess.STDOUT)
+
+    def _chrome_profile_dir(self, port):
+        """每个调试端口使用独立的用户目录,9222沿用原来的 ~/ChromeDebug"""
+        if port == 9222:
+            return os.path.expanduser('~/ChromeDebug')
+        return os.path.expanduser(f'~/ChromeDebug_{port}')
+
+    def _kill_chrome_on_port(self, port):
+        """结束占用指定调试端口的Chrome进程"""
+        try:
+            subprocess.run(['pkill', '-f', f'remote-debugging-port={port}'],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=5)
+        except Exception as e:
+            self.logger.debug(f"结束端口{port}的Chrome进程失败: {str(e)}")
+
+    def prepare_standby_browser(self):
+        """在另一个调试端口预启动热备Chrome,同步登录状态并加载当前市场"""
+        if not self.standby_enabled:
+            return False
+        with self.standby_lock:
+            if self.standby_preparing:
+                return False
+            self.standby_preparing = True
+        try:
+            port = self.standby_port
+            self.logger.info(f"🔄 正在准备热备Chrome(端口{port})...")
+            
+            # 端口未就绪时启动新的Chrome进程
+            try:
+                self._wait_for_chrome_port(max_wait_time=1, wait_interval=1, port=port)
+            except Exception:
+                self._kill_chrome_on_port(port)
+                self._launch_chrome_process(port)
+                self._wait_for_chrome_port(max_wait_time=30, wait_interval=1, port=port)
+            
+            standby_driver = webdriver.Chrome(options=self._build_chrome_options(port))
+            self._on_driver_attached(standby_driver)
+            with self.standby_lock:
+                self.standby_driver = standby_driver
+            
+            if not self._sync_standby_once():
+                return False
+            self.logger.info(f"✅ 热备Chrome已就绪(端口{port})")
+            return True
+        except Exception as e:
+            self.logger.error(f"❌ 准备热备Chrome失败: {str(e)}")
+            return False
+        finally:
+            with self.standby_lock:
+                self.standby_preparing = False
+
+    def sync_standby_browser(self):
+        """定时同步热备Chrome(在后台线程中执行,不阻塞GUI)"""
+        try:
+            if self.standby_enabled and not self.is_restarting:
+                if self.standby_driver:
+                    threading.Thread(target=self._sync_standby_once, daemon=True).start()
+                elif not self.standby_preparing and self.driver:
+                    threading.Thread(target=self.prepare_standby_browser, daemon=True).start()
+        finally:
+            # 每60秒同步一次
+            self.standby_sync_timer = self.root.after(60000, self.sync_standby_browser)
+
+    def _sync_standby_once(self):
+        """同步热备Chrome: 复制登录cookie,并保证打开的是当前市场"""
+        standby_driver = self.standby_driver
+        if not standby_driver:
+            return False
+        try:
+            # 复制主浏览器的cookie,保持热备浏览器的登录状态(主浏览器的命令交给浏览器线程执行)
+            if self.driver:
+                cookies = self.browser_queue.run(
+                    BrowserCommandQueue.HEALTH, 'standby_cookies',
+                    lambda: self.driver.execute_cdp_cmd('Network.getAllCookies', {}).get('cookies', []))
+                if cookies:
+                    standby_driver.execute_cdp_cmd('Network.setCookies', {'cookies': cookies})
+            
+            # 保持热备浏览器打开的是当前市场
+            target_url = self.url_entry.get().strip()
+            current_url = standby_driver.current_url
+            if target_url and current_url.split('?')[0].rstrip('/') != target_url.split('?')[0].rstrip('/'):
+                standby_driver.get(target_url)
+                WebDriverWait(standby_driver, 30).until(
+                    lambda d: d.execute_script('return document.readyState') == 'complete'
+                )
+                self.logger.info(f"✅ 热备Chrome已同步到: {target_url}")
+            return True
+        except Exception as e:
+            self.logger.warning(f"❌ 同步热备Chrome失败,将重建热备: {str(e)}")
+            self._discard_standby_browser()
+            return False
+
+    def _discard_standby_browser(self):
+        """丢弃不可用的热备Chrome连接"""
+        with self.standby_lock:
+            standby_driver = self.standby_driver
+            self.standby_driver = None
+        if standby_driver:
+            try:
+                standby_driver.quit()
+            except Exception:
+                pass
+
+    def _failover_to_standby_browser(self):
+        """把driver切换到热备Chrome,并在后台重建新的热备
+        
+        Returns:
+            bool: 是否切换成功
+        """
+        if not self.standby_enabled:
+            return False
+        with self.standby_lock:
+            standby_driver = self.standby_driver
+            self.standby_driver = None
+        if not standby_driver:
+            return False
+        
+        start_time = time.time()
+        try:
+            # 确认热备浏览器可用
+            standby_driver.execute_script("return document.readyState")
+        except Exception as e:
+            self.logger.warning(f"❌ 热备Chrome不可用: {str(e)}")
+            try:
+                standby_driver.quit()
+            except Exception:
+                pass
+            return False
+        
+        # 交换主备端口: 原主端口用于下一个热备
+        failed_port = self.debug_port
+        self.debug_port = self.standby_port
+        self.standby_port = failed_port
+        self.driver = standby_driver
+        self.tab_manager.reset()
+        self.trade_tab_handle = self.tab_manager.adopt(self.driver, 'trade')
+        self.element_cache.clear()
+        self.frame_cache = {}
+        self.logger.info(f"✅ \033[34m已切换到热备Chrome(端口{self.debug_port}),耗时{(time.time() - start_time) * 1000:.0f}毫秒\033[0m")
+        
+        # 后台清理故障Chrome并重建热备
+        def rebuild_standby():
+            self._kill_chrome_on_port(failed_port)
+            self.prepare_standby_browser()
+        threading.Thread(target=rebuild_standby, daemon=True).start()
+        return True
+
+    def _on_driver_attached(self, driver):
+        """WebDriver连接到Chrome后的统一初始化"""
+        self._apply_request_blocking(driver)
+        if self.headless:
+            self._prepare_headless_session(driver)
+
+    def _prepare_headless_session(self, driver):
+        """无头模式: 去掉UA中的HeadlessChrome标识,并导入有界面模式导出的登录cookie"""
+        try:
+            user_agent = driver.execute_script("return navigator.userAgent")
+            if 'HeadlessChrome' in user_agent:
+                driver.execute_cdp_cmd('Network.setUserAgentOverride', {
+                    'userAgent': user_agent.replace('HeadlessChrome', 'Chrome')
+                })
+        except Exception as e:
+            self.logger.warning(f"❌ 设置无头模式UA失败: {str(e)}")
+        self._import_login_cookies(driver)
+
+    def export_login_cookies(self):
+        """导出当前浏览器的登录cookie,供无头模式或热备浏览器导入
+        
+        在浏览器线程中执行;Tk主线程调用时只投递不等待
+        """
+        if not self.browser_queue.on_worker_thread():
+            if threading.current_thread() is threading.main_thread():
+                self.browser_queue.submit(BrowserCommandQueue.HEALTH, 'export_cookies',
+                                          self.export_login_cookies, dedupe=True)
+                return None
+            return self.browser_queue.run(BrowserCommandQueue.HEALTH, 'export_cookies', self.export_login_cookies)
+        try:
+            cookies = self.driver.execute_cdp_cmd('Network.getAllCookies', {}).get('cookies', [])
+            if not cookies:
+                return False
+            with open(self.login_cookies_file, 'w', encoding='utf-8') as f:
+                json.dump(cookies, f, indent=4, ensure_ascii=False)
+            self.last_cookie_export_time = time.time()
+            self.logger.info(f"✅ 已导出{len(cookies)}个登录cookie到 {self.login_cookies_file}")
+            return True
+        except Exception as e:
+            self.logger.warning(f"❌ 导出登录cookie失败: {str(e)}")
+            return False
+
+    def _import_login_cookies(self, driver):
+        """导入登录cookie(跳过已过期的cookie)"""
+        try:
+            if not os.path.exists(self.login_cookies_file):
+                self.logger.warning(f"❌ 登录cookie文件不存在: {self.login_cookies_file}")
+                return False
+            with open(self.login_cookies_file, 'r', encoding='utf-8') as f:
+                cookies = json.load(f)
+            
+            now = time.time()
+            valid_cookies = []
+            for cookie in cookies:
+                # 会话cookie的expires为-1
+                if cookie.get('expires', -1) != -1 and cookie['expires'] < now:
+                    continue
+                # Network.setCookies 不接受 getAllCookies 返回的只读字段
+                valid_cookies.append({key: value for key, value in cookie.items()
+                                      if key not in ('size', 'session', 'priority', 'sameParty', 'sourceScheme', 'sourcePort')})
+            if not valid_cookies:
+                self.logger.warning("❌ 登录cookie已全部过期,请在有界面模式下重新登录")
+                return False
+            driver.execute_cdp_cmd('Network.setCookies', {'cookies': valid_cookies})
+            self.logger.info(f"✅ 已导入{len(valid_cookies)}个登录cookie")
+            return True
+        except Exception as e:
+            self.logger.warning(f"❌ 导入登录cookie失败: {str(e)}")
+            return False
+
+    def capture_screenshot(self, event=None):
+        """通过CDP截取当前页面,用于无头模式下按需查看页面
+        
+        在浏览器线程中执行;Tk主线程调用时只投递不等待,其它线程(如SIGUSR1)等待截图完成
+        """
+        if not self.browser_queue.on_worker_thread():
+            if threading.current_thread() is threading.main_thread():
+                self.browser_queue.submit(BrowserCommandQueue.HEALTH, 'capture_screenshot',
+                                          self.capture_screenshot, dedupe=True)
+                return None
+            return self.browser_queue.run(BrowserCommandQueue.HEALTH, 'capture_screenshot', self.capture_screenshot)
+        try:
+            if not self.driver:
+                self.logger.warning("浏览器未启动，无法截图")
+                return None
+            result = self.driver.execute_cdp_cmd('Page.captureScreenshot', {'format': 'png'})
+            if not os.path.exists('screenshots'):
+                os.makedirs('screenshots')
+            file_path = f"screenshots/{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
+            with open(file_path, 'wb') as f:
+                f.write(base64.b64decode(result['data']))
+            self.logger.info(f"✅ 页面截图已保存: {file_path}")
+            return file_path
+        except Exception as e:
+            self.logger.error(f"❌ 页面截图失败: {str(e)}")
+            return None
+
+    def _apply_request_blocking(self, driver):
+        """给当前标签页设置请求屏蔽,只保留盘口、下单和持仓需要的资源"""
+        if not self.block_requests:
+            return False
+        try:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URL_PATTERNS})
+            self.logger.info(f"✅ 已启用请求屏蔽({len(BLOCKED_URL_PATTERNS)}条规则)")
+            return True
+        except Exception as e:
+            self.logger.warning(f"❌ 启用请求屏蔽失败: {str(e)}")
+            return False
+
+    def _build_chrome_options(self, port):
+        """创建连接到指定调试端口的Chrome配置"""
+        chrome_options = Options()
+        chrome_options.debugger_address = f"127.0.0.1:{port}"
+        chrome_options.add_argument('--disable-dev-shm-usage')
+        
+        # Linux特定配置
+        if platform.system() == 'Linux':
+            # 添加Linux系统下的优化参数
+            chrome_options.add_argument('--no-sandbox')
+            chrome_options.add_argument('--disable-gpu')
+            chrome_options.add_argument('--disable-software-rasterizer')
+            chrome_options.add_argument('--disable-background-networking')
+            chrome_options.add_argument('--disable-default-apps')
+            chrome_options.add_argument('--disable-extensions')
+            chrome_options.add_argument('--disable-sync')
+            chrome_options.add_argument('--metrics-recording-only')
+            chrome_options.add_argument('--no-first-run')
+            chrome_options.add_argument('--disable-translate')
+            chrome_options.add_argument('--disable-background-timer-throttling')
+            chrome_options.add_argument('--disable-backgrounding-occluded-windows')
+            chrome_options.add_argument('--disable-renderer-backgrounding')
+            chrome_options.add_argument('--disable-features=TranslateUI,BlinkGenPropertyTrees,SitePerProcess,IsolateOrigins')
+            chrome_options.add_argument('--noerrdialogs')
+        return chrome_options
+
+    def _wait_for_chrome_port(self, max_wait_time=30, wait_interval=1, port=None):
         """等待Chrome调试端口可用"""
+        port = port or self.debug_port
         for wait_time in range(0, max_wait_time, wait_interval):
             time.sleep(wait_interval)
             try:
                 # 检查调试端口是否可用
                 import requests
-                response = requests.get('http://127.0.0.1:9222/json', timeout=2)
+                response = requests.get(f'http://127.0.0.1:{port}/json', timeout=2)
                 if response.status_code == 200:
-                    self.logger.info(f"✅ Chrome浏览器已重新启动,调试端口可用,等待{wait_time+1}秒")
+                    self.logger.info(f"✅ Chrome浏览器已重新启动,调试端口{port}可用,等待{wait_time+1}秒")
                     return True
             except:
                 continue
-        raise Exception("Chrome调试端口在30秒内未能启动")
+        raise Exception(f"Chrome调试端口{port}在{max_wait_time}秒内未能启动")
         
     def _reconnect_browser(self, max_retries=3):
         """尝试重新连接到浏览器实例"""
         for attempt in range(max_retries):
             try:
-                chrome_options = Options()
-                chrome_options.debugger_address = "127.0.0.1:9222"
-                chrome_options.add_argument('--disable-dev-shm-usage')
-                
-                # Linux特定配置
-                if platform.system() == 'Linux':
-                    # 添加Linux系统下的优化参数
-                    chrome_options.add_argument('--no-sandbox')
-                    chrome_options.add_argument('--disable-gpu')
-                    chrome_options.add_argument('--disable-software-rasterizer')
-                    chrome_options.add_argument('--disable-background-networking')
-                    chrome_options.add_argument('--disable-default-apps')
-                    chrome_options.add_argument('--disable-extensions')
-                    chrome_options.add_argument('--disable-sync')
-                    chrome_options.add_argument('--metrics-recording-only')
-                    chrome_options.add_argument('--no-first-run')
-                    chrome_options.add_argument('--disable-translate')
-                    chrome_options.add_argument('--disable-background-timer-throttling')
-                    chrome_options.add_argument('--disable-backgrounding-occluded-windows')
-                    chrome_options.add_argument('--disable-renderer-backgrounding')
-                    chrome_options.add_argument('--disable-features=TranslateUI,BlinkGenPropertyTrees,SitePerProcess,IsolateOrigins')
-                    chrome_options.add_argument('--noerrdialogs')
+                chrome_options = self._build_chrome_options(self.debug_port)
                 
                 self.driver = webdriver.Chrome(options=chrome_options)
                 
                 # 验证连接
                 self.driver.execute_script("return navigator.userAgent")
+                self._on_driver_attached(self.driver)
+                self.trade_tab_handle = self.tab_manager.adopt(self.driver, 'trade')
                 
                 # 加载目标URL
                 target_url = self.url_entry.get().strip()
                 if target_url:
+                    self.page_load_started = time.time()
                     self.driver.get(target_url)
                     WebDriverWait(self.driver, 15).until(
                         lambda d: d.execute_script('return document.readyState') == 'complete'
@@ -1407,6 +4572,12 @@ class CryptoTrader:
             
             # 确保运行状态正确
             self.running = True
+            self._close_cdp_clients()
+            
+            # 读价会话连接的是旧的Chrome,重建到当前Chrome
+            self._discard_next_market()
+            if self.dedicated_price_tab and self.driver:
+                self._open_price_tab(self.url_entry.get().strip())
             
             # 定义监控定时器重置函数
             def reset_timer(timer_attr, start_func):
@@ -1421,7 +4592,8 @@ class CryptoTrader:
                 ('refresh_page_timer', self.enable_refresh_page),
                 ('monitor_xpath_timer', self.monitor_xpath_elements),
                 ('comparison_binance_price_timer', self.comparison_binance_price),
-                ('schedule_auto_find_coin_timer', self.schedule_auto_find_coin)
+                ('schedule_auto_find_coin_timer', self.schedule_auto_find_coin),
+                ('tab_manage_timer', self.manage_tabs)
             ]
             
             # 重置各监控定时器
@@ -1431,20 +4603,15 @@ class CryptoTrader:
             # 智能恢复时间敏感类定时器
             current_time = datetime.now()
             
-            # 1. 计算到下一个零点的时间差
-            next_zero_time = current_time.replace(hour=0, minute=0, second=0, microsecond=0)
-            if current_time >= next_zero_time:
-                next_zero_time += timedelta(days=1)
+            # 1. 零点价格定时器: 已在运行则保留,否则按北京时间零点后2秒重排(替换而不是叠加)
+            zero_price_timer = self.binance_zero_price_timer
+            if not (zero_price_timer and zero_price_timer.is_alive()):
+                seconds_until_next_run = self._seconds_until_zero_time_price()
+                self.schedule_binance_zero_time_price(seconds_until_next_run)
+                self.logger.info(f"✅ 恢复零点价格定时器，{round(seconds_until_next_run / 3600, 2)} 小时后执行")
             
-            seconds_until_next_run = int((next_zero_time - current_time).total_seconds() * 1000)  # 转换为毫秒
-            
-            # 只在合理的时间范围内恢复零点价格定时器
-            if seconds_until_next_run > 0:
-                self.get_binance_zero_time_price_timer = self.root.after(
-                    seconds_until_next_run, 
-                    self.get_binance_zero_time_price
-                )
-                self.logger.info(f"✅ 恢复零点价格定时器，{round(seconds_until_next_run / 3600000, 2)} 小时后执行")
+            # 重启后当日参考价从本地K线立即恢复,不用等到下一个零点
+            threading.Thread(target=self.backfill_klines, daemon=True).start()
             
             # 2. 计算到23:59:30的时间差（零点现金监控）
             next_cash_time = current_time.replace(hour=23, minute=59, second=30, microsecond=0)
@@ -1821,7 +4988,7 @@ class CryptoTrader:
         """
         try:
             if not self.driver and not self.is_restarting:
-                self.restart_browser(force_restart=True)
+                self.recover_browser("浏览器未连接")
               
             if asks_price_raw is None or bids_price_raw is None or bids_price_raw <= 10:
                 return
@@ -1901,7 +5068,7 @@ class CryptoTrader:
         """
         try:
             if not self.driver and not self.is_restarting:
-                self.restart_browser(force_restart=True)
+                self.recover_browser("浏览器未连接")
             
             if asks_price_raw is None or asks_price_raw >= 90 or bids_price_raw is None:
                 return
@@ -1977,6 +5144,9 @@ class CryptoTrader:
         Args:
             retry_count: 最大重试次数
         """
+        # 交易命令交给浏览器线程以最高优先级执行
+        if not self.browser_queue.on_worker_thread():
+            return self.browser_queue.run(BrowserCommandQueue.TRADE, 'only_sell_yes', lambda: self.only_sell_yes(retry_count))
         self.logger.info("✅ 执行only_sell_yes")
 
         # 交易前禁用页面刷新
@@ -1985,9 +5155,9 @@ class CryptoTrader:
 
         try:
             # 调用卖出按钮
-            self.position_sell_yes_button.invoke()
+            self.click_position_sell_yes()
             time.sleep(0.5)  # 必要的延迟，确保按钮点击生效
-            self.sell_confirm_button.invoke()
+            self.click_sell_confirm_button()
             
             # 等待交易完成
             time.sleep(2)
@@ -2039,6 +5209,9 @@ class CryptoTrader:
         Args:
             retry_count: 最大重试次数
         """
+        # 交易命令交给浏览器线程以最高优先级执行
+        if not self.browser_queue.on_worker_thread():
+            return self.browser_queue.run(BrowserCommandQueue.TRADE, 'only_sell_no', lambda: self.only_sell_no(retry_count))
         self.logger.info("✅ 执行only_sell_no")
         
         # 交易前禁用页面刷新
@@ -2047,9 +5220,9 @@ class CryptoTrader:
         
         try:
             # 调用卖出按钮
-            self.position_sell_no_button.invoke()
+            self.click_position_sell_no()
             time.sleep(0.5)  # 必要的延迟，确保按钮点击生效
-            self.sell_confirm_button.invoke()
+            self.click_sell_confirm_button()
             
             # 等待交易完成
             time.sleep(2)
@@ -2101,6 +5274,9 @@ class CryptoTrader:
         Args:
             retry_count: 最大重试次数
         """
+        # 交易命令交给浏览器线程以最高优先级执行
+        if not self.browser_queue.on_worker_thread():
+            return self.browser_queue.run(BrowserCommandQueue.TRADE, 'only_sell_yes3', lambda: self.only_sell_yes3(retry_count))
         # 交易前禁用页面刷新
         original_refresh_disabled = getattr(self, 'refresh_page_disabled', False)
         self.stop_refresh_page(should_reset=True)
@@ -2112,7 +5288,7 @@ class CryptoTrader:
             yes3_shares = self.buy_yes3_amount / (self.default_target_price / 100)
             
             # 点击卖出按钮
-            self.position_sell_yes_button.invoke()
+            self.click_position_sell_yes()
             time.sleep(0.5)  # 必要的延迟，确保按钮点击生效
 
             # 找到shares输入框并设置数量
@@ -2131,7 +5307,7 @@ class CryptoTrader:
             time.sleep(0.5)  # 必要的延迟，确保输入操作完成
             
             # 点击确认按钮
-            self.sell_confirm_button.invoke()
+            self.click_sell_confirm_button()
             
             # 等待交易完成
             time.sleep(2)
@@ -2189,6 +5365,9 @@ class CryptoTrader:
         Args:
             retry_count: 最大重试次数
         """
+        # 交易命令交给浏览器线程以最高优先级执行
+        if not self.browser_queue.on_worker_thread():
+            return self.browser_queue.run(BrowserCommandQueue.TRADE, 'only_sell_no3', lambda: self.only_sell_no3(retry_count))
         # 交易前禁用页面刷新
         original_refresh_disabled = getattr(self, 'refresh_page_disabled', False)
         self.stop_refresh_page(should_reset=True)
@@ -2200,7 +5379,7 @@ class CryptoTrader:
             no3_shares = self.buy_no3_amount / (self.default_target_price / 100)
             
             # 点击卖出按钮
-            self.position_sell_no_button.invoke()
+            self.click_position_sell_no()
             time.sleep(0.5)  # 必要的延迟，确保按钮点击生效
             
             # 找到shares输入框并设置数量
@@ -2219,7 +5398,7 @@ class CryptoTrader:
             time.sleep(0.5)  # 必要的延迟，确保输入操作完成
             
             # 点击确认按钮
-            self.sell_confirm_button.invoke()
+            self.click_sell_confirm_button()
             
             # 等待交易完成
             time.sleep(2)
@@ -2325,13 +5504,14 @@ class CryptoTrader:
             end_time = time.time() + max_wait_time
             
             while time.time() < end_time:
-                # 等待历史记录元素出现
-                history_element = self._wait_for_element(XPathConfig.HISTORY, timeout=2)
-                self.logger.info(f"尝试获取历史记录元素...")
+                # 优先通过CDP直连读取历史记录,否则等待历史记录元素出现
+                history_text = self._cdp_read_text(XPathConfig.HISTORY)
+                if history_text is None:
+                    history_element = self._wait_for_element(XPathConfig.HISTORY, timeout=2)
+                    self.logger.info(f"尝试获取历史记录元素...")
+                    history_text = history_element.text if history_element else None
                 
-                if history_element:
-                    # 获取历史记录文本
-                    history_text = history_element.text
+                if history_text:
                     self.logger.info(f"历史记录文本: {history_text}")
                     
                     # 构建更灵活的匹配模式: "Bought xxx Down at" 或 "Sold xxx Down at"
@@ -2468,6 +5648,11 @@ class CryptoTrader:
         Returns:
             bool: 交易是否成功
         """
+        # 交易命令交给浏览器线程以最高优先级执行
+        if not self.browser_queue.on_worker_thread():
+            # 命令名区分方向和档位,同一笔买入不会重复入队
+            direction = 'yes' if is_yes_direction else 'no'
+            return self.browser_queue.run(BrowserCommandQueue.TRADE, f'buy_{direction}{trade_num}', lambda: self._execute_buy_trade(is_yes_direction, trade_num, retry_count))
         try:
             # 交易前禁用页面刷新
             original_refresh_disabled = getattr(self, 'refresh_page_disabled', False)
@@ -2475,21 +5660,21 @@ class CryptoTrader:
             
             # 获取对应的按钮
             if is_yes_direction:
-                self.buy_yes_button.invoke()
+                self.click_buy_yes()
                 time.sleep(0.5)  # 必要的延迟，确保按钮点击生效
                 amount_button = getattr(self, f'amount_yes{trade_num}_button')
-                amount_button.event_generate('<Button-1>')
+                self.click_amount(SimpleNamespace(widget=amount_button))
             else:
-                self.buy_no_button.invoke()
+                self.click_buy_no()
                 time.sleep(0.5)  # 必要的延迟，确保按钮点击生效
                 amount_button = getattr(self, f'amount_no{trade_num}_button')
-                amount_button.event_generate('<Button-1>')
+                self.click_amount(SimpleNamespace(widget=amount_button))
             
             # 必要的延迟，确保金额选择生效
             time.sleep(0.5)
             
             # 点击确认按钮
-            self.buy_confirm_button.invoke()
+            self.click_buy_confirm_button()
             
             # 等待交易完成
             time.sleep(2)  # 必要的延迟，等待交易完成
@@ -2523,6 +5708,9 @@ class CryptoTrader:
             return False
     
     def click_buy_confirm_button(self):
+        # 优先通过CDP直连点击
+        if self._cdp_click(XPathConfig.BUY_CONFIRM_BUTTON):
+            return
         try:
             buy_confirm_button = self.driver.find_element(By.XPATH, XPathConfig.BUY_CONFIRM_BUTTON[0])
             buy_confirm_button.click()
@@ -2539,7 +5727,7 @@ class CryptoTrader:
         """点击 Positions-Sell-No 按钮"""
         try:
             if not self.driver and not self.is_restarting:
-                self.restart_browser(force_restart=True)
+                self.recover_browser("浏览器未连接")
 
             # 等待页面加载完成
             WebDriverWait(self.driver, 10).until(
@@ -2581,7 +5769,7 @@ class CryptoTrader:
         """点击 Positions-Sell-Yes 按钮"""
         try:
             if not self.driver and not self.is_restarting:
-                self.restart_browser(force_restart=True)
+                self.recover_browser("浏览器未连接")
 
             # 等待页面加载完成
             WebDriverWait(self.driver, 10).until(
@@ -2624,7 +5812,7 @@ class CryptoTrader:
         """点击sell-卖出按钮"""
         try:
             if not self.driver and not self.is_restarting:
-                self.restart_browser(force_restart=True)
+                self.recover_browser("浏览器未连接")
             # 点击Sell-卖出按钮
             try:
                 sell_confirm_button = self.driver.find_element(By.XPATH, XPathConfig.SELL_CONFIRM_BUTTON[0])
@@ -2640,10 +5828,22 @@ class CryptoTrader:
             error_msg = f"卖出操作失败: {str(e)}"
             self.logger.error(error_msg)
 
+    def _queued_click(self, name, func):
+        """界面交易按钮的回调: 点击时把浏览器操作以交易优先级投递到命令队列,Tk线程不等待
+        
+        交易流程在浏览器线程中直接调用 click_* 方法,不经过按钮
+        """
+        def handler(event=None):
+            if event is None:
+                self.browser_queue.submit(BrowserCommandQueue.TRADE, name, func, dedupe=True)
+            else:
+                self.browser_queue.submit(BrowserCommandQueue.TRADE, name, lambda: func(event), dedupe=True)
+        return handler
+
     def click_buy(self):
         try:
             if not self.driver and not self.is_restarting:
-                self.restart_browser(force_restart=True)
+                self.recover_browser("浏览器未连接")
             try:
                 button = self.driver.find_element(By.XPATH, XPathConfig.BUY_BUTTON[0])
             except NoSuchElementException:
@@ -2661,7 +5861,7 @@ class CryptoTrader:
         """点击 Buy-Yes 按钮"""
         try:
             if not self.driver and not self.is_restarting:
-                self.restart_browser(force_restart=True)
+                self.recover_browser("浏览器未连接")
             
             try:
                 button = self.driver.find_element(By.XPATH, XPathConfig.BUY_YES_BUTTON[0])
@@ -2680,7 +5880,7 @@ class CryptoTrader:
         """点击 Buy-No 按钮"""
         try:
             if not self.driver and not self.is_restarting:
-                self.restart_browser(force_restart=True)
+                self.recover_browser("浏览器未连接")
             try:
                 button = self.driver.find_element(By.XPATH, XPathConfig.BUY_NO_BUTTON[0])
             except NoSuchElementException:
@@ -2698,24 +5898,12 @@ class CryptoTrader:
         """点击 Amount 按钮并输入数量"""
         try:
             if not self.driver and not self.is_restarting:
-                self.restart_browser(force_restart=True)
+                self.recover_browser("浏览器未连接")
             
             # 获取触发事件的按钮
             button = event.widget if event else self.amount_button
             button_text = button.cget("text")
 
-            # 找到输入框
-            try:
-                amount_input = self.driver.find_element(By.XPATH, XPathConfig.AMOUNT_INPUT[0])
-            except NoSuchElementException:
-                amount_input = self._find_element_with_retry(
-                    XPathConfig.AMOUNT_INPUT,
-                    timeout=3,
-                    silent=True
-                )
-
-            # 清空输入框
-            amount_input.clear()
             # 根据按钮文本获取对应的金额
             if button_text == "Amount-Y1":
                 amount = self.yes1_amount_entry.get()
@@ -2745,6 +5933,23 @@ class CryptoTrader:
                 amount = no4_amount_entry.get()
             else:
                 amount = "0"
+            
+            # 优先通过CDP直连赋值
+            if self._cdp_set_input(XPathConfig.AMOUNT_INPUT, amount):
+                return
+            
+            # 找到输入框
+            try:
+                amount_input = self.driver.find_element(By.XPATH, XPathConfig.AMOUNT_INPUT[0])
+            except NoSuchElementException:
+                amount_input = self._find_element_with_retry(
+                    XPathConfig.AMOUNT_INPUT,
+                    timeout=3,
+                    silent=True
+                )
+
+            # 清空输入框
+            amount_input.clear()
             # 输入金额
             amount_input.send_keys(str(amount))
               
@@ -2815,7 +6020,7 @@ class CryptoTrader:
         for attempt in range(max_retries):
             try:
                 if not self.driver and not self.is_restarting:
-                    self.restart_browser(force_restart=True)
+                    self.recover_browser("浏览器未连接")
                     
                 # 等待页面加载完成
                 WebDriverWait(self.driver, 10).until(
@@ -2858,7 +6063,7 @@ class CryptoTrader:
         for attempt in range(max_retries):
             try:
                 if not self.driver and not self.is_restarting:
-                    self.restart_browser(force_restart=True)
+                    self.recover_browser("浏览器未连接")
                     
                 # 等待页面加载完成
                 WebDriverWait(self.driver, 10).until(
@@ -2905,20 +6110,28 @@ class CryptoTrader:
             # 设置搜索关键词
             coins = [coin_type]
             for coin in coins:
+                new_url = None
                 try:  # 为每个币种添加单独的异常处理 
-                    new_url = self.find_new_weekly_url(coin)
+                    # 优先使用预解析缓存和市场接口,失败时才打开搜索页
+                    new_url = self._resolve_market_url(coin)
+                    if not new_url:
+                        new_url = self.find_new_weekly_url(coin)
 
                     def save_new_url(new_url):
                         if new_url:
+                            # 预热的标签页先提升为读价标签页,再更新URL输入框;
+                            # 两步在同一把锁内完成,读价线程不会在中间按旧URL跳转
+                            with self.price_session_lock:
+                                self._promote_next_market(new_url)
+                                # 清除url_entry中的url
+                                self.url_entry.delete(0, tk.END)
+                                # 把新url放到self.url_entry中
+                                self.url_entry.insert(0, new_url)
+                            # 下单标签页再跳转
                             self.driver.get(new_url)
                             # 保存当前 URL 到 config
                             self.config['website']['url'] = new_url
                             self.save_config()
-                            
-                            # 清除url_entry中的url
-                            self.url_entry.delete(0, tk.END)
-                            # 把保存到config的url放到self.url_entry中
-                            self.url_entry.insert(0, new_url)
 
                             # 获取trader_pair,用于显示在主界面上
                             pair = re.search(r'event/([^?]+)', new_url)
@@ -2937,8 +6150,41 @@ class CryptoTrader:
             self.logger.error(f"自动找币异常: {str(e)}")
             self.find_54_coin(coin_type)
 
+    def _resolve_market_url(self, coin):
+        """通过缓存或市场接口解析今天的市场URL,失败返回None"""
+        try:
+            start_time = time.time()
+            new_url = self.market_discovery.resolve(coin, datetime.now())
+            if new_url:
+                self.metrics.observe('discovery.resolve_seconds', time.time() - start_time)
+                self.logger.info(f"✅ \033[34m市场接口解析到 {coin} 今日市场: {new_url}\033[0m")
+            else:
+                self.metrics.incr('discovery.fallback_search')
+                self.logger.warning(f"❌ 市场接口未找到 {coin} 今日市场,改用页面搜索")
+            return new_url
+        except Exception as e:
+            self.metrics.incr('discovery.fallback_search')
+            self.logger.warning(f"❌ 市场接口解析失败,改用页面搜索: {str(e)}")
+            return None
+
+    def schedule_market_prefetch(self):
+        """定时预解析今天和明天所有币种的市场,保证03:30换日时只需查缓存"""
+        def prefetch():
+            try:
+                self.market_discovery.prefetch(list(COIN_SEARCH_TEXT), days_ahead=1)
+            except Exception as e:
+                self.logger.error(f"预解析市场失败: {str(e)}")
+        
+        # 网络请求放到后台线程,不阻塞Tk线程
+        threading.Thread(target=prefetch, daemon=True).start()
+        if self.market_prefetch_timer:
+            self.root.after_cancel(self.market_prefetch_timer)
+        self.market_prefetch_timer = self.root.after(self.market_prefetch_interval, self.schedule_market_prefetch)
+
     def find_new_weekly_url(self, coin):
         """在Polymarket市场搜索指定币种的周合约地址,只返回URL"""
+        # 找币过程中会切换标签页,CDP直连需重新定位下单标签页
+        self.trade_tab_handle = None
         try:
             if self.trading:
                 return
@@ -2947,11 +6193,9 @@ class CryptoTrader:
             original_tab = self.driver.current_window_handle
             
             base_url = "https://polymarket.com/markets/crypto?_s=start_date%3Adesc"
-            self.driver.switch_to.new_window('tab')
-            self.driver.get(base_url)
-
-            # 定义search_tab变量，保存搜索标签页的句柄
-            search_tab = self.driver.current_window_handle
+            
+            # 定义search_tab变量，保存搜索标签页的句柄(discovery角色,找币结束后释放)
+            search_tab = self.tab_manager.acquire(self.driver, 'discovery', base_url)
 
             # 等待页面加载完成
             WebDriverWait(self.driver, 20).until(
@@ -2960,14 +6204,7 @@ class CryptoTrader:
             time.sleep(2)  # 等待页面渲染完成
             
             # 设置搜索关键词
-            if coin == 'BTC':
-                search_text = 'Bitcoin Up or Down on'
-            elif coin == 'ETH':
-                search_text = 'Ethereum Up or Down on'
-            elif coin == 'SOL':
-                search_text = 'Solana Up or Down on'
-            elif coin == 'XRP':
-                search_text = 'XRP Up or Down on'
+            search_text = COIN_SEARCH_TEXT[coin]
             
             try:
                 # 使用确定的XPath查找搜索框
@@ -2993,18 +6230,19 @@ class CryptoTrader:
                 actions.send_keys(Keys.RETURN).perform()
                 time.sleep(2)  # 等待搜索结果加载
                 
+                handles_before_click = set(self.driver.window_handles)
                 self.click_today_card()
                 
                 # 切换到新标签页获取完整URL
                 time.sleep(2)  
         
-                # 获取所有窗口句柄
-                all_handles = self.driver.window_handles
+                # 只看点击后新出现的标签页(读价标签页等也在 window_handles 中)
+                new_handles = [handle for handle in self.driver.window_handles if handle not in handles_before_click]
                 
                 # 切换到最新打开的标签页
-                if len(all_handles) > 2:  # 原始窗口 + 搜索标签页 + coin标签页
-                    
-                    self.driver.switch_to.window(all_handles[-1])
+                if new_handles:
+                    self.tab_manager.register(new_handles[-1], 'discovery')
+                    self.driver.switch_to.window(new_handles[-1])
                     WebDriverWait(self.driver, 20).until(EC.url_contains('/event/'))
                     
                     # 获取当前URL
@@ -3030,6 +6268,7 @@ class CryptoTrader:
                         self.logger.info(f"✅ {new_url}:已插入到主界面上")
 
                         target_url_window = self.driver.current_window_handle
+                        self.tab_manager.register(target_url_window, 'trade')
                         time.sleep(2)
 
                         # 关闭原始和搜索窗口
@@ -3074,6 +6313,9 @@ class CryptoTrader:
             
         except Exception as e:
             self.logger.error(f"操作失败: {str(e)}")
+        finally:
+            # 找币用过的标签页不再保留
+            self.tab_manager.release_role('discovery')
 
     def click_today_card(self):
         """使用Command/Ctrl+Click点击包含今天日期的卡片,打开新标签页"""
@@ -3245,14 +6487,20 @@ class CryptoTrader:
 
     def get_zero_time_cash(self):
         """获取币安实时价格,并在中国时区00:00触发"""
+        # 由Tk定时器触发时转到后台线程,避免主线程等待浏览器命令队列
+        if threading.current_thread() is threading.main_thread():
+            threading.Thread(target=self.get_zero_time_cash, daemon=True).start()
+            return
         try:
-            # 零点获取 CASH 的值
-            try:
-                cash_element = self.driver.find_element(By.XPATH, XPathConfig.CASH_VALUE[0])
-                cash_value = cash_element.text
-            except NoSuchElementException:
-                cash_element = self._find_element_with_retry(XPathConfig.CASH_VALUE, timeout=3, silent=True)
-                cash_value = cash_element.text
+            # 零点获取 CASH 的值(通过浏览器命令队列读取)
+            def read_cash():
+                try:
+                    cash_element = self.driver.find_element(By.XPATH, XPathConfig.CASH_VALUE[0])
+                    return cash_element.text
+                except NoSuchElementException:
+                    cash_element = self._find_element_with_retry(XPathConfig.CASH_VALUE, timeout=3, silent=True)
+                    return cash_element.text
+            cash_value = self.browser_queue.run(BrowserCommandQueue.PRICE, 'zero_time_cash', read_cash)
             
             # 使用正则表达式提取数字
             cash_match = re.search(r'\$?([\d,]+\.?\d*)', cash_value)
@@ -3288,11 +6536,16 @@ class CryptoTrader:
                 self.logger.info(f"✅ \033[34m{round(seconds_until_midnight / 3600,2)}\033[0m小时后再次获取 \033[34mCASH\033[0m 值")
     
     def get_binance_zero_time_price(self):
-        """获取币安BTC实时价格,并在中国时区00:00触发。此方法在threading.Timer的线程中执行。"""
+        """获取币安零点价格,并在中国时区00:00后触发。此方法在threading.Timer的线程中执行。
+        
+        优先从 aggTrade 缓冲区回溯北京时间 00:00:00.000 的成交价,缓冲区未覆盖零点时(如盘中启动)
+        使用零点那一分钟K线的开盘价,都取不到时才使用最新价格
+        """
         api_data = None
         coin_form_websocket = ""
         max_retries = 10 # 最多重试次数
-        retry_delay = 2  # 重试间隔（秒）
+        midnight = datetime.now(CHINA_TZ).replace(hour=0, minute=0, second=0, microsecond=0)
+        midnight_ms = int(midnight.timestamp() * 1000)
 
         for attempt in range(max_retries):
             try:
@@ -3300,38 +6553,19 @@ class CryptoTrader:
                 selected_coin = self.coin_combobox.get() 
                 coin_form_websocket = selected_coin + 'USDT'
 
-                # --- 新增 websocket 获取价格逻辑 ---
-                ws_url = f"wss://stream.binance.com:9443/ws/{coin_form_websocket.lower()}@ticker"
-                price_holder = {'price': None}
-                ws_error = {'error': None}
-
-                def on_message(ws, message):
-                    try:
-                        data = json.loads(message)
-                        price = round(float(data['c']), 3)
-                        price_holder['price'] = price
-                        ws.close()  # 收到一次价格后立即关闭连接
-                    except Exception as e:
-                        ws_error['error'] = e
-                        ws.close()
-                def on_error(ws, error):
-                    ws_error['error'] = error
-                    ws.close()
-                def on_close(ws, close_status_code, close_msg):
-                    pass
-                # 获取币安价格
-                ws = websocket.WebSocketApp(ws_url, on_message=on_message, on_error=on_error, on_close=on_close)
-                ws_thread = threading.Thread(target=ws.run_forever)
-                ws_thread.start()
-                
-                # 等待 websocket 获取到价格或超时
-                ws_thread.join(timeout=5)
-                if ws_error['error']:
-                    raise Exception(ws_error['error'])
-                if price_holder['price'] is None:
-                    raise Exception("WebSocket 未能获取到价格")
-                price = price_holder['price']
-                # --- websocket 获取价格逻辑结束 ---
+                # 2. 从成交缓冲区回溯零点价格,否则读取共用行情连接缓存中的最新价格
+                self.binance_feed.start()
+                price = self.binance_feed.price_at(coin_form_websocket, midnight_ms,
+                                                   timeout=5 if time.time() * 1000 - midnight_ms < 60000 else 0)
+                if price is not None:
+                    self.logger.info(f"✅ 从成交缓冲区回溯到 {midnight.strftime('%Y-%m-%d %H:%M:%S.000')} 的成交价")
+                else:
+                    price = self._kline_zero_time_price(coin_form_websocket, midnight_ms)
+                if price is None:
+                    price = self.binance_feed.wait_for_price(coin_form_websocket, timeout=5)
+                if price is None:
+                    raise Exception("行情缓存中没有最新价格")
+                price = round(price, 3)
 
                 api_data = {"price": price, "coin": coin_form_websocket, "original_selected_coin": selected_coin}
                 self.logger.info(f"✅ ({attempt + 1}/{max_retries}) 成功获取到币安 \033[34m{api_data['coin']}\033[0m 价格: \033[34m{api_data['price']}\033[0m")
@@ -3341,7 +6575,8 @@ class CryptoTrader:
             except Exception as e:
                 self.logger.warning(f"❌ (尝试 {attempt + 1}/{max_retries}) 获取币安 \033[34m{coin_form_websocket}\033[0m 价格时发生错误: {e}")
                 if attempt < max_retries - 1: # 如果不是最后一次尝试
-                    self.logger.info(f"等待 {retry_delay} 秒后重试...")
+                    retry_delay = backoff_delay(attempt, base=1.0, cap=30.0)  # 指数退避加抖动
+                    self.logger.info(f"等待 {retry_delay:.1f} 秒后重试...")
                     time.sleep(retry_delay) # 等待后重试
                 else: # 最后一次尝试仍然失败
                     self.logger.error(f"❌ 获取币安 \033[34m{coin_form_websocket}\033[0m 价格失败，已达到最大重试次数 ({max_retries})。")
@@ -3351,6 +6586,8 @@ class CryptoTrader:
             def update_gui():
                 try:
                     # 获取到币安价格,并更新到GUI
+                    if api_data["price"] != getattr(self, 'zero_time_price', None):
+                        self.lead_lag.clear()   # 涨跌幅基准变了,旧样本不再可比
                     self.zero_time_price = api_data["price"]
                     self.binance_zero_price_label.config(text=f"{self.zero_time_price}")
                 except Exception as e_gui:
@@ -3358,79 +6595,135 @@ class CryptoTrader:
             
             self.root.after(0, update_gui)
 
-        # 设置定时器,每天00:00获取一次币安价格
-        now = datetime.now()
-        next_run_time = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        if now >= next_run_time:
-            next_run_time += timedelta(days=1)
-
-        seconds_until_next_run = (next_run_time - now).total_seconds()
-
-        if hasattr(self, 'binance_zero_price_timer_thread') and self.binance_zero_price_timer and self.binance_zero_price_timer.is_alive():
-            self.binance_zero_price_timer.cancel()
-
+        # 设置定时器,每天北京时间00:00过后2秒回溯一次零点价格,定时器误差不影响取到的价格
         if self.running and not self.stop_event.is_set():
+            seconds_until_next_run = self._seconds_until_zero_time_price()
             coin_for_next_log = self.coin_combobox.get() + 'USDT'
-            self.binance_zero_price_timer = threading.Timer(seconds_until_next_run, self.get_binance_zero_time_price)
+            self.schedule_binance_zero_time_price(seconds_until_next_run)
+            self.logger.info(f"✅ \033[34m{round(seconds_until_next_run / 3600,2)}\033[0m 小时后重新获取{coin_for_next_log} 零点价格")
+
+    def _seconds_until_zero_time_price(self):
+        """距下一个北京时间 00:00:02 的秒数"""
+        now = datetime.now(CHINA_TZ)
+        midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        return (midnight + timedelta(days=1, seconds=2) - now).total_seconds()
+
+    def schedule_binance_zero_time_price(self, delay_seconds):
+        """安排零点价格任务: 始终只保留一个 threading.Timer,获取和重试都在定时器线程中执行"""
+        with self.binance_zero_price_timer_lock:
+            if self.binance_zero_price_timer:
+                self.binance_zero_price_timer.cancel()
+            self.binance_zero_price_timer = threading.Timer(max(0, delay_seconds), self.get_binance_zero_time_price)
             self.binance_zero_price_timer.daemon = True
             self.binance_zero_price_timer.start()
-            self.logger.info(f"✅ \033[34m{round(seconds_until_next_run / 3600,2)}\033[0m 小时后重新获取{coin_for_next_log} 零点价格")
     
+    def _kline_zero_time_price(self, symbol, midnight_ms):
+        """从本地K线(缺失时请求REST接口)取零点那一分钟的开盘价,失败返回None"""
+        try:
+            price = self.kline_store.open_at(symbol, midnight_ms)
+            if price is not None:
+                self.logger.info(f"✅ 从零点K线恢复 \033[34m{symbol}\033[0m 零点价格: \033[34m{price}\033[0m")
+            return price
+        except Exception as e:
+            self.logger.warning(f"❌ 从K线获取 {symbol} 零点价格失败: {str(e)}")
+            return None
+
+    def _on_binance_gap(self, disconnected_at, reconnected_at):
+        """币安行情断线恢复后补齐断线期间的K线(成交由 BinanceFeed 按ID补齐)"""
+        self.metrics.set_gauge('binance_feed.last_gap_seconds', round(reconnected_at - disconnected_at, 1))
+        threading.Thread(target=self.backfill_klines, daemon=True).start()
+
+    def backfill_klines(self):
+        """补齐所有币种从昨天零点开始的1分钟K线;当日参考价为空时立即用零点K线恢复(后台线程执行)"""
+        midnight = datetime.now(CHINA_TZ).replace(hour=0, minute=0, second=0, microsecond=0)
+        midnight_ms = int(midnight.timestamp() * 1000)
+        for symbol in self.binance_feed.symbols:
+            try:
+                added = self.kline_store.backfill(symbol, midnight_ms - 86400000)
+                if added:
+                    self.logger.info(f"✅ 补齐 {symbol} 1分钟K线 {added} 根")
+            except Exception as e:
+                self.logger.warning(f"❌ 补齐 {symbol} K线失败: {str(e)}")
+        
+        if getattr(self, 'zero_time_price', None):
+            return
+        symbol = self.coin_combobox.get() + 'USDT'
+        price = self._kline_zero_time_price(symbol, midnight_ms)
+        if price is None:
+            return
+        
+        def update_gui():
+            try:
+                self.zero_time_price = round(price, 3)
+                self.binance_zero_price_label.config(text=f"{self.zero_time_price}")
+            except Exception as e_gui:
+                self.logger.debug(f"❌ 更新零点价格GUI时出错: {e_gui}")
+        
+        self.root.after(0, update_gui)
+
     def get_binance_price_websocket(self):
-        """获取币安价格,并计算上涨或下跌幅度"""
+        """获取币安价格,并计算上涨或下跌幅度(订阅共用行情连接中当前币种的更新)"""
         # 获取币种信息
         selected_coin = self.coin_combobox.get()
-        coin_form_websocket = selected_coin.lower() + 'usdt'
-        # 获取币安价格
-        ws_url = f"wss://stream.binance.com:9443/ws/{coin_form_websocket}@ticker"
+        self.binance_symbol = selected_coin.upper() + 'USDT'
 
-        def on_message(ws, message):
-            try:
-                data = json.loads(message)
-                # 获取最新成交价格
-                now_price = round(float(data['c']), 3)
+        def on_price(symbol, price, data):
+            if symbol != self.binance_symbol:
+                return
+            # 只写入最新价格,由 refresh_binance_display 按帧率统一刷新界面
+            with self.binance_display_lock:
+                if self.binance_display_slot is not None:
+                    self.binance_display_dropped += 1
+                self.binance_display_slot = round(price, 3)
+            
+            zero_time_price = getattr(self, 'zero_time_price', None)
+            if zero_time_price:
+                self.lead_lag.add_binance(time.time(), (price - zero_time_price) / zero_time_price * 100)
+                # 币安先动时按最新预测重新跑一遍交易阶梯,不等下一次读价
+                if self.lead_lag_drive_ladder and self.trade_tick is not None and self.lead_lag_signal:
+                    self.trade_tick_event.set()
+
+        # 只注册一次回调,重复调用时只更新订阅的币种
+        if not getattr(self, 'binance_price_listener_added', False):
+            self.binance_feed.add_listener(on_price)
+            self.binance_price_listener_added = True
+        self.binance_feed.start()
+
+    def refresh_binance_display(self):
+        """GUI刷新节拍: 取出槽中最新的币安价格并更新标签,中间被覆盖的更新计为丢弃"""
+        try:
+            with self.binance_display_lock:
+                now_price = self.binance_display_slot
+                self.binance_display_slot = None
+                dropped = self.binance_display_dropped
+                self.binance_display_dropped = 0
+            
+            if dropped:
+                self.metrics.incr('binance_display.dropped', dropped)
+            
+            if now_price is not None:
+                self.metrics.incr('binance_display.applied')
                 # 计算上涨或下跌幅度
                 zero_time_price_for_calc = getattr(self, 'zero_time_price', None)
                 binance_rate_text = "--"
                 rate_color = "blue"
-
                 if zero_time_price_for_calc:
                     binance_rate = ((now_price - zero_time_price_for_calc) / zero_time_price_for_calc) * 100
                     binance_rate_text = f"{binance_rate:.3f}"
                     rate_color = "#1AAD19" if binance_rate >= 0 else "red"
-
-                def update_gui():
-                    try:
-                        self.binance_now_price_label.config(text=f"{now_price}")
-                        self.binance_rate_label.config(
-                            text=f"{binance_rate_text}",
-                            foreground=rate_color,
-                            font=("Arial", 18, "bold")
-                        )
-                    except Exception as e:
-                        self.logger.debug("❌ 更新GUI时发生错误:", e)
-
-                self.root.after(0, update_gui)
-            except Exception as e:
-                self.logger.warning(f"WebSocket 消息处理异常: {e}")
-
-        def on_error(ws, error):
-            self.logger.warning(f"WebSocket 错误: {error}")
-
-        def on_close(ws, close_status_code, close_msg):
-            self.logger.info("❌ WebSocket 连接已关闭")
-
-        def run_ws():
-            while self.running and not self.stop_event.is_set():
-                try:
-                    ws = websocket.WebSocketApp(ws_url, on_message=on_message, on_error=on_error, on_close=on_close)
-                    ws.run_forever()
-                except Exception as e:
-                    self.logger.warning(f"WebSocket 主循环异常: {e}")
-                time.sleep(5)  # 出错后延迟重连
-
-        self.ws_thread = threading.Thread(target=run_ws, daemon=True)
-        self.ws_thread.start()
+                
+                self.binance_now_price_label.config(text=f"{now_price}")
+                self.binance_rate_label.config(text=binance_rate_text)
+                # 颜色变化时才重新设置
+                if rate_color != self.binance_rate_color:
+                    self.binance_rate_label.config(foreground=rate_color)
+                    self.binance_rate_color = rate_color
+        except Exception as e:
+            self.logger.debug(f"❌ 更新币安价格显示时发生错误: {str(e)}")
+        finally:
+            if self.running:
+                self.binance_display_timer = self.root.after(
+                    int(1000 / self.binance_display_fps), self.refresh_binance_display)
 
     def _perform_price_comparison(self):
         """执行价格比较"""
@@ -3485,7 +6778,19 @@ class CryptoTrader:
                 self.logger.info(f"✅ \033[34m{round(seconds_until_next_run / 3600,2)}\033[0m小时后比较\033[34m{self.selected_coin}USDT\033[0m币安价格")
 
     def start_login_monitoring(self):
-        """监控登录状态"""
+        """监控登录状态: 由Tk定时器触发,检查交给浏览器线程以导航优先级执行,Tk线程不等待"""
+        try:
+            if self.driver and not self.is_restarting:
+                self.browser_queue.submit(BrowserCommandQueue.NAVIGATION, 'check_login',
+                                          self._check_login_once, dedupe=True)
+        except Exception as e:
+            self.logger.error(f"登录监控失败: {str(e)}")
+        finally:
+            # 每20秒检查一次登录状态
+            self.login_check_timer = self.root.after(20000, self.start_login_monitoring)
+
+    def _check_login_once(self):
+        """在浏览器线程中检查一次登录状态,未登录时执行登录或导入cookie"""
         try:
             with self.login_attempt_lock:
                 if self.login_running:
@@ -3496,7 +6801,14 @@ class CryptoTrader:
             try:
                 # 查找登录按钮
                 login_button = self.driver.find_element(By.XPATH, XPathConfig.LOGIN_BUTTON[0])
-                if login_button:
+                if login_button and self.headless:
+                    # 无头模式无法完成Google登录,改为导入有界面模式导出的cookie
+                    self.logger.info("✅ 已发现登录按钮,无头模式下导入登录cookie")
+                    if self._import_login_cookies(self.driver):
+                        self.driver.refresh()
+                    else:
+                        self.logger.error("❌ 无头模式无法登录,请在有界面模式下登录后导出cookie")
+                elif login_button:
                     self.logger.info("✅ 已发现登录按钮,尝试登录")
                     self.stop_url_monitoring(should_reset=True)
                     self.stop_refresh_page()
@@ -3504,10 +6816,13 @@ class CryptoTrader:
                     login_button.click()
                     time.sleep(1)
                     
-                    # 查找Google登录按钮
-                    google_login_button = self.driver.find_element(By.XPATH, XPathConfig.LOGIN_WITH_GOOGLE_BUTTON[0])
+                    # 查找Google登录按钮(登录弹窗可能在 iframe 中)
+                    google_login_button = self._find_element_in_frames(XPathConfig.LOGIN_WITH_GOOGLE_BUTTON[0])
+                    if not google_login_button:
+                        self.logger.warning("❌ 未找到Google登录按钮")
                     if google_login_button:
                         google_login_button.click()
+                        self.driver.switch_to.default_content()
                         self.logger.info("✅ 已点击Google登录按钮")
                         
                         # 不再固定等待15秒，而是循环检测CASH值
@@ -3531,15 +6846,17 @@ class CryptoTrader:
                         
                         # 检查是否有ACCEPT按钮（Cookie提示等）
                         if cash_value:
+                            # 登录成功后导出cookie,供无头模式和热备浏览器使用
+                            self.export_login_cookies()
                             self.driver.get(self.url_entry.get().strip())
                             time.sleep(2)
                             try:
                                 amount_button = getattr(self, 'amount_yes1_button')
-                                amount_button.event_generate('<Button-1>')
+                                self.click_amount(SimpleNamespace(widget=amount_button))
                                 time.sleep(0.5)
 
                                 # 点击buy_confirm_button
-                                self.buy_confirm_button.invoke()
+                                self.click_buy_confirm_button()
                                 time.sleep(1)
                                 
                                 accept_button = self.driver.find_element(By.XPATH, XPathConfig.ACCEPT_BUTTON[0])
@@ -3554,17 +6871,15 @@ class CryptoTrader:
                         self.refresh_page_timer = self.root.after(240000, self.enable_refresh_page)
                         self.logger.info("✅ 已重新启用URL监控和页面刷新")
             except NoSuchElementException:
-                # 未找到登录按钮，可能已经登录
-                pass
+                # 未找到登录按钮，可能已经登录,有界面模式下每小时导出一次登录cookie
+                if not self.headless and time.time() - self.last_cookie_export_time > 3600:
+                    self.export_login_cookies()
                 
         except Exception as e:
             self.logger.error(f"登录监控失败: {str(e)}")
         finally:
             with self.login_attempt_lock:
                 self.login_running = False
-            
-            # 每20秒检查一次登录状态
-            self.login_check_timer = self.root.after(20000, self.start_login_monitoring)
 
     def start_url_monitoring(self):
         """监控URL变化"""
@@ -3578,9 +6893,27 @@ class CryptoTrader:
                     return
                 self.url_monitoring_running = True
                 
+            # 在浏览器线程中以导航优先级检查,Tk线程不等待
+            target_url = self.url_entry.get().strip()
+            self.browser_queue.submit(BrowserCommandQueue.NAVIGATION, 'check_url',
+                                      lambda: self._check_url_once(target_url), dedupe=True)
+                
+        except Exception as e:
+            self.logger.error(f"URL监控失败: {str(e)}")
+        finally:
+            with self.url_monitoring_lock:
+                self.url_monitoring_running = False
+        
+        # 检查是否已禁用URL监控,如果禁用则不再安排下一次检查
+        if not hasattr(self, 'url_monitoring_disabled') or not self.url_monitoring_disabled:
+            # 每5秒检查一次URL
+            self.url_check_timer = self.root.after(5000, self.start_url_monitoring)
+
+    def _check_url_once(self, target_url):
+        """在浏览器线程中检查当前URL,与目标URL不一致时重新导航"""
+        try:
             # 获取当前URL
             current_url = self.driver.current_url
-            target_url = self.url_entry.get().strip()
             
             # 去除URL中的查询参数(?后面的部分)
             def clean_url(url):
@@ -3591,6 +6924,8 @@ class CryptoTrader:
             
             # 如果URL基础部分不匹配，重新导航
             if clean_current != clean_target:
+                if self.browser_queue.should_yield('check_url'):
+                    return
                 self.logger.info(f"❌ URL不匹配,重新导航到: {target_url}")
                 self.driver.get(target_url)
                 
@@ -3598,17 +6933,8 @@ class CryptoTrader:
                 WebDriverWait(self.driver, 10).until(
                     lambda driver: driver.execute_script('return document.readyState') == 'complete'
                 )
-                
         except Exception as e:
             self.logger.error(f"URL监控失败: {str(e)}")
-        finally:
-            with self.url_monitoring_lock:
-                self.url_monitoring_running = False
-        
-        # 检查是否已禁用URL监控,如果禁用则不再安排下一次检查
-        if not hasattr(self, 'url_monitoring_disabled') or not self.url_monitoring_disabled:
-            # 每5秒检查一次URL
-            self.url_check_timer = self.root.after(5000, self.start_url_monitoring)
 
     def stop_url_monitoring(self, should_reset=False):
         """停止URL监控
@@ -3648,7 +6974,7 @@ class CryptoTrader:
             self.logger.error(f"启用URL监控失败: {str(e)}")
 
     def refresh_page(self):
-        """定期刷新页面"""
+        """定期检查页面,只有渲染进程内存增长过多或价格停止更新时才刷新页面"""
         try:
             # 检查是否已禁用页面刷新
             if hasattr(self, 'refresh_page_disabled') and self.refresh_page_disabled:
@@ -3658,14 +6984,17 @@ class CryptoTrader:
                 if self.refresh_page_running:
                     return
                 self.refresh_page_running = True
-                
-            # 刷新页面
-            self.driver.refresh()
             
-            # 等待页面加载完成
-            WebDriverWait(self.driver, 10).until(
-                lambda driver: driver.execute_script('return document.readyState') == 'complete'
-            )
+            # 浏览器正在恢复时不刷新
+            if self.recovering or self.is_restarting:
+                return
+            
+            # 下单标签页在浏览器线程中以导航优先级执行,Tk线程不等待
+            self.browser_queue.submit(BrowserCommandQueue.NAVIGATION, 'refresh_page',
+                                      self._refresh_page_once, dedupe=True)
+            # 读价会话只在读价线程中使用,由读价线程在下一轮检查
+            if self.price_driver:
+                self.price_recycle_due = True
             
         except Exception as e:
             self.logger.error(f"页面刷新失败: {str(e)}")
@@ -3675,8 +7004,94 @@ class CryptoTrader:
             
             # 检查是否已禁用页面刷新,如果禁用则不再安排下一次刷新
             if not hasattr(self, 'refresh_page_disabled') or not self.refresh_page_disabled:
-                # 随机 2-5分钟刷新一次页面
-                self.refresh_page_timer = self.root.after(random.randint(120000, 300000), self.refresh_page)
+                # 每60秒检查一次是否需要刷新
+                self.refresh_page_timer = self.root.after(60000, self.refresh_page)
+
+    def _refresh_page_once(self):
+        """在浏览器线程中检查下单标签页的内存(没有独立读价会话时也检查价格新鲜度),需要时刷新页面"""
+        try:
+            should_reload, reason = self._should_recycle_tab(self.driver, 'trade', check_stale=not self.price_driver)
+            if not should_reload:
+                self.refresh_avoided_count += 1
+                self.metrics.incr('tab_recycle.avoided')
+                return
+            
+            # 有交易等待执行时推迟到下一轮
+            if self.browser_queue.should_yield('refresh_page'):
+                return
+            
+            self._reload_tab(self.driver, 'trade', reason)
+        except Exception as e:
+            self.logger.error(f"页面刷新失败: {str(e)}")
+
+    def _recycle_price_tab_once(self):
+        """在读价线程中检查读价标签页的内存和价格新鲜度,需要时刷新;刷新失败则重建读价会话"""
+        price_driver = self.price_driver
+        if not price_driver:
+            return
+        try:
+            should_reload, reason = self._should_recycle_tab(price_driver, 'price', check_stale=True)
+            if not should_reload:
+                self.refresh_avoided_count += 1
+                self.metrics.incr('tab_recycle.avoided')
+                return
+            self._reload_tab(price_driver, 'price', reason)
+        except Exception as e:
+            self.logger.error(f"读价标签页刷新失败,重建读价会话: {str(e)}")
+            self._open_price_tab(self.url_entry.get().strip())
+
+    def _reload_tab(self, driver, role, reason):
+        """刷新标签页并等待加载完成,之后重新登记到标签页管理器并重新采集内存基线"""
+        self.logger.info(f"🔄 刷新{role}标签页: {reason} (已避免{self.refresh_avoided_count}次不必要的刷新)")
+        self.page_load_started = time.time()
+        driver.refresh()
+        
+        # 等待页面加载完成
+        WebDriverWait(driver, 10).until(
+            lambda d: d.execute_script('return document.readyState') == 'complete'
+        )
+        self.tab_manager.register(driver.current_window_handle, role)
+        self.metrics.incr(f'tab_recycle.{role}.reloads')
+        self.tab_memory_baselines.pop(role, None)
+
+    def _should_recycle_tab(self, driver, role, check_stale=True):
+        """根据渲染进程内存、DOM节点数和价格新鲜度判断是否需要刷新页面
+        
+        Args:
+            driver: 要检查的标签页所在的WebDriver会话
+            role: 标签页角色(trade/price),内存基线按角色分别保存
+            check_stale: 是否检查价格新鲜度,只有读价的标签页需要
+        
+        Returns:
+            tuple: (是否需要刷新, 原因)
+        """
+        # 价格停止更新
+        stale_seconds = time.time() - self.last_price_time
+        if check_stale and stale_seconds > self.recycle_stale_seconds:
+            return True, f"价格已{int(stale_seconds)}秒未更新"
+        
+        # 通过CDP采集JS堆和DOM节点数
+        driver.execute_cdp_cmd('Performance.enable', {})
+        result = driver.execute_cdp_cmd('Performance.getMetrics', {})
+        values = {item['name']: item['value'] for item in result.get('metrics', [])}
+        heap_mb = values.get('JSHeapUsedSize', 0) / 1024 / 1024
+        nodes = values.get('Nodes', 0)
+        self.metrics.set_gauge(f'tab.{role}.js_heap_mb', round(heap_mb, 1))
+        self.metrics.set_gauge(f'tab.{role}.dom_nodes', int(nodes))
+        
+        baseline = self.tab_memory_baselines.get(role)
+        if not baseline:
+            self.tab_memory_baselines[role] = {'heap_mb': heap_mb, 'nodes': nodes}
+            return False, "已采集内存基线"
+        
+        heap_growth = heap_mb - baseline['heap_mb']
+        if heap_growth > self.recycle_heap_growth_mb:
+            return True, f"JS堆增长{heap_growth:.0f}MB(当前{heap_mb:.0f}MB)"
+        if heap_mb > self.recycle_heap_max_mb:
+            return True, f"JS堆超过上限({heap_mb:.0f}MB)"
+        if baseline['nodes'] and nodes > baseline['nodes'] * self.recycle_nodes_factor:
+            return True, f"DOM节点数从{int(baseline['nodes'])}增长到{int(nodes)}"
+        return False, ""
 
     def stop_refresh_page(self, should_reset=False):
         """停止页面刷新
@@ -3704,24 +7119,48 @@ class CryptoTrader:
             self.logger.error(f"停止页面刷新失败: {str(e)}")
 
     def close_windows(self):
-        """关闭多余窗口"""
-        # 检查并关闭多余的窗口，只保留一个
-        all_handles = self.driver.window_handles
-        
-        if len(all_handles) > 1:
-            # 保留最后一个窗口，关闭其他所有窗口
-            current_handle = all_handles[-1]  # 使用最后一个窗口
-            
-            # 关闭除了最后一个窗口外的所有窗口
-            for handle in all_handles[:-1]:
-                self.driver.switch_to.window(handle)
-                self.driver.close()
-            
-            # 切换到保留的窗口
-            self.driver.switch_to.window(current_handle)
-            
-        else:
-            self.logger.warning("❗ 当前窗口数不足2个,无需切换")
+        """关闭多余窗口: 由标签页管理器关闭所有未登记角色的标签页"""
+        self.browser_queue.submit(BrowserCommandQueue.NAVIGATION, 'close_windows',
+                                  lambda: self.tab_manager.reap_orphans(self.driver, force=True), dedupe=True)
+
+    def manage_tabs(self):
+        """定时回收孤儿标签页,并记录标签页数量和每个标签页的JS堆内存"""
+        try:
+            if self.driver and not self.is_restarting:
+                self.browser_queue.submit(BrowserCommandQueue.HEALTH, 'manage_tabs',
+                                          self._manage_tabs_once, dedupe=True)
+        except Exception as e:
+            self.logger.error(f"标签页管理失败: {str(e)}")
+        finally:
+            # 每60秒检查一次
+            self.tab_manage_timer = self.root.after(60000, self.manage_tabs)
+
+    def _manage_tabs_once(self):
+        """在浏览器线程中执行标签页回收和内存统计"""
+        try:
+            self.tab_manager.prune(self.driver.window_handles)
+            self.tab_manager.reap_orphans(self.driver)
+            targets = self.driver.execute_cdp_cmd('Target.getTargets', {}).get('targetInfos', [])
+            self.metrics.set_gauge('tabs.count', len([t for t in targets if t.get('type') == 'page']))
+            for handle, role in self.tab_manager.tabs_snapshot().items():
+                heap_mb = self._tab_heap_mb(handle)
+                if heap_mb is not None:
+                    self.metrics.set_gauge(f'tabs.{role}.js_heap_mb', round(heap_mb, 1))
+        except Exception as e:
+            self.logger.error(f"标签页管理失败: {str(e)}")
+
+    def _tab_heap_mb(self, handle):
+        """读取标签页的JS堆内存(MB): 下单标签页用Selenium,读价标签页用CDP直连"""
+        try:
+            if handle == self.trade_tab_handle:
+                usage = self.driver.execute_cdp_cmd('Runtime.getHeapUsage', {})
+            elif handle == self.price_tab_handle and self._get_cdp_client(handle):
+                usage = self._get_cdp_client(handle).call('Runtime.getHeapUsage')
+            else:
+                return None
+            return usage.get('usedSize', 0) / 1024 / 1024
+        except Exception:
+            return None
             
     def reset_trade(self):
         """重置交易"""
@@ -3826,11 +7265,23 @@ class CryptoTrader:
         self.logger.error(error_msg)
 
     def monitor_xpath_elements(self):
-        """使用当前浏览器实例监控 XPath 元素"""
+        """使用当前浏览器实例监控 XPath 元素(在浏览器线程中以最低优先级执行)"""
         if not self.driver and not self.is_restarting:
             self.logger.warning("浏览器未启动，无法监控 XPath")
             return
             
+        try:
+            self.browser_queue.submit(BrowserCommandQueue.HEALTH, 'check_xpath',
+                                      self._check_xpath_elements, dedupe=True)
+        except Exception as e:
+            self.logger.error(f"❌  监控 XPath 元素时发生错误: {str(e)}")
+        finally:
+            # 每隔 1 小时检查一次,先关闭之前的定时器
+            self.root.after_cancel(self.monitor_xpath_timer)
+            self.monitor_xpath_timer = self.root.after(3600000, self.monitor_xpath_elements)
+
+    def _check_xpath_elements(self):
+        """逐个检查 XPath 能否定位到元素,有交易等待时中止本轮检查"""
         try:
             # 获取 XPathConfig 中的所有属性
             xpath_config = XPathConfig()
@@ -3851,6 +7302,8 @@ class CryptoTrader:
             for attr in xpath_attrs:
                 xpath_list = getattr(xpath_config, attr)
                 if xpath_list:  # 确保列表不为空
+                    if self.browser_queue.should_yield('check_xpath'):
+                        return
                     first_xpath = xpath_list[0]  # 只获取第一个 XPath
                     try:
                         # 尝试定位元素，设置超时时间为 5 秒
@@ -3886,13 +7339,9 @@ class CryptoTrader:
             
         except Exception as e:
             self.logger.error(f"❌  监控 XPath 元素时发生错误: {str(e)}")
-        finally:
-            # 每隔 1 小时检查一次,先关闭之前的定时器
-            self.root.after_cancel(self.monitor_xpath_timer)
-            self.root.after(3600000, self.monitor_xpath_elements)
 
     def schedule_auto_find_coin(self):
-        """安排每天3点30分执行自动找币"""
+        """安排每天3点30分执行自动找币,提前30分钟在后台验证要切换的市场"""
         now = datetime.now()
         # 计算下一个3点2分的时间
         next_run = now.replace(hour=3, minute=30, second=0, microsecond=0)
@@ -3903,10 +7352,41 @@ class CryptoTrader:
         wait_time = (next_run - now).total_seconds() * 1000
         wait_time_hours = wait_time / 3600000
         
-        # 设置定时器
+        # 设置定时器: 找币在浏览器线程中执行,Tk线程只负责投递,执行后安排第二天
         selected_coin = self.coin_combobox.get()
-        self.root.after(int(wait_time), lambda: self.find_54_coin(selected_coin))
+        def run_auto_find():
+            self.browser_queue.submit(BrowserCommandQueue.NAVIGATION, 'find_54_coin',
+                                      lambda: self.find_54_coin(selected_coin), dedupe=True)
+            self.schedule_auto_find_coin()
+        self.schedule_auto_find_coin_timer = self.root.after(int(wait_time), run_auto_find)
         self.logger.info(f"✅ \033[34m{round(wait_time_hours,2)}\033[0m小时后,开始自动找币")
+        
+        # 提前30分钟启动后台验证
+        if self.market_validate_timer:
+            self.root.after_cancel(self.market_validate_timer)
+        self.market_validate_timer = self.root.after(max(0, int(wait_time) - 1800000),
+                                                     lambda: self.start_market_validator(selected_coin, next_run))
+
+    def start_market_validator(self, coin, deadline):
+        """后台线程验证换日要用的市场(预测slug优先),直到解析成功或到达换日时间"""
+        def validate():
+            while not self.stop_event.is_set() and datetime.now() < deadline:
+                day = deadline
+                next_url = self.market_discovery.lookup(coin, day)
+                if next_url:
+                    self.logger.info(f"✅ {coin} {MarketDiscovery.date_text(day)} 市场已就绪,换日时直接切换")
+                    self.prewarm_next_market(next_url)
+                    return
+                try:
+                    self.market_discovery.prefetch([coin], days_ahead=(day.date() - datetime.now().date()).days)
+                except Exception as e:
+                    self.logger.warning(f"❌ 验证 {coin} 市场失败: {str(e)}")
+                # 每分钟重试一次
+                self.stop_event.wait(60)
+            if not self.market_discovery.lookup(coin, deadline):
+                self.logger.warning(f"❌ 换日前未能验证 {coin} 市场,换日时将使用页面搜索")
+        
+        threading.Thread(target=validate, daemon=True).start()
 
     def enable_refresh_page(self):
         """启用页面刷新"""
@@ -3983,13 +7463,14 @@ class CryptoTrader:
         except Exception as e:
             self.logger.error(f"发送Chrome异常警报邮件时出错: {str(e)}")
     
-    def _find_element_with_retry(self, xpaths, timeout=3, silent=False):
+    def _find_element_with_retry(self, xpaths, timeout=3, silent=False, driver=None):
         """优化版XPATH元素查找(增强空值处理)
         
         Args:
             xpaths: XPath表达式列表
             timeout: 超时时间（秒）
             silent: 是否静默错误
+            driver: 使用的WebDriver,默认下单会话 self.driver
             
         Returns:
             找到的WebElement或None
@@ -3997,7 +7478,7 @@ class CryptoTrader:
         try:
             for i, xpath in enumerate(xpaths, 1):
                 try:
-                    element = WebDriverWait(self.driver, timeout).until(
+                    element = WebDriverWait(driver or self.driver, timeout).until(
                         EC.element_to_be_clickable((By.XPATH, xpath))
                     )
                     return element
@@ -4014,22 +7495,178 @@ class CryptoTrader:
         """
         自动切换到包含指定xpath元素的iframe。
         - xpath: 你要找的元素的xpath,比如 '(//span[@class="c-ggujGL"])[2]'
+        - 同源 iframe 用一段 JS 一次性查找,跨域 iframe 通过 CDP 在各自的 frame 上下文中查找
+        - 不修改页面DOM: iframe 元素和 CDP frame id 的对应关系保存在 Python 侧,按 WebElement id 索引
+        - frame 映射按文档代次(performance.timeOrigin + 当前URL)缓存,刷新、跳转和SPA路由切换后失效;
+          iframe 元素增减或替换时重建映射
+        
+        Returns:
+            str: 包含元素的 frame id,未找到返回 None
         """
         self.driver.switch_to.default_content()  # 先回到主文档
-        frames = self.driver.find_elements(By.TAG_NAME, "iframe")  # 找到所有 iframe
-
-        for i, frame in enumerate(frames):
-            self.driver.switch_to.frame(frame)
-            try:
-                WebDriverWait(self.driver, timeout).until(EC.presence_of_element_located((By.XPATH, xpath)))
-                self.logger.info(f"成功切换到第 {i} 个 iframe")
-                return True
-            except:
-                self.driver.switch_to.default_content()  # 如果没找到，切回主文档，继续下一个
-                continue
+        generation = tuple(self.driver.execute_script("return [performance.timeOrigin, location.href]"))
+        if self.frame_cache.get('generation') != generation:
+            self.frame_cache = {'generation': generation, 'frames': None, 'signature': None,
+                                'elements': {}, 'frame_ids': {}, 'xpaths': {}}
+        
+        # 命中缓存: 切换后确认元素仍在该 iframe 中,不在则丢弃缓存走完整扫描
+        cached_frame_id = self.frame_cache['xpaths'].get(xpath)
+        if cached_frame_id:
+            if self._switch_to_frame_by_id(cached_frame_id) and self.driver.find_elements(By.XPATH, xpath):
+                return cached_frame_id
+            self.frame_cache['xpaths'].pop(xpath, None)
+            self.driver.switch_to.default_content()
+        
+        # 单次扫描所有同源 iframe,返回 iframe 元素本身,由 Python 侧与 CDP frame id 对应
+        js_scan = '''
+            const xpath = arguments[0];
+            const frames = Array.prototype.slice.call(document.querySelectorAll('iframe'));
+            const result = { index: -1, frames: frames, cross_origin: [] };
+            for (let i = 0; i < frames.length; i++) {
+                let doc = null;
+                try { doc = frames[i].contentDocument; } catch (err) {}
+                if (!doc) { result.cross_origin.push(i); continue; }
+                try {
+                    const hit = doc.evaluate(xpath, doc, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+                    if (hit && result.index < 0) { result.index = i; }
+                } catch (err) {}
+            }
+            return result;
+        '''
+        
+        end_time = time.time() + timeout
+        while True:
+            scan_result = self.driver.execute_script(js_scan, xpath)
+            frames = (scan_result or {}).get('frames') or []
+            if not frames:
+                break
+            
+            # iframe 元素增减或替换,或有尚未映射的跨域 iframe(后加载)时重建映射
+            signature = [frame.id for frame in frames]
+            if self.frame_cache['signature'] != signature:
+                self.frame_cache['frames'] = None
+                self.frame_cache['xpaths'] = {}
+            elif any(frames[index].id not in self.frame_cache['frame_ids']
+                     for index in scan_result.get('cross_origin', [])):
+                self.frame_cache['frames'] = None
+            if self.frame_cache['frames'] is None:
+                self.frame_cache['frames'] = self._build_frame_mapping()
+                self.frame_cache['signature'] = signature
+                self.frame_cache['elements'] = {}
+                self.frame_cache['frame_ids'] = {}
+                for mapped_id, info in self.frame_cache['frames'].items():
+                    if 0 <= info['index'] < len(frames):
+                        self.frame_cache['elements'][mapped_id] = frames[info['index']]
+                        self.frame_cache['frame_ids'][frames[info['index']].id] = mapped_id
+            
+            frame_id = None
+            if scan_result.get('index', -1) >= 0:
+                frame = frames[scan_result['index']]
+                frame_id = self.frame_cache['frame_ids'].get(frame.id)
+                if not frame_id:
+                    # CDP 未列出的同源 iframe,直接用元素id登记
+                    frame_id = f"element-{frame.id}"
+                    self.frame_cache['elements'][frame_id] = frame
+                    self.frame_cache['frame_ids'][frame.id] = frame_id
+            else:
+                # 跨域 iframe: 不切换 WebDriver 上下文,直接在 frame 的隔离上下文中执行查找
+                for index in scan_result.get('cross_origin', []):
+                    candidate_id = self.frame_cache['frame_ids'].get(frames[index].id)
+                    if candidate_id and self._frame_contains_xpath(candidate_id, xpath):
+                        frame_id = candidate_id
+                        break
+            
+            if frame_id and self._switch_to_frame_by_id(frame_id):
+                self.frame_cache['xpaths'][xpath] = frame_id
+                self.logger.info(f"成功切换到 iframe: {frame_id}")
+                return frame_id
+            
+            if time.time() >= end_time:
+                break
+            time.sleep(0.5)
 
+        self.driver.switch_to.default_content()
         self.logger.info("没有找到包含元素的 iframe")
-        return False
+        return None
+
+    def _build_frame_mapping(self):
+        """通过CDP建立 frame id -> iframe 序号(在 document.querySelectorAll('iframe') 中的位置) 的映射
+        
+        Returns:
+            dict: {frame_id: {'index': iframe序号, 'url': frame地址}}
+        """
+        mapping = {}
+        try:
+            frame_tree = self.driver.execute_cdp_cmd('Page.getFrameTree', {})
+            for child in frame_tree.get('frameTree', {}).get('childFrames', []):
+                frame = child.get('frame', {})
+                frame_id = frame.get('id')
+                try:
+                    owner = self.driver.execute_cdp_cmd('DOM.getFrameOwner', {'frameId': frame_id})
+                    node = self.driver.execute_cdp_cmd('DOM.resolveNode', {'backendNodeId': owner['backendNodeId']})
+                    index_result = self.driver.execute_cdp_cmd('Runtime.callFunctionOn', {
+                        'objectId': node['object']['objectId'],
+                        'functionDeclaration': "function() { return Array.prototype.indexOf.call("
+                                               "document.querySelectorAll('iframe'), this); }",
+                        'returnByValue': True
+                    })
+                    index = index_result.get('result', {}).get('value')
+                    if index is not None and index >= 0:
+                        mapping[frame_id] = {'index': int(index), 'url': frame.get('url', '')}
+                except Exception:
+                    continue
+        except Exception as e:
+            self.logger.debug(f"获取frame映射失败: {str(e)}")
+        return mapping
+
+    def _frame_contains_xpath(self, frame_id, xpath):
+        """在指定 frame 的隔离上下文中检查 xpath 是否存在(适用于跨域 iframe)"""
+        try:
+            world = self.driver.execute_cdp_cmd('Page.createIsolatedWorld', {
+                'frameId': frame_id,
+                'worldName': 'poly_frame_probe'
+            })
+            result = self.driver.execute_cdp_cmd('Runtime.evaluate', {
+                'expression': f"!!document.evaluate({json.dumps(xpath)}, document, null, "
+                              f"XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue",
+                'contextId': world['executionContextId'],
+                'returnByValue': True
+            })
+            return bool(result.get('result', {}).get('value'))
+        except Exception:
+            return False
+
+    def _switch_to_frame_by_id(self, frame_id):
+        """根据 frame id 切换 WebDriver 到对应的 iframe(元素来自最近一次扫描)"""
+        try:
+            self.driver.switch_to.default_content()
+            frame = self.frame_cache.get('elements', {}).get(frame_id)
+            if frame is None:
+                return False
+            self.driver.switch_to.frame(frame)
+            return True
+        except Exception:
+            self.driver.switch_to.default_content()
+            return False
+    
+    def _find_element_in_frames(self, xpath, timeout=5):
+        """先在主文档查找元素,找不到时切换到包含该元素的 iframe 中查找
+        
+        找到 iframe 中的元素后 WebDriver 停留在该 iframe,调用方用完后需 switch_to.default_content()
+        
+        Returns:
+            WebElement: 找到的元素,未找到返回None
+        """
+        self.driver.switch_to.default_content()
+        elements = self.driver.find_elements(By.XPATH, xpath)
+        if elements:
+            return elements[0]
+        if self.switch_to_frame_containing_element(xpath, timeout=timeout):
+            elements = self.driver.find_elements(By.XPATH, xpath)
+            if elements:
+                return elements[0]
+            self.driver.switch_to.default_content()
+        return None
     
     def _wait_for_element(self, xpath_list, timeout=10, poll_frequency=0.5):
         """智能等待元素出现
@@ -4057,7 +7694,359 @@ class CryptoTrader:
             time.sleep(poll_frequency)
         return None
 
+# --bench-blocking 使用的本地测试页面: 结构与市场页一致(价格行在 Spread 上方),
+# 页面引用每一类被屏蔽的资源,资源统一延迟 asset_delay 秒返回,结果不受网络和线上页面变化影响
+BENCH_FIXTURE_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>bench fixture</title>
+<style>@font-face { font-family: Bench; src: url(/assets/bench.woff2) format('woff2'); }
+body { font-family: Bench, sans-serif; }</style>
+<script src="/www.googletagmanager.com/gtm.js"></script>
+<script src="/www.google-analytics.com/analytics.js"></script>
+</head><body>
+<img src="/assets/logo.png"><img src="/assets/banner.jpg"><img src="/assets/chart.webp">
+<video src="/assets/intro.mp4" autoplay muted></video>
+<div id="book"></div>
+<script>
+fetch('/prices-history?interval=1h').catch(function () {});
+fetch('/book').then(function (r) { return r.json(); }).then(function (book) {
+    document.getElementById('book').innerHTML =
+        '<div><div>Up ' + book.up + '¢</div><div>Down ' + book.down + '¢</div>' +
+        '<div><div><div><span class="c-ggujGL">Last</span> <span class="c-ggujGL">Spread</span></div></div></div></div>';
+});
+</script>
+</body></html>"""
+
+BENCH_FIXTURE_ASSETS = {
+    '.png': 'image/png', '.jpg': 'image/jpeg', '.webp': 'image/webp', '.woff2': 'font/woff2',
+    '.mp4': 'video/mp4', '.js': 'application/javascript'
+}
+
+
+def start_bench_fixture(asset_delay=0.5):
+    """在本机随机端口启动 --bench-blocking 的测试页面,返回 (server, 页面URL)
+    
+    盘口接口 /book 立即返回,其余资源(图片、字体、视频、统计脚本、价格走势)延迟 asset_delay 秒
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    
+    class FixtureHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split('?', 1)[0]
+            if path == '/':
+                body, content_type = BENCH_FIXTURE_PAGE.encode('utf-8'), 'text/html; charset=utf-8'
+            elif path == '/book':
+                body, content_type = json.dumps({'up': 52, 'down': 49}).encode('utf-8'), 'application/json'
+            else:
+                time.sleep(asset_delay)
+                body = b'\0' * 20000
+                content_type = BENCH_FIXTURE_ASSETS.get(os.path.splitext(path)[1], 'application/json')
+                if content_type == 'application/javascript':
+                    body = b'void 0;'
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('Cache-Control', 'no-store')
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, *args):
+            pass
+    
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+def benchmark_request_blocking(url=None, runs=5, port=9222):
+    """对比开启/关闭请求屏蔽时,页面加载到读到第一个价格的耗时
+    
+    用法: python crypto_trader.py --bench-blocking [页面URL|fixture] [次数] [调试端口]
+    默认使用 start_bench_fixture 的本地测试页面,结果可复现;需要先用 start_chrome_xxx.sh 启动调试端口上的Chrome
+    """
+    logger = Logger("bench")
+    fixture_server = None
+    if not url or url == 'fixture':
+        fixture_server, url = start_bench_fixture()
+        logger.info(f"使用本地测试页面: {url}")
+    chrome_options = Options()
+    chrome_options.debugger_address = f"127.0.0.1:{port}"
+    driver = webdriver.Chrome(options=chrome_options)
+    
+    # 页面上出现 Spread 且其上方出现价格即视为读到第一个价格
+    js_first_price = '''
+        const spread = document.evaluate(arguments[0], document, null,
+            XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        if (!spread) { return false; }
+        let container = spread;
+        for (let i = 0; i < 3 && container.parentElement; i++) { container = container.parentElement; }
+        let above = container;
+        while (above = above.previousElementSibling) {
+            if ((above.innerText || '').indexOf('¢') >= 0) { return true; }
+        }
+        return false;
+    '''
+    results = {}
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        for blocking in (False, True):
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URL_PATTERNS if blocking else []})
+            samples = []
+            for _ in range(runs):
+                driver.execute_cdp_cmd('Network.clearBrowserCache', {})
+                driver.get('about:blank')
+                start_time = time.time()
+                driver.get(url)
+                while time.time() - start_time < 60:
+                    if driver.execute_script(js_first_price, XPathConfig.SPREAD[0]):
+                        samples.append(time.time() - start_time)
+                        break
+                    time.sleep(0.05)
+            results['blocked' if blocking else 'unblocked'] = samples
+        
+        for name, samples in results.items():
+            if samples:
+                samples.sort()
+                logger.info(f"📊 {name}: {len(samples)}/{runs}次读到价格, "
+                            f"平均 {sum(samples) / len(samples):.3f}秒, 中位数 {samples[len(samples) // 2]:.3f}秒")
+            else:
+                logger.warning(f"❌ {name}: 未能读到价格")
+        return results
+    finally:
+        try:
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': []})
+        finally:
+            driver.quit()
+            if fixture_server:
+                fixture_server.shutdown()
+
+def benchmark_cdp(url, runs=50, port=9222):
+    """对比热路径操作经 Selenium 和 CDP直连 的往返耗时
+    
+    用法: python crypto_trader.py --bench-cdp <市场页面URL> [次数] [调试端口]
+    需要先用 start_chrome_xxx.sh 启动调试端口上的Chrome,并安装 websockets。
+    点击测试使用 Spread 元素,不会点击真正的下单确认按钮。
+    """
+    logger = Logger("bench")
+    if websockets is None:
+        logger.error("❌ 未安装 websockets,无法测试CDP直连: pip install websockets")
+        return None
+    chrome_options = Options()
+    chrome_options.debugger_address = f"127.0.0.1:{port}"
+    driver = webdriver.Chrome(options=chrome_options)
+    client = CDPClient(logger, port)
+    try:
+        driver.switch_to.new_window('tab')
+        driver.get(url)
+        WebDriverWait(driver, 20).until(
+            lambda d: d.execute_script('return document.readyState') == 'complete'
+        )
+        if not client.connect(driver.current_window_handle):
+            return None
+        return _run_cdp_benchmark(logger, driver, client, runs)
+    finally:
+        client.close()
+        try:
+            driver.close()   # 关闭测试用的标签页
+        except Exception:
+            pass
+        driver.quit()
+
+
+def _run_cdp_benchmark(logger, driver, client, runs):
+    """benchmark_cdp 的测量部分"""
+    js_sibling_texts = '''
+        const container = arguments[0];
+        const result = { above_texts: [], below_texts: [] };
+        let e = container;
+        while (e = e.previousElementSibling) { result.above_texts.push((e.innerText || '').trim()); }
+        e = container;
+        while (e = e.nextElementSibling) { result.below_texts.push((e.innerText || '').trim()); }
+        return result;
+    '''
+    
+    def selenium_snapshot():
+        spread = driver.find_element(By.XPATH, XPathConfig.SPREAD[0])
+        container = spread.find_element(By.XPATH, './ancestor::div[3]')
+        return driver.execute_script(js_sibling_texts, container)
+    
+    def selenium_set_input():
+        amount_input = driver.find_element(By.XPATH, XPathConfig.AMOUNT_INPUT[0])
+        amount_input.clear()
+        amount_input.send_keys('1')
+    
+    operations = [
+        ('read_snapshot', selenium_snapshot,
+         lambda: client.call_function(CDP_JS_SIBLING_TEXTS, XPathConfig.SPREAD)),
+        ('set_input', selenium_set_input,
+         lambda: client.call_function(CDP_JS_SET_INPUT, XPathConfig.AMOUNT_INPUT, '1')),
+        ('click', lambda: driver.find_element(By.XPATH, XPathConfig.SPREAD[0]).click(),
+         lambda: client.call_function(CDP_JS_CLICK, XPathConfig.SPREAD)),
+        ('read_history', lambda: driver.find_element(By.XPATH, XPathConfig.HISTORY[0]).text,
+         lambda: client.call_function(CDP_JS_TEXT, XPathConfig.HISTORY))
+    ]
+    results = {}
+    for name, selenium_op, cdp_op in operations:
+        for backend, op in (('selenium', selenium_op), ('cdp', cdp_op)):
+            samples = []
+            for _ in range(runs):
+                start_time = time.perf_counter()
+                try:
+                    op()
+                except Exception as e:
+                    logger.warning(f"❌ {name}/{backend} 失败: {str(e)}")
+                    break
+                samples.append((time.perf_counter() - start_time) * 1000)
+            results[(name, backend)] = samples
+        
+        line = [f"📊 {name}:"]
+        for backend in ('selenium', 'cdp'):
+            samples = sorted(results[(name, backend)])
+            if samples:
+                line.append(f"{backend} 中位数 {samples[len(samples) // 2]:.2f}ms "
+                            f"p95 {samples[min(len(samples) - 1, int(len(samples) * 0.95))]:.2f}ms")
+            else:
+                line.append(f"{backend} 无数据")
+        logger.info(' | '.join(line))
+    return results
+
+
+def benchmark_depth(path=None, messages=20000):
+    """测量 depth 增量处理(解析 + 更新本地订单簿 + microprice/失衡度)的单条耗时
+    
+    用法: python crypto_trader.py --bench-depth [录制文件] [条数]
+    录制文件为 binance.depth_record_file 录下的原始 combined stream 消息(每行一条);
+    不提供时按四个币种生成 1000 档快照和随机增量。四个币种 @100ms 合计约 40 条/秒。
+    """
+    logger = Logger("bench")
+    feed = BinanceFeed(logger)
+    raw_messages = []
+    if path:
+        with open(path, 'r', encoding='utf-8') as f:
+            raw_messages = [line.strip() for line in f if line.strip()][:messages]
+        # 录制数据没有快照,以每个币种的第一条增量为起点直接视为已同步
+        for raw in raw_messages:
+            data = json.loads(raw).get('data', {})
+            book = feed.books.setdefault(data['s'], DepthBook())
+            if not book.synced:
+                book.load_snapshot({'lastUpdateId': data['U'] - 1, 'bids': [], 'asks': []})
+    else:
+        rng = random.Random(1)
+        mids = {'BTCUSDT': 65000.0, 'ETHUSDT': 3500.0, 'SOLUSDT': 150.0, 'XRPUSDT': 0.5}
+        update_ids = {}
+        for symbol, mid in mids.items():
+            tick = mid / 100000
+            feed.books[symbol].load_snapshot({
+                'lastUpdateId': 1,
+                'bids': [[mid - (i + 1) * tick, rng.uniform(0.1, 5)] for i in range(1000)],
+                'asks': [[mid + (i + 1) * tick, rng.uniform(0.1, 5)] for i in range(1000)]
+            })
+            update_ids[symbol] = 1
+        symbols = list(mids)
+        for i in range(messages):
+            symbol = symbols[i % len(symbols)]
+            mid = mids[symbol] = mids[symbol] * (1 + rng.gauss(0, 0.00002))
+            tick = mid / 100000
+            first_id = update_ids[symbol] + 1
+            update_ids[symbol] += rng.randint(1, 20)
+            data = {
+                'e': 'depthUpdate', 'E': int(time.time() * 1000), 's': symbol,
+                'U': first_id, 'u': update_ids[symbol],
+                'b': [[f"{mid - rng.randint(1, 50) * tick:.8f}", f"{rng.choice([0, rng.uniform(0.1, 5)]):.4f}"] for _ in range(rng.randint(5, 25))],
+                'a': [[f"{mid + rng.randint(1, 50) * tick:.8f}", f"{rng.choice([0, rng.uniform(0.1, 5)]):.4f}"] for _ in range(rng.randint(5, 25))]
+            }
+            raw_messages.append(json.dumps({'stream': f"{symbol.lower()}@depth@100ms", 'data': data}))
+    
+    if not raw_messages:
+        logger.error("❌ 没有可回放的 depth 消息")
+        return None
+    start_time = time.perf_counter()
+    for raw in raw_messages:
+        feed._on_message(None, raw)
+    elapsed = time.perf_counter() - start_time
+    per_message_us = elapsed / len(raw_messages) * 1e6
+    rate = len(raw_messages) / elapsed
+    logger.info(f"📊 depth 增量 {len(raw_messages)} 条: 单条 {per_message_us:.1f}us, {rate:.0f} 条/秒, "
+                f"约为四币种实时速率(40条/秒)的 {rate / 40:.0f} 倍")
+    for symbol, stats in feed.depth_stats.items():
+        logger.info(f"   {symbol}: microprice={stats['microprice']:.6f} imbalance={stats['imbalance']:+.3f}")
+    return per_message_us
+
+
+def benchmark_decode(path=None, messages=50000):
+    """测量各解码后端处理币安行情消息的速度(单线程,即每核每秒条数)
+    
+    用法: python crypto_trader.py --bench-decode [录制文件] [条数]
+    录制文件每行一条原始 combined stream 消息(如 binance.depth_record_file 录下的数据);
+    不提供时按四个币种生成 ticker / aggTrade / depth 按实际比例混合的消息。
+    """
+    logger = Logger("bench")
+    if path:
+        with open(path, 'r', encoding='utf-8') as f:
+            corpus = [line.strip() for line in f if line.strip()][:messages]
+    else:
+        rng = random.Random(1)
+        corpus = []
+        symbols = {'BTCUSDT': 65000.0, 'ETHUSDT': 3500.0, 'SOLUSDT': 150.0, 'XRPUSDT': 0.5}
+        for i in range(messages):
+            symbol = list(symbols)[i % 4]
+            mid = symbols[symbol]
+            event_time = 1700000000000 + i
+            kind = rng.random()
+            if kind < 0.1:
+                # 24hr ticker 字段很多,实际只用到 c
+                data = {'e': '24hrTicker', 'E': event_time, 's': symbol, 'p': '12.3', 'P': '0.5',
+                        'w': f"{mid:.8f}", 'x': f"{mid:.8f}", 'c': f"{mid:.8f}", 'Q': '0.01',
+                        'b': f"{mid:.8f}", 'B': '1.2', 'a': f"{mid:.8f}", 'A': '0.8', 'o': f"{mid:.8f}",
+                        'h': f"{mid * 1.01:.8f}", 'l': f"{mid * 0.99:.8f}", 'v': '12345.6', 'q': '8.0e8',
+                        'O': event_time - 86400000, 'C': event_time, 'F': 1, 'L': 1000000, 'n': 1000000}
+            elif kind < 0.6:
+                data = {'e': 'aggTrade', 'E': event_time, 's': symbol, 'a': i, 'p': f"{mid:.8f}",
+                        'q': '0.01', 'f': i, 'l': i, 'T': event_time, 'm': True, 'M': True}
+            else:
+                data = {'e': 'depthUpdate', 'E': event_time, 's': symbol, 'U': i, 'u': i + 5,
+                        'b': [[f"{mid - k * mid / 1e5:.8f}", f"{rng.uniform(0, 5):.8f}"] for k in range(rng.randint(5, 25))],
+                        'a': [[f"{mid + k * mid / 1e5:.8f}", f"{rng.uniform(0, 5):.8f}"] for k in range(rng.randint(5, 25))]}
+            corpus.append(json.dumps({'stream': f"{symbol.lower()}@{data['e']}", 'data': data}, separators=(',', ':')))
+    
+    if not corpus:
+        logger.error("❌ 没有可回放的消息")
+        return None
+    results = {}
+    for backend in BinanceDecoder.available_backends():
+        decoder = BinanceDecoder(backend)
+        start_time = time.perf_counter()
+        for raw in corpus:
+            decoder.decode(raw)
+        elapsed = time.perf_counter() - start_time
+        results[backend] = len(corpus) / elapsed
+        logger.info(f"📊 {backend}: {results[backend]:.0f} 条/秒/核, 单条 {elapsed / len(corpus) * 1e6:.2f}us")
+    missing = [backend for backend in BinanceDecoder.BACKENDS if backend not in results]
+    if missing:
+        logger.info(f"未安装: {', '.join(missing)}")
+    return results
+
+
 if __name__ == "__main__":
+    # 基准测试入口
+    if len(sys.argv) > 1 and sys.argv[1] == '--bench-blocking':
+        benchmark_request_blocking(sys.argv[2] if len(sys.argv) > 2 else None,
+                                   runs=int(sys.argv[3]) if len(sys.argv) > 3 else 5,
+                                   port=int(sys.argv[4]) if len(sys.argv) > 4 else 9222)
+        sys.exit(0)
+    if len(sys.argv) > 2 and sys.argv[1] == '--bench-cdp':
+        benchmark_cdp(sys.argv[2],
+                      runs=int(sys.argv[3]) if len(sys.argv) > 3 else 50,
+                      port=int(sys.argv[4]) if len(sys.argv) > 4 else 9222)
+        sys.exit(0)
+    if len(sys.argv) > 1 and sys.argv[1] == '--bench-decode':
+        benchmark_decode(sys.argv[2] if len(sys.argv) > 2 else None,
+                         messages=int(sys.argv[3]) if len(sys.argv) > 3 else 50000)
+        sys.exit(0)
+    if len(sys.argv) > 1 and sys.argv[1] == '--bench-depth':
+        benchmark_depth(sys.argv[2] if len(sys.argv) > 2 else None,
+                        messages=int(sys.argv[3]) if len(sys.argv) > 3 else 20000)
+        sys.exit(0)
+    
     try:
         # 初始化日志
         logger = Logger("main")
@@ -4066,12 +8055,23 @@ if __name__ == "__main__":
         logger.info(f"Python版本: {platform.python_version()}")
         logger.info(f"启动参数: {sys.argv}")
             
-        # 创建并运行主程序
-        app = CryptoTrader()
+        # 创建并运行主程序(--daemon: 无GUI守护进程模式,可用于systemd)
+        daemon_mode = '--daemon' in sys.argv
+        app = CryptoTrader(daemon=daemon_mode)
         
         # 设置关闭处理
         def on_close():
             try:
+                if hasattr(app, 'browser_queue'):
+                    app.browser_queue.stop()
+                if hasattr(app, 'binance_feed') and app.binance_feed:
+                    app.binance_feed.stop()
+                if hasattr(app, 'price_driver') and app.price_driver:
+                    app._close_price_session()
+                if hasattr(app, 'next_driver') and app.next_driver:
+                    app._discard_next_market()
+                if hasattr(app, 'tick_journal_file') and app.tick_journal_file:
+                    app.tick_journal_file.close()
                 if hasattr(app, 'driver') and app.driver:
                     app.logger.info("正在关闭浏览器...")
                     app.driver.quit()
@@ -4082,6 +8082,11 @@ if __name__ == "__main__":
                 app.root.destroy()
                 
         app.root.protocol("WM_DELETE_WINDOW", on_close)
+        if daemon_mode:
+            # systemd 停止服务时发送 SIGTERM
+            signal.signal(signal.SIGTERM, lambda signum, frame: on_close())
+            signal.signal(signal.SIGINT, lambda signum, frame: on_close())
+            app.root.after(0, app.start_monitoring)
         app.root.mainloop()
         
     except Exception as e:
@@ -4093,6 +8098,8 @@ if __name__ == "__main__":
         
         # 尝试显示错误消息框
         try:
+            if '--daemon' in sys.argv:
+                raise RuntimeError("守护进程模式不显示消息框")
             import tkinter as tk
             from tkinter import messagebox
             root = tk.Tk()
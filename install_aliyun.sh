@@ -52,6 +52,9 @@ pip install --no-cache-dir selenium
 pip install --no-cache-dir pyautogui
 pip install --no-cache-dir screeninfo
 pip install --no-cache-dir requests
+pip install --no-cache-dir websockets  # 可选: CDP直连热路径
+pip install --no-cache-dir numpy  # 可选: 币安-Polymarket领先滞后分析
+pip install --no-cache-dir msgspec orjson  # 可选: 币安行情快速解码
 
 # 安装GUI相关依赖（Ubuntu特有）
 echo "安装GUI相关依赖..."
@@ -70,6 +70,9 @@ pip3 install --no-cache-dir selenium
 pip3 install --no-cache-dir pyautogui
 pip3 install --no-cache-dir screeninfo
 pip3 install --no-cache-dir requests
+pip3 install --no-cache-dir websockets  # 可选: CDP直连热路径
+pip3 install --no-cache-dir numpy  # 可选: 币安-Polymarket领先滞后分析
+pip3 install --no-cache-dir msgspec orjson  # 可选: 币安行情快速解码
 # pip3 install --no-cache-dir pytesseract
 # pip3 install --no-cache-dir opencv-python-headless  # 安装headless版本，通常更稳定
 
@@ -95,6 +95,10 @@ install_driver() {
     return 1
 }
 
+# 调试端口和用户目录,可通过参数指定(用于热备 Chrome): start_chrome_xxx.sh [端口] [用户目录]
+DEBUG_PORT="${1:-9222}"
+USER_DATA_DIR="${2:-$HOME/ChromeDebug}"
+
 # 主流程
 echo -e "${YELLOW}开始执行浏览器启动流程...${NC}"
 
@@ -111,25 +115,32 @@ if ! check_driver; then
     fi
 fi
 
-export DISPLAY=:1
-
-# 设置X11授权
-if [ -f "$HOME/.Xauthority" ]; then
-    export XAUTHORITY="$HOME/.Xauthority"
+# 无头模式(CHROME_HEADLESS=1)不需要X11桌面
+HEADLESS_ARGS=()
+if [ "$CHROME_HEADLESS" = "1" ]; then
+    HEADLESS_ARGS=(--headless=new --window-size=1920,1080 --hide-scrollbars --mute-audio)
+    echo -e "${YELLOW}使用无头模式启动,不依赖 DISPLAY${NC}"
 else
-    # 尝试生成授权文件
-    touch "$HOME/.Xauthority"
-    export XAUTHORITY="$HOME/.Xauthority"
-fi
+    export DISPLAY=:1
 
-echo -e "${YELLOW}使用 DISPLAY=1"
-echo -e "${YELLOW}使用 XAUTHORITY=$XAUTHORITY${NC}"
+    # 设置X11授权
+    if [ -f "$HOME/.Xauthority" ]; then
+        export XAUTHORITY="$HOME/.Xauthority"
+    else
+        # 尝试生成授权文件
+        touch "$HOME/.Xauthority"
+        export XAUTHORITY="$HOME/.Xauthority"
+    fi
+
+    echo -e "${YELLOW}使用 DISPLAY=1"
+    echo -e "${YELLOW}使用 XAUTHORITY=$XAUTHORITY${NC}"
+fi
 
 # 启动 Chrome（调试端口）- 只用项目根目录下的 chrome
 echo -e "${GREEN}启动 Chrome 中...${NC}"
 if [ -x "$SCRIPT_DIR/google-chrome" ]; then
     "$SCRIPT_DIR/google-chrome" \
-        --remote-debugging-port=9222 \
+        --remote-debugging-port=$DEBUG_PORT \
         --no-sandbox \
         --disable-gpu \
         --disable-software-rasterizer \
@@ -146,7 +157,8 @@ if [ -x "$SCRIPT_DIR/google-chrome" ]; then
         --disable-renderer-backgrounding \
         --disable-features=TranslateUI,BlinkGenPropertyTrees,SitePerProcess,IsolateOrigins \
         --noerrdialogs \
-        --user-data-dir="$HOME/ChromeDebug" \
+        --user-data-dir="$USER_DATA_DIR" \
+        "${HEADLESS_ARGS[@]}" \
         about:blank
 else
     echo -e "${RED}Chrome 未找到${NC}"
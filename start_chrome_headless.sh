@@ -0,0 +1,8 @@
+#!/bin/bash
+
+# Ubuntu 无头Chrome启动脚本(不需要 Xvfb/LXDE/VNC)
+# 用法: start_chrome_headless.sh [端口] [用户目录]
+# 登录状态来自有界面模式导出的 login_cookies.json,由 crypto_trader.py 在连接后导入
+SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
+
+CHROME_HEADLESS=1 exec bash "$SCRIPT_DIR/start_chrome_aliyun.sh" "$@"
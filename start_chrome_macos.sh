@@ -93,6 +93,10 @@ install_driver() {
     return 1
 }
 
+# 调试端口和用户目录,可通过参数指定(用于热备 Chrome): start_chrome_xxx.sh [端口] [用户目录]
+DEBUG_PORT="${1:-9222}"
+USER_DATA_DIR="${2:-$HOME/ChromeDebug}"
+
 # 主流程
 echo -e "${YELLOW}开始执行浏览器启动流程...${NC}"
 
@@ -115,11 +119,11 @@ export PATH="/usr/local/bin:$PATH"
 # 启动 Chrome（调试端口）
 echo -e "${GREEN}启动 Chrome 中...${NC}"
 "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome" \
-    --remote-debugging-port=9222 \
+    --remote-debugging-port=$DEBUG_PORT \
     --disable-translate \
     --no-first-run \
     --disable-extensions \
-    --user-data-dir="$HOME/ChromeDebug" \
+    --user-data-dir="$USER_DATA_DIR" \
     https://polymarket.com/markets/crypto
 
 echo -e "${GREEN}Chrome 已成功启动${NC}"
\ No newline at end of file
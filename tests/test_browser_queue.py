@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""浏览器命令队列的线程约束测试"""
+import logging
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('selenium')
+pytest.importorskip('websocket')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from crypto_trader import BrowserCommandQueue, Metrics  # noqa: E402
+
+LOGGER = logging.getLogger('test_browser_queue')
+
+
+@pytest.fixture
+def queue():
+    browser_queue = BrowserCommandQueue(LOGGER, Metrics())
+    yield browser_queue
+    browser_queue.stop()
+
+
+def test_run_refuses_to_block_main_thread(queue):
+    executed = threading.Event()
+
+    with pytest.raises(RuntimeError):
+        queue.run(BrowserCommandQueue.NAVIGATION, 'check_url', executed.set)
+    # 主线程显式投递,命令照常在浏览器线程中执行
+    command = queue.submit(BrowserCommandQueue.NAVIGATION, 'check_url', executed.set)
+    assert command.done.wait(5)
+    assert executed.is_set()
+
+
+def test_run_waits_for_result_off_main_thread(queue):
+    results = []
+
+    def caller():
+        results.append(queue.run(BrowserCommandQueue.PRICE, 'read_prices',
+                                 lambda: threading.current_thread().name, timeout=5))
+
+    thread = threading.Thread(target=caller)
+    thread.start()
+    thread.join(10)
+    assert results == ['browser-worker']
+
+
+def test_trade_commands_run_before_queued_navigation(queue):
+    order = []
+    gate = threading.Event()
+    queue.submit(BrowserCommandQueue.HEALTH, 'blocker', lambda: gate.wait(5))
+    queue.submit(BrowserCommandQueue.NAVIGATION, 'refresh_page', lambda: order.append('refresh_page'))
+    trade = queue.submit(BrowserCommandQueue.TRADE, 'buy', lambda: order.append('buy'))
+    assert queue.preempt_event.is_set()
+    gate.set()
+    assert trade.done.wait(5)
+    navigation_done = threading.Event()
+    queue.submit(BrowserCommandQueue.HEALTH, 'marker', navigation_done.set)
+    assert navigation_done.wait(5)
+    assert order == ['buy', 'refresh_page']
+    assert not queue.preempt_event.is_set()
+
+
+def test_pending_trade_is_not_queued_twice(queue):
+    calls = []
+    gate = threading.Event()
+
+    def buy():
+        calls.append('buy')
+        gate.wait(5)
+        return True
+
+    results = []
+    callers = [threading.Thread(target=lambda: results.append(queue.run(BrowserCommandQueue.TRADE, 'buy_yes1', buy)))
+               for _ in range(2)]
+    callers[0].start()
+    while 'buy_yes1' not in queue.pending:
+        time.sleep(0.01)
+    callers[1].start()
+    time.sleep(0.2)
+    gate.set()
+    for caller in callers:
+        caller.join(10)
+    assert calls == ['buy']
+    assert results == [True, True]
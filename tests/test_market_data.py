@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+"""行情和市场解析组件对接本地桩服务的测试
+
+MarketDiscovery / KlineStore / BinanceFeed 的接口地址都可配置,这里用本地 HTTP 和 websocket
+桩服务代替 Gamma API 与币安,检查请求路径、分页和解析结果。
+"""
+import asyncio
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+pytest.importorskip('selenium')
+pytest.importorskip('websocket')
+pytest.importorskip('requests')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import crypto_trader  # noqa: E402
+from crypto_trader import BinanceFeed, KlineStore, MarketDiscovery  # noqa: E402
+
+LOGGER = logging.getLogger('test_market_data')
+
+
+class StubHTTPServer:
+    """本地 HTTP 桩服务: routes 为 {路径: handler(query) -> JSON对象},记录每个请求的路径和参数"""
+    def __init__(self, routes):
+        self.routes = routes
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+                stub.requests.append((parsed.path, query))
+                route = stub.routes.get(parsed.path)
+                if route is None:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                body = json.dumps(route(query)).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def paths(self, path):
+        return [query for request_path, query in self.requests if request_path == path]
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def http_stub():
+    servers = []
+
+    def start(routes):
+        server = StubHTTPServer(routes)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.close()
+
+
+def test_market_discovery_validates_predicted_slug(http_stub, tmp_path):
+    assert MarketDiscovery.predict_slug('SOL', datetime(2026, 6, 10)) == 'solana-up-or-down-on-june-10'
+    # 缓存只保留昨天及以后的记录,用今天的日期
+    day = datetime.now()
+    slug = MarketDiscovery.predict_slug('SOL', day)
+    stub = http_stub({'/events': lambda query: [{'slug': query['slug'], 'closed': False}]})
+    discovery = MarketDiscovery(LOGGER, api_base_url=stub.url + '/',
+                                cache_file=str(tmp_path / 'market_cache.json'))
+
+    url = discovery.resolve('SOL', day)
+
+    assert url == f"https://polymarket.com/event/{slug}"
+    assert stub.requests == [('/events', {'slug': slug})]
+    with open(tmp_path / 'market_cache.json', encoding='utf-8') as f:
+        assert json.load(f)['SOL'][day.strftime('%Y-%m-%d')] == url
+    # 第二次直接命中缓存,不再请求接口
+    assert discovery.resolve('SOL', day) == url
+    assert len(stub.requests) == 1
+
+
+def test_market_discovery_falls_back_to_search(http_stub, tmp_path):
+    day = datetime(2026, 6, 10)
+    events = [
+        {'title': 'Bitcoin Up or Down on June 10?', 'slug': 'btc-closed', 'closed': True},
+        {'title': 'Bitcoin Up or Down on June 1?', 'slug': 'btc-june-1', 'closed': False},
+        {'title': 'Bitcoin Up or Down on June 10?', 'slug': 'btc-june-10-renamed', 'closed': False},
+    ]
+    stub = http_stub({'/events': lambda query: [], '/public-search': lambda query: {'events': events}})
+    discovery = MarketDiscovery(LOGGER, api_base_url=stub.url, cache_file=str(tmp_path / 'market_cache.json'))
+
+    url = discovery.resolve('BTC', day)
+
+    assert url == 'https://polymarket.com/event/btc-june-10-renamed'
+    searches = stub.paths('/public-search')
+    assert len(searches) == 1
+    assert searches[0]['q'] == crypto_trader.COIN_SEARCH_TEXT['BTC']
+    assert searches[0]['events_status'] == 'active'
+
+
+def kline_route(now_ms):
+    """按 startTime/limit 返回到当前为止的1分钟K线,开盘价等于分钟序号"""
+    def route(query):
+        start = int(query['startTime'])
+        limit = int(query['limit'])
+        rows = []
+        open_time = start - start % KlineStore.INTERVAL_MS
+        while open_time < now_ms and len(rows) < limit:
+            minute = open_time // KlineStore.INTERVAL_MS
+            rows.append([open_time, str(minute), str(minute + 1), str(minute - 1), str(minute + 0.5),
+                         '1.0', open_time + 59999])
+            open_time += KlineStore.INTERVAL_MS
+        return rows
+    return route
+
+
+def test_kline_store_backfill_paginates_and_prunes_csv(http_stub, tmp_path):
+    now_ms = int(time.time() * 1000)
+    current_minute = now_ms - now_ms % KlineStore.INTERVAL_MS
+    start_ms = current_minute - 1500 * KlineStore.INTERVAL_MS
+    stub = http_stub({'/api/v3/klines': kline_route(now_ms)})
+    store = KlineStore(LOGGER, rest_base_url=stub.url, directory=str(tmp_path / 'klines'),
+                       retention_days=1 / 24)
+
+    added = store.backfill('btcusdt', start_ms)
+
+    assert added == 1501
+    pages = stub.paths('/api/v3/klines')
+    assert [int(query['startTime']) for query in pages] == [start_ms, start_ms + 1000 * KlineStore.INTERVAL_MS]
+    assert all(query['symbol'] == 'BTCUSDT' and query['interval'] == '1m' for query in pages)
+
+    # CSV 只保留最后一根K线之前 retention 范围内的数据(1小时 = 61根)
+    with open(tmp_path / 'klines' / 'BTCUSDT.csv', encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    assert len(lines) == 61
+    assert int(lines[-1].split(',')[0]) == current_minute
+    assert lines[-1].split(',')[1:] == [str(float(current_minute // KlineStore.INTERVAL_MS + delta))
+                                        for delta in (0, 1, -1, 0.5)]
+
+    # 本地已有的分钟不再请求,新的实例从磁盘读取
+    reloaded = KlineStore(LOGGER, rest_base_url=stub.url, directory=str(tmp_path / 'klines'))
+    minute_ms = current_minute - 10 * KlineStore.INTERVAL_MS
+    assert reloaded.open_at('BTCUSDT', minute_ms + 1234) == float(minute_ms // KlineStore.INTERVAL_MS)
+    assert len(stub.paths('/api/v3/klines')) == 2
+
+
+def test_binance_feed_backfills_agg_trade_gap_in_pages(http_stub):
+    base_time = int(time.time() * 1000)
+
+    def agg_trades(query):
+        from_id = int(query['fromId'])
+        return [{'a': trade_id, 'p': f"{100 + trade_id * 0.001:.3f}", 'q': '1', 'T': base_time + trade_id}
+                for trade_id in range(from_id, from_id + int(query['limit']))]
+
+    stub = http_stub({'/api/v3/aggTrades': agg_trades})
+    feed = BinanceFeed(LOGGER, symbols=('BTCUSDT',), depth=False, rest_base_url=stub.url,
+                       trade_window_seconds=3600)
+    feed.trades['BTCUSDT'].append((base_time + 1, 100.001))
+
+    feed._backfill_trades('BTCUSDT', 2, 2501)
+
+    pages = stub.paths('/api/v3/aggTrades')
+    assert [int(query['fromId']) for query in pages] == [2, 1002, 2002]
+    assert all(query['symbol'] == 'BTCUSDT' and query['limit'] == '1000' for query in pages)
+    trades = list(feed.trades['BTCUSDT'])
+    assert len(trades) == 2501
+    assert trades == sorted(trades)
+    assert feed.price_at('BTCUSDT', base_time + 1500) == pytest.approx(101.5)
+
+
+class StubWebSocketServer:
+    """本地 websocket 桩服务: 记录连接路径,连上后依次推送 messages"""
+    def __init__(self, messages):
+        websockets = pytest.importorskip('websockets')
+        self.messages = messages
+        self.paths = []
+        self.loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        async def handler(connection):
+            request = getattr(connection, 'request', None)
+            self.paths.append(request.path if request else connection.path)
+            for message in self.messages:
+                await connection.send(json.dumps(message))
+            await connection.wait_closed()
+
+        async def serve():
+            self.server = await websockets.serve(handler, '127.0.0.1', 0)
+            self.port = self.server.sockets[0].getsockname()[1]
+            ready.set()
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            self.loop.run_until_complete(serve())
+            self.loop.run_forever()
+
+        threading.Thread(target=run, daemon=True).start()
+        assert ready.wait(5)
+        self.url = f"ws://127.0.0.1:{self.port}"
+
+    def close(self):
+        async def shutdown():
+            self.server.close()
+            await self.server.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self.loop).result(10)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+def test_binance_feed_parses_combined_stream():
+    event_time = int(time.time() * 1000)
+    messages = [
+        {'stream': 'btcusdt@aggTrade',
+         'data': {'e': 'aggTrade', 'E': event_time, 's': 'BTCUSDT', 'a': 1, 'p': '65000.10', 'q': '0.1',
+                  'T': event_time - 200}},
+        {'stream': 'btcusdt@aggTrade',
+         'data': {'e': 'aggTrade', 'E': event_time, 's': 'BTCUSDT', 'a': 2, 'p': '65001.20', 'q': '0.1',
+                  'T': event_time - 100}},
+        {'stream': 'btcusdt@ticker',
+         'data': {'e': '24hrTicker', 'E': event_time, 's': 'BTCUSDT', 'c': '65002.30', 'o': '64000.00'}},
+    ]
+    server = StubWebSocketServer(messages)
+    feed = BinanceFeed(LOGGER, symbols=('BTCUSDT', 'ETHUSDT'), base_url=server.url + '/', depth=False,
+                       decoder='json')
+    received = []
+    feed.add_listener(lambda symbol, price, data: received.append((symbol, price)))
+    try:
+        feed.start()
+        assert feed.wait_for_price('BTCUSDT', timeout=10) == 65002.3
+        assert server.paths == ['/stream?streams=btcusdt@ticker/btcusdt@aggTrade/ethusdt@ticker/ethusdt@aggTrade']
+        assert received == [('BTCUSDT', 65002.3)]
+        assert feed.get_latest('BTCUSDT')['event_time'] == event_time
+        assert feed.price_at('BTCUSDT', event_time - 150) == 65000.1
+        assert feed.get_latest('ETHUSDT') is None
+    finally:
+        feed.stop()
+        server.close()